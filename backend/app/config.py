@@ -23,6 +23,72 @@ class Settings(BaseSettings):
     google_api_key: Optional[str] = Field(default=None, alias="GOOGLE_API_KEY")
     gemini_api_key: Optional[str] = Field(default=None, alias="GEMINI_API_KEY")
     gemini_model: str = Field(default="gemini-1.5-flash", alias="GEMINI_MODEL")
+
+    # Gemini client limits (per process)
+    llm_max_concurrency: int = Field(default=4, alias="LLM_MAX_CONCURRENCY")
+    llm_timeout: float = Field(default=60.0, alias="LLM_TIMEOUT")  # seconds per attempt
+    llm_max_retries: int = Field(default=3, alias="LLM_MAX_RETRIES")
+    llm_backoff_base: float = Field(default=0.5, alias="LLM_BACKOFF_BASE")  # seconds
+    llm_backoff_max: float = Field(default=8.0, alias="LLM_BACKOFF_MAX")
+
+    # Transcript budget for caption prompts (estimated tokens, ~4 chars each). Longer
+    # transcripts are cut to their most central segments; past LLM_MAP_REDUCE_TOKENS they
+    # are condensed chunk by chunk in parallel first.
+    llm_prompt_budget_tokens: int = Field(default=3000, alias="LLM_PROMPT_BUDGET_TOKENS")
+    llm_map_reduce_tokens: int = Field(default=12000, alias="LLM_MAP_REDUCE_TOKENS")
+    llm_map_chunk_tokens: int = Field(default=4000, alias="LLM_MAP_CHUNK_TOKENS")
+
+    # Gemini response cache (shared on disk by all workers)
+    llm_cache_enabled: bool = Field(default=True, alias="LLM_CACHE_ENABLED")
+    llm_cache_path: str = Field(default="data/llm_cache.sqlite3", alias="LLM_CACHE_PATH")
+    llm_cache_ttl: float = Field(default=7 * 86400.0, alias="LLM_CACHE_TTL")  # seconds
+    llm_cache_max_bytes: int = Field(default=64 * 1024 * 1024, alias="LLM_CACHE_MAX_BYTES")
+
+    # Batch captioning: transcripts up to CAPTION_PACK_MAX_CHARS share Gemini requests
+    caption_pack_max_chars: int = Field(default=2000, alias="CAPTION_PACK_MAX_CHARS")
+    caption_pack_budget_chars: int = Field(default=8000, alias="CAPTION_PACK_BUDGET_CHARS")  # per packed request
+    caption_pack_max_items: int = Field(default=6, alias="CAPTION_PACK_MAX_ITEMS")
+    caption_batch_max_paths: int = Field(default=50, alias="CAPTION_BATCH_MAX_PATHS")
+
+    # Media previews
+    thumbnail_cache_bytes: int = Field(default=32 * 1024 * 1024, alias="THUMBNAIL_CACHE_BYTES")
+    thumbnail_candidates: int = Field(default=6, alias="THUMBNAIL_CANDIDATES")
+    sprite_interval: float = Field(default=2.0, alias="SPRITE_INTERVAL")  # seconds per tile
+    proxy_height: int = Field(default=540, alias="PROXY_HEIGHT")  # 360 or 540
+    proxy_keyframe_interval: float = Field(default=0.5, alias="PROXY_KEYFRAME_INTERVAL")  # seconds
+    proxy_workers: int = Field(default=1, alias="PROXY_WORKERS")
+    hls_segment_seconds: float = Field(default=4.0, alias="HLS_SEGMENT_SECONDS")
+    hls_segment_type: str = Field(default="fmp4", alias="HLS_SEGMENT_TYPE")  # fmp4 or mpegts
+    hls_cache_bytes: int = Field(default=2 * 1024 * 1024 * 1024, alias="HLS_CACHE_BYTES")
+
+    # Storage catalog
+    catalog_db_path: str = Field(default="data/catalog.sqlite3", alias="CATALOG_DB_PATH")
+    catalog_reconcile_interval: float = Field(default=300.0, alias="CATALOG_RECONCILE_INTERVAL")  # seconds
+
+    # Resumable uploads
+    upload_max_bytes: int = Field(default=50 * 1024 * 1024 * 1024, alias="UPLOAD_MAX_BYTES")
+    upload_session_ttl: float = Field(default=86400.0, alias="UPLOAD_SESSION_TTL")  # seconds
+    upload_stream_buffer_bytes: int = Field(default=4 * 1024 * 1024, alias="UPLOAD_STREAM_BUFFER_BYTES")
+
+    # Post-upload precomputation (normalize -> probe -> audio -> transcript -> caption draft)
+    pipeline_enabled: bool = Field(default=True, alias="PIPELINE_ENABLED")
+    pipeline_steps: str = Field(default="normalize,probe,audio,transcript", alias="PIPELINE_STEPS")  # add "caption" for LLM drafts
+    pipeline_workers: int = Field(default=1, alias="PIPELINE_WORKERS")
+    pipeline_nice: int = Field(default=10, alias="PIPELINE_NICE")
+
+    # Bulk storage operations
+    bulk_workers: int = Field(default=4, alias="BULK_WORKERS")
+    archive_dir: str = Field(default="archive", alias="ARCHIVE_DIR")
+
+    # Storage retention (each policy is disabled when its value is 0)
+    retention_enabled: bool = Field(default=False, alias="RETENTION_ENABLED")
+    retention_interval: float = Field(default=3600.0, alias="RETENTION_INTERVAL")  # seconds between runs
+    retention_throttle: float = Field(default=0.2, alias="RETENTION_THROTTLE")  # pause after each file operation
+    retention_original_days: int = Field(default=0, alias="RETENTION_ORIGINAL_DAYS")
+    retention_mezzanine_days: int = Field(default=0, alias="RETENTION_MEZZANINE_DAYS")
+    retention_mezzanine_crf: int = Field(default=26, alias="RETENTION_MEZZANINE_CRF")
+    retention_archive_days: int = Field(default=0, alias="RETENTION_ARCHIVE_DAYS")
+    storage_quota_bytes: int = Field(default=0, alias="STORAGE_QUOTA_BYTES")
     
     # Pydantic v2 settings
     model_config = SettingsConfigDict(
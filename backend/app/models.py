@@ -7,6 +7,7 @@ class StoryRequest(BaseModel):
     format: Optional[Literal["lucy", "narrative", "business", "motivational"]] = None
     useCustomPrompt: Optional[bool] = None
     customPrompt: Optional[str] = None
+    regenerate: bool = False
 
 
 class TranscriptSegment(BaseModel):
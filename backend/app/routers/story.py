@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from backend.app.models import StoryRequest
-from backend.app.services.llm import generate_story_with_gemini, generate_chat_response
+from backend.app.services import llm_cache
+from backend.app.services.llm import generate_story_async, generate_chat_response_async, stream_chat_events, stream_story_events
+from backend.app.services.sse import event_stream
 
 
 router = APIRouter(tags=["story"])
@@ -8,22 +10,54 @@ router = APIRouter(tags=["story"])
 
 @router.post("/story/generate")
 async def generate_story(req: StoryRequest):
-    story = generate_story_with_gemini(
+    story = await generate_story_async(
         transcript=req.text,
         story_format=req.format,
         use_custom_prompt=req.useCustomPrompt,
         custom_prompt=req.customPrompt,
+        regenerate=req.regenerate,
     )
     return {"story": story}
 
 
+@router.post("/story/stream")
+async def stream_story(req: StoryRequest):
+    """Server-Sent Events: "delta" events with formatted text as lines complete, then "done"."""
+    return event_stream(stream_story_events(
+        transcript=req.text,
+        story_format=req.format,
+        use_custom_prompt=req.useCustomPrompt,
+        custom_prompt=req.customPrompt,
+        regenerate=req.regenerate,
+    ))
+
+
 @router.post("/chat")
 async def chat(payload: dict):
     message = str(payload.get("message", "")).strip()
     if not message:
         return {"reply": "Please provide a message."}
     hint = str(payload.get("hint", "")).strip() or None
-    reply = generate_chat_response(message, hint)
+    reply = await generate_chat_response_async(message, hint, regenerate=bool(payload.get("regenerate")))
     return {"reply": reply}
 
 
+@router.post("/chat/stream")
+async def chat_stream(payload: dict):
+    message = str(payload.get("message", "")).strip()
+    if not message:
+        return {"reply": "Please provide a message."}
+    hint = str(payload.get("hint", "")).strip() or None
+    return event_stream(stream_chat_events(message, hint, regenerate=bool(payload.get("regenerate"))))
+
+
+@router.get("/llm/cache")
+async def llm_cache_stats():
+    return llm_cache.stats()
+
+
+@router.delete("/llm/cache")
+async def llm_cache_clear():
+    return {"ok": True, "removed": llm_cache.clear()}
+
+
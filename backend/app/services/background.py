@@ -0,0 +1,43 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+
+class BackgroundQueue:
+    """Small named thread pool that de-duplicates jobs by key and remembers failures."""
+
+    def __init__(self, name: str, workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending: set[str] = set()
+        self._failed: Dict[str, str] = {}
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any) -> bool:
+        """Queue fn(*args) unless a job with the same key is already pending."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        self._executor.submit(self._run, key, fn, *args)
+        return True
+
+    def _run(self, key: str, fn: Callable[..., Any], *args: Any) -> None:
+        try:
+            fn(*args)
+            self._failed.pop(key, None)
+        except HTTPException as e:
+            self._failed[key] = str(e.detail)
+        except Exception as e:
+            self._failed[key] = str(e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def is_pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def failure(self, key: str) -> Optional[str]:
+        return self._failed.get(key)
@@ -0,0 +1,237 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from backend.app.config import settings
+from backend.app.services import catalog, pipeline
+from backend.app.services.content_store import forget_path, move_ref, release_clip
+from backend.app.services.storage import STORAGE_ROOT, remove_derived_artifacts, resolve_storage_path, storage_relative
+
+
+OPERATIONS = ("delete", "move", "archive")
+KIND_FOLDERS = tuple(catalog.KIND_DIRS)
+_FOLDER_FOR_KIND = {kind: folder for folder, kind in catalog.KIND_DIRS.items()}
+MAX_RANGE_DAYS = 3660
+MAX_FINISHED_JOBS = 100
+
+_pool = ThreadPoolExecutor(max_workers=max(1, settings.bulk_workers), thread_name_prefix="bulk")
+_jobs_lock = threading.Lock()
+_jobs: Dict[str, Dict[str, Any]] = {}
+
+
+def delete_asset(path: Path) -> None:
+    """Delete a stored file and everything that tracks or derives from it."""
+    path.unlink()
+    catalog.remove_file(path)
+    release_clip(path)
+    remove_derived_artifacts(path)
+    pipeline.release_ingest(forget_path(path))
+
+
+def _unique_destination(dest: Path) -> Path:
+    if not dest.exists():
+        return dest
+    stamp = datetime.now().strftime("%H%M%S")
+    return dest.with_name(f"{dest.stem}_{stamp}{dest.suffix}")
+
+
+def _stored_asset(path: Path) -> Tuple[str, str, str]:
+    """(relative path, kind, date) of a file in storage/YYYY/MM/DD/<kind folder>/, or 400."""
+    info = catalog.classify(path)
+    if info is None:
+        try:
+            shown = storage_relative(path)
+        except ValueError:
+            shown = path.name
+        raise HTTPException(status_code=400, detail=f"Not a stored asset: {shown}")
+    return info
+
+
+def move_asset(path: Path, dest_date: str) -> Path:
+    """Move a file to the same kind folder of another date (YYYY/MM/DD)."""
+    _, kind, date = _stored_asset(path)
+    if date == dest_date:
+        return path
+    dest = _unique_destination(STORAGE_ROOT / dest_date / _FOLDER_FOR_KIND[kind] / path.name)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(path), str(dest))
+    # Derived artifacts live next to the old date; drop them only once the move succeeded
+    remove_derived_artifacts(path)
+    move_ref(path, dest)
+    catalog.remove_file(path)
+    catalog.record_file(dest)
+    return dest
+
+
+def archive_asset(path: Path) -> Path:
+    """Move a file out of storage/ into the archive tier, keeping its dated layout."""
+    dest = _unique_destination(Path(settings.archive_dir) / storage_relative(path))
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(path), str(dest))
+    remove_derived_artifacts(path)
+    catalog.remove_file(path)
+    release_clip(path)
+    pipeline.release_ingest(forget_path(path))
+    return dest
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value.replace("-", "/"), "%Y/%m/%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date '{value}'. Use YYYY/MM/DD")
+
+
+def resolve_targets(
+    paths: Optional[List[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    kinds: Optional[List[str]] = None,
+) -> List[Path]:
+    """Explicit paths plus every file in storage/YYYY/MM/DD/<kind>/ for each day in range.
+
+    Explicit paths must be stored assets in the dated layout (caches, .cas and upload
+    sessions are rejected with 400); ones that no longer exist are skipped. Days are
+    addressed directly from the dated layout, so no tree walk is needed.
+    """
+    targets: Dict[str, Path] = {}
+    for raw in paths or []:
+        full = resolve_storage_path(raw)
+        _stored_asset(full)
+        if full.is_file():
+            targets[str(full)] = full
+    if date_from or date_to:
+        start = _parse_date(date_from or date_to or "")
+        end = _parse_date(date_to or date_from or "")
+        if end < start:
+            raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+        if (end - start).days > MAX_RANGE_DAYS:
+            raise HTTPException(status_code=400, detail="Date range too large")
+        folders = kinds or ["clips"]
+        unknown = [k for k in folders if k not in KIND_FOLDERS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown kind(s): {', '.join(unknown)}")
+        day = start
+        while day <= end:
+            for folder in folders:
+                try:
+                    with os.scandir(STORAGE_ROOT / day.strftime("%Y/%m/%d") / folder) as it:
+                        for entry in it:
+                            if entry.is_file() and not entry.name.endswith(".part"):
+                                full = Path(entry.path).resolve()
+                                targets[str(full)] = full
+                except OSError:
+                    pass
+            day += timedelta(days=1)
+    return sorted(targets.values())
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in job.items() if not k.startswith("_")}
+
+
+def _apply(op: str, path: Path, dest_date: Optional[str]) -> Dict[str, Any]:
+    rel = storage_relative(path)
+    if op == "delete":
+        delete_asset(path)
+        return {"path": rel}
+    if op == "move":
+        return {"path": rel, "moved_to": storage_relative(move_asset(path, dest_date or ""))}
+    return {"path": rel, "archived_to": str(archive_asset(path)).replace("\\", "/")}
+
+
+def _run_job(job_id: str) -> None:
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job["status"] = "running"
+        job["started_at"] = datetime.now().isoformat()
+    targets: List[Path] = job["_targets"]
+    futures = {_pool.submit(_apply, job["op"], p, job.get("dest_date")): p for p in targets}
+    for fut in as_completed(futures):
+        path = futures[fut]
+        with _jobs_lock:
+            try:
+                job["results"].append(fut.result())
+                job["succeeded"] += 1
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                job["errors"].append({"path": str(path), "error": detail})
+                job["failed"] += 1
+            job["processed"] += 1
+    with _jobs_lock:
+        job["status"] = "completed" if not job["failed"] else "completed_with_errors"
+        job["finished_at"] = datetime.now().isoformat()
+        job.pop("_targets", None)
+
+
+def _prune_jobs() -> None:
+    finished = [j for j in _jobs.values() if j.get("finished_at")]
+    finished.sort(key=lambda j: j["finished_at"])
+    for j in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        _jobs.pop(j["id"], None)
+
+
+def start_job(
+    op: str,
+    paths: Optional[List[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    kinds: Optional[List[str]] = None,
+    dest_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    if op not in OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"op must be one of: {', '.join(OPERATIONS)}")
+    if op == "move":
+        if not dest_date:
+            raise HTTPException(status_code=400, detail="dest_date is required for move")
+        dest_date = _parse_date(dest_date).strftime("%Y/%m/%d")
+    if not paths and not (date_from or date_to):
+        raise HTTPException(status_code=400, detail="Provide paths or a date range")
+    targets = resolve_targets(paths, date_from, date_to, kinds)
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "op": op,
+        "dest_date": dest_date,
+        "status": "queued",
+        "total": len(targets),
+        "processed": 0,
+        "succeeded": 0,
+        "failed": 0,
+        "results": [],
+        "errors": [],
+        "created_at": datetime.now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "_targets": targets,
+        "_created": time.monotonic(),
+    }
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job_id] = job
+    threading.Thread(target=_run_job, args=(job_id,), name=f"bulk-{job_id[:8]}", daemon=True).start()
+    return {"job_id": job_id, "total": len(targets)}
+
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return dict(_public(job), results=list(job["results"]), errors=list(job["errors"]))
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    with _jobs_lock:
+        return [
+            {k: v for k, v in _public(j).items() if k not in ("results", "errors")}
+            for j in sorted(_jobs.values(), key=lambda j: j["_created"], reverse=True)
+        ]
@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from backend.app.config import settings
+from backend.app.services import pipeline
+from backend.app.services.llm import generate_caption_and_title_async, generate_captions_packed_async
+from backend.app.services.prompt_budget import STOP_WORDS
+from backend.app.services.transcription import transcribe_media
+
+
+# Whisper is CPU/GPU bound: one on-demand transcription at a time, whoever asks
+_transcribe_lock = threading.Lock()
+
+
+def resolve_caption_path(raw_path: str) -> Path:
+    """Map an absolute URL, /media/..., /storage/... or storage-relative path to a stored file."""
+    storage_root = os.path.abspath("storage")
+    p = raw_path.replace("\\", "/")
+    if p.startswith("http://") or p.startswith("https://"):
+        p = urlparse(p).path
+    for prefix in ("/media/", "/storage/", "storage/"):
+        if p.startswith(prefix):
+            p = p[len(prefix):]
+            break
+    abs_path = os.path.abspath(os.path.join(storage_root, p.lstrip("/")))
+    if not abs_path.startswith(storage_root):
+        raise HTTPException(status_code=400, detail="Invalid path")
+    if not os.path.exists(abs_path):
+        raise HTTPException(status_code=404, detail="Video not found")
+    return Path(abs_path)
+
+
+def _transcribe_and_store(media: Path) -> str:
+    with _transcribe_lock:
+        # Another request may have transcribed the same content while we waited
+        cached = pipeline.cached_transcript(media)
+        if cached is not None:
+            return cached.get("transcript", "")
+        try:
+            text, segments, language, duration = transcribe_media(str(media))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Transcription failed: {e}")
+        pipeline.store_transcript(media, text, [s.model_dump() for s in segments], language, duration)
+        return text
+
+
+async def clip_transcript(media: Path) -> Tuple[str, bool]:
+    """Transcript for a stored clip and whether it came from the precomputed cache."""
+    cached = await run_in_threadpool(pipeline.cached_transcript, media)
+    if cached is not None:
+        return cached.get("transcript", ""), True
+    return await run_in_threadpool(_transcribe_and_store, media), False
+
+
+def _simple_terms(t: str, limit: int = 20) -> List[str]:
+    toks = re.findall(r"[A-Za-z][A-Za-z\-']+", t.lower())
+    freq: Dict[str, int] = {}
+    for tok in toks:
+        if tok in STOP_WORDS or len(tok) <= 2:
+            continue
+        freq[tok] = freq.get(tok, 0) + 1
+    return [k for k, _ in sorted(freq.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]]
+
+
+def fallback_caption(name: str, transcript: Optional[str]) -> Dict[str, str]:
+    """Deterministic title/caption/hashtags grounded in the transcript, for when Gemini fails."""
+    text = (transcript or "").strip()
+    terms = _simple_terms(text, 12)
+    title = (" ".join([w.capitalize() for w in terms[:6]]) or (name.rsplit('.', 1)[0]))[:60]
+    if not title:
+        title = "Daily Routine Overview"
+    caption = text[:1400] if text else ""
+    if len(caption) < 300:
+        caption = (caption + ("\n\n" + text))[:1200]
+    if not caption:
+        caption = "This clip summarizes the content of the video in plain language based on the available transcript."
+    tags = " ".join(["#" + w.replace(" ", "") for w in terms]) or "#video #transcript"
+    return {"title": title, "caption": caption.strip(), "hashtags": tags}
+
+
+def _transcript_key(text: str) -> str:
+    return hashlib.sha256(" ".join(text.split()).lower().encode("utf-8")).hexdigest()
+
+
+def _pack(keys: List[str], texts: Dict[str, str]) -> Tuple[List[List[str]], List[str]]:
+    """Group short transcripts into packed requests; everything else goes out alone.
+
+    First-fit over transcripts sorted longest first, bounded by CAPTION_PACK_BUDGET_CHARS
+    and CAPTION_PACK_MAX_ITEMS per request. A group left with one member is a single call.
+    """
+    short = sorted((k for k in keys if len(texts[k]) <= settings.caption_pack_max_chars), key=lambda k: -len(texts[k]))
+    singles = [k for k in keys if len(texts[k]) > settings.caption_pack_max_chars]
+    groups: List[List[str]] = []
+    sizes: List[int] = []
+    for key in short:
+        size = len(texts[key])
+        for n, group in enumerate(groups):
+            if len(group) < settings.caption_pack_max_items and sizes[n] + size <= settings.caption_pack_budget_chars:
+                group.append(key)
+                sizes[n] += size
+                break
+        else:
+            groups.append([key])
+            sizes.append(size)
+    packed = [g for g in groups if len(g) > 1]
+    singles += [g[0] for g in groups if len(g) == 1]
+    return packed, singles
+
+
+async def caption_events(
+    paths: List[str], seed: Optional[int] = None, regenerate: bool = False
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Caption many clips, yielding one ("caption", {...}) event per clip as it completes.
+
+    Bad paths and precomputed drafts are answered in a first pass, before any
+    transcription or Gemini work. Clips whose transcripts are already stored are then
+    captioned together: identical transcripts share one result and short ones are packed
+    several to a Gemini request. Clips that still need Whisper are transcribed one at a
+    time and each is sent to Gemini as soon as its transcript is ready, so captioning
+    overlaps transcription. Requests run concurrently under the client's
+    LLM_MAX_CONCURRENCY limit. Clips the model could not caption get the deterministic
+    fallback plus `llm_error`. Ends with a ("done", stats) event.
+    """
+    started = time.perf_counter()
+    stats = {
+        "clips": len(paths), "drafts": 0, "transcribed": 0, "deduped": 0, "packed_requests": 0, "single_requests": 0,
+        "packed_retries": 0, "fallbacks": 0, "failed": 0,
+    }
+
+    pending: List[Tuple[str, Path]] = []
+    for raw in paths:
+        try:
+            media = resolve_caption_path(raw)
+            if seed is None and not regenerate:
+                draft = await run_in_threadpool(pipeline.cached_caption, media)
+                if draft:
+                    cached = await run_in_threadpool(pipeline.cached_transcript, media)
+                    stats["drafts"] += 1
+                    yield "caption", {
+                        "path": raw, "ok": True, "source": "draft",
+                        "transcript": (cached or {}).get("transcript", ""), **draft,
+                    }
+                    continue
+        except HTTPException as e:
+            stats["failed"] += 1
+            yield "caption", {"path": raw, "ok": False, "status": e.status_code, "error": e.detail}
+            continue
+        pending.append((raw, media))
+
+    # transcript key -> clips sharing it, and the text/filename used to caption them
+    waiting: Dict[str, List[str]] = {}
+    texts: Dict[str, str] = {}
+    names: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    answered: Dict[str, int] = {}  # how many of waiting[key] already got their event
+    # Workers report ("result", key), ("error", raw, exc) and a final ("finished",)
+    events: "asyncio.Queue[Tuple[Any, ...]]" = asyncio.Queue()
+    tasks: List["asyncio.Future[None]"] = []
+    outstanding = [0]
+
+    def _launch(coro) -> None:
+        outstanding[0] += 1
+
+        async def _run() -> None:
+            try:
+                await coro
+            finally:
+                events.put_nowait(("finished",))
+        tasks.append(asyncio.ensure_future(_run()))
+
+    def _register(raw: str, media: Path, text: str) -> Optional[str]:
+        """Attach a clip to its transcript key; returns the key when it still needs a request."""
+        key = _transcript_key(text)
+        if key in waiting:
+            stats["deduped"] += 1
+            waiting[key].append(raw)
+            if key in results:
+                events.put_nowait(("result", key))
+            return None
+        texts[key] = text
+        names[key] = media.name
+        waiting[key] = [raw]
+        return key
+
+    async def _single(key: str) -> None:
+        try:
+            data = await generate_caption_and_title_async(
+                filename=names[key], transcript=texts[key], seed=seed, regenerate=regenerate
+            )
+            results[key] = {"source": "llm", **data}
+        except Exception as e:
+            results[key] = _fallback(key, e)
+        events.put_nowait(("result", key))
+
+    async def _packed(keys: List[str]) -> None:
+        by_id = {f"clip{n + 1}": key for n, key in enumerate(keys)}
+        try:
+            answers = await generate_captions_packed_async(
+                {clip_id: texts[key] for clip_id, key in by_id.items()}, seed=seed, regenerate=regenerate
+            )
+        except Exception:
+            answers = {}
+        for clip_id, data in answers.items():
+            results[by_id[clip_id]] = {"source": "llm_packed", **data}
+            events.put_nowait(("result", by_id[clip_id]))
+        # Whatever the packed answer left out is retried on its own
+        missing = [key for key in keys if key not in results]
+        stats["packed_retries"] += len(missing)
+        await asyncio.gather(*(_single(key) for key in missing))
+
+    async def _transcribe(clips: List[Tuple[str, Path]]) -> None:
+        for raw, media in clips:
+            try:
+                text = await run_in_threadpool(_transcribe_and_store, media)
+            except HTTPException as e:
+                events.put_nowait(("error", raw, e))
+                continue
+            stats["transcribed"] += 1
+            key = _register(raw, media, text)
+            if key is not None:
+                stats["single_requests"] += 1
+                _launch(_single(key))
+
+    def _fallback(key: str, e: Exception) -> Dict[str, Any]:
+        stats["fallbacks"] += 1
+        llm_error = e.detail if isinstance(e, HTTPException) else str(e)
+        return {"source": "fallback", "llm_error": llm_error, **fallback_caption(names[key], texts[key])}
+
+    ready: List[str] = []
+    untranscribed: List[Tuple[str, Path]] = []
+    for raw, media in pending:
+        cached = await run_in_threadpool(pipeline.cached_transcript, media)
+        if cached is None:
+            untranscribed.append((raw, media))
+            continue
+        key = _register(raw, media, cached.get("transcript", ""))
+        if key is not None:
+            ready.append(key)
+
+    packed, singles = _pack(ready, texts)
+    stats["packed_requests"] = len(packed)
+    stats["single_requests"] = len(singles)
+    for group in packed:
+        _launch(_packed(group))
+    for key in singles:
+        _launch(_single(key))
+    if untranscribed:
+        _launch(_transcribe(untranscribed))
+
+    try:
+        # A worker launches any follow-up work before it reports "finished"
+        while outstanding[0]:
+            event = await events.get()
+            if event[0] == "finished":
+                outstanding[0] -= 1
+                continue
+            if event[0] == "error":
+                stats["failed"] += 1
+                yield "caption", {"path": event[1], "ok": False, "status": event[2].status_code, "error": event[2].detail}
+                continue
+            key = event[1]
+            for raw in waiting[key][answered.get(key, 0):]:
+                yield "caption", {"path": raw, "ok": True, "transcript": texts[key], **results[key]}
+            answered[key] = len(waiting[key])
+    finally:
+        for task in tasks:
+            task.cancel()
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    yield "done", stats
@@ -0,0 +1,687 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except Exception:  # optional: fall back to periodic reconcile
+    FileSystemEventHandler = object  # type: ignore
+    Observer = None  # type: ignore
+
+from backend.app.config import settings
+from backend.app.services.storage import STORAGE_ROOT, on_artifact_added, on_artifact_removed, storage_relative
+
+
+# Dated sub-folder -> catalog kind
+KIND_DIRS = {"original": "original", "clips": "clip", "renditions": "rendition", "proxies": "proxy"}
+# Dated sub-folders of per-source cache directories, accounted as usage kind "cache"
+CACHE_DIRS = ("thumbnails", "waveforms", "hls")
+# Undated per-content cache (post-upload precomputation), one entry per content hash
+INGEST_DIR = ".cas/ingest"
+# In-progress resumable uploads (storage/.uploads/<id>), accounted as kind "upload"
+UPLOADS_DIR = ".uploads"
+CLIP_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+# Number of change-log entries kept for delta sync; older clients get a reset
+MAX_CHANGES = 20000
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_observer = None
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        db_path = Path(settings.catalog_db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS assets (
+                path TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                date TEXT NOT NULL,
+                created_date TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_assets_kind_date ON assets(kind, date);
+            CREATE INDEX IF NOT EXISTS idx_assets_kind_created ON assets(kind, created_date);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS changes (
+                version INTEGER PRIMARY KEY, path TEXT NOT NULL, op TEXT NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+            """
+        )
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(assets)")}
+        if "version" not in columns:
+            conn.execute("ALTER TABLE assets ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_kind_date_path ON assets(kind, date, path)")
+        conn.executescript(_USAGE_TABLES)
+        for table, column, ddl in (
+            ("assets", "shared", "INTEGER NOT NULL DEFAULT 0"),
+            ("caches", "shared", "INTEGER NOT NULL DEFAULT 0"),
+            ("caches", "kind", "TEXT NOT NULL DEFAULT 'cache'"),
+        ):
+            if column not in {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        conn.executescript(_USAGE_TRIGGERS)
+        _rebuild_usage(conn)
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+# Running byte/file totals per (date, kind), maintained by triggers on every asset and
+# cache-directory write or delete so usage queries never touch the filesystem.
+#
+# Hard links (deduplicated uploads, linked derived artifacts) must not be billed once per
+# path. `inodes` maps the files of each asset and cache entry to (st_dev, st_ino); an inode
+# is billed to the first of its paths in sort order and `shared` holds the bytes of a row
+# that are billed elsewhere, so usage counts `size - shared`.
+_USAGE_TABLES = """
+CREATE TABLE IF NOT EXISTS caches (
+    path TEXT PRIMARY KEY, date TEXT NOT NULL, size INTEGER NOT NULL, files INTEGER NOT NULL,
+    shared INTEGER NOT NULL DEFAULT 0, kind TEXT NOT NULL DEFAULT 'cache'
+);
+CREATE TABLE IF NOT EXISTS usage (
+    date TEXT NOT NULL, kind TEXT NOT NULL, bytes INTEGER NOT NULL, files INTEGER NOT NULL,
+    PRIMARY KEY (date, kind)
+);
+CREATE TABLE IF NOT EXISTS inodes (
+    dev INTEGER NOT NULL, ino INTEGER NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL,
+    PRIMARY KEY (dev, ino, path)
+);
+CREATE INDEX IF NOT EXISTS idx_inodes_path ON inodes(path);
+"""
+
+# Recreated on every start so databases created before `shared`/`kind` get the new bodies
+_USAGE_TRIGGERS = """
+DROP TRIGGER IF EXISTS usage_assets_insert;
+DROP TRIGGER IF EXISTS usage_assets_delete;
+DROP TRIGGER IF EXISTS usage_assets_update;
+DROP TRIGGER IF EXISTS usage_caches_insert;
+DROP TRIGGER IF EXISTS usage_caches_delete;
+DROP TRIGGER IF EXISTS usage_caches_update;
+CREATE TRIGGER usage_assets_insert AFTER INSERT ON assets BEGIN
+    INSERT INTO usage (date, kind, bytes, files) VALUES (NEW.date, NEW.kind, NEW.size - NEW.shared, 1)
+    ON CONFLICT(date, kind) DO UPDATE SET bytes = bytes + NEW.size - NEW.shared, files = files + 1;
+END;
+CREATE TRIGGER usage_assets_delete AFTER DELETE ON assets BEGIN
+    UPDATE usage SET bytes = bytes - (OLD.size - OLD.shared), files = files - 1
+    WHERE date = OLD.date AND kind = OLD.kind;
+END;
+CREATE TRIGGER usage_assets_update AFTER UPDATE OF size, shared, date, kind ON assets BEGIN
+    UPDATE usage SET bytes = bytes - (OLD.size - OLD.shared), files = files - 1
+    WHERE date = OLD.date AND kind = OLD.kind;
+    INSERT INTO usage (date, kind, bytes, files) VALUES (NEW.date, NEW.kind, NEW.size - NEW.shared, 1)
+    ON CONFLICT(date, kind) DO UPDATE SET bytes = bytes + NEW.size - NEW.shared, files = files + 1;
+END;
+CREATE TRIGGER usage_caches_insert AFTER INSERT ON caches BEGIN
+    INSERT INTO usage (date, kind, bytes, files) VALUES (NEW.date, NEW.kind, NEW.size - NEW.shared, NEW.files)
+    ON CONFLICT(date, kind) DO UPDATE SET bytes = bytes + NEW.size - NEW.shared, files = files + NEW.files;
+END;
+CREATE TRIGGER usage_caches_delete AFTER DELETE ON caches BEGIN
+    UPDATE usage SET bytes = bytes - (OLD.size - OLD.shared), files = files - OLD.files
+    WHERE date = OLD.date AND kind = OLD.kind;
+END;
+CREATE TRIGGER usage_caches_update AFTER UPDATE OF size, shared, files, date, kind ON caches BEGIN
+    UPDATE usage SET bytes = bytes - (OLD.size - OLD.shared), files = files - OLD.files
+    WHERE date = OLD.date AND kind = OLD.kind;
+    INSERT INTO usage (date, kind, bytes, files) VALUES (NEW.date, NEW.kind, NEW.size - NEW.shared, NEW.files)
+    ON CONFLICT(date, kind) DO UPDATE SET bytes = bytes + NEW.size - NEW.shared, files = files + NEW.files;
+END;
+"""
+
+# Bytes of a row's files whose inode is billed to an earlier path
+_SHARED_SQL = (
+    "SELECT COALESCE(SUM(size), 0) FROM inodes i WHERE i.path = ? AND EXISTS"
+    " (SELECT 1 FROM inodes j WHERE j.dev = i.dev AND j.ino = i.ino AND j.path < i.path)"
+)
+
+
+def _rebuild_usage(conn: sqlite3.Connection) -> None:
+    """Recompute the running totals from the asset and cache tables (drift correction)."""
+    conn.execute("DELETE FROM usage")
+    conn.execute(
+        "INSERT INTO usage (date, kind, bytes, files)"
+        " SELECT date, kind, SUM(size - shared), COUNT(*) FROM assets GROUP BY date, kind"
+    )
+    conn.execute(
+        "INSERT INTO usage (date, kind, bytes, files)"
+        " SELECT date, kind, SUM(size - shared), SUM(files) FROM caches GROUP BY date, kind"
+    )
+
+
+def _set_links(conn: sqlite3.Connection, path: str, links: List[Tuple[int, int, int]]) -> None:
+    """Replace the (dev, ino, size) files of an asset or cache entry and re-bill every row
+    that shares an inode with it (caller holds the transaction)."""
+    keys = set(conn.execute("SELECT dev, ino FROM inodes WHERE path = ?", (path,)).fetchall())
+    conn.execute("DELETE FROM inodes WHERE path = ?", (path,))
+    conn.executemany(
+        "INSERT OR REPLACE INTO inodes (dev, ino, path, size) VALUES (?, ?, ?, ?)",
+        [(dev, ino, path, size) for dev, ino, size in links],
+    )
+    keys.update((dev, ino) for dev, ino, _ in links)
+    affected = {path}
+    for dev, ino in keys:
+        affected.update(r[0] for r in conn.execute("SELECT path FROM inodes WHERE dev = ? AND ino = ?", (dev, ino)))
+    for p in affected:
+        shared = conn.execute(_SHARED_SQL, (p,)).fetchone()[0]
+        conn.execute("UPDATE assets SET shared = ? WHERE path = ? AND shared != ?", (shared, p, shared))
+        conn.execute("UPDATE caches SET shared = ? WHERE path = ? AND shared != ?", (shared, p, shared))
+
+
+def classify(path: Union[str, Path]) -> Optional[Tuple[str, str, str]]:
+    """Return (relative path, kind, folder date) for files in storage/YYYY/MM/DD/<kind>/."""
+    try:
+        rel = storage_relative(path)
+    except ValueError:
+        return None
+    parts = rel.split("/")
+    if len(parts) != 5 or not all(p.isdigit() for p in parts[:3]) or parts[3] not in KIND_DIRS:
+        return None
+    if parts[4].endswith(".part"):
+        return None
+    return rel, KIND_DIRS[parts[3]], "/".join(parts[:3])
+
+
+def _row_for(path: Path, rel: str, kind: str, date: str) -> Tuple[Tuple, Tuple[int, int, int]]:
+    """(asset row, (dev, ino, size) of its file)."""
+    st = path.stat()
+    created = datetime.fromtimestamp(st.st_ctime).strftime("%Y/%m/%d")
+    return (rel, kind, date, created, st.st_size, st.st_mtime), (st.st_dev, st.st_ino, st.st_size)
+
+
+def _bump(conn: sqlite3.Connection, path: str, op: str) -> int:
+    """Advance the catalog version and log the change (caller holds the transaction)."""
+    version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0] + 1
+    conn.execute("UPDATE meta SET value = ? WHERE key = 'version'", (version,))
+    conn.execute("INSERT INTO changes (version, path, op) VALUES (?, ?, ?)", (version, path, op))
+    return version
+
+
+def _upsert(conn: sqlite3.Connection, row: Tuple) -> None:
+    version = _bump(conn, row[0], "upsert")
+    conn.execute(
+        "INSERT INTO assets (path, kind, date, created_date, size, mtime, version)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT(path) DO UPDATE SET kind = excluded.kind, date = excluded.date,"
+        " created_date = excluded.created_date, size = excluded.size, mtime = excluded.mtime,"
+        " version = excluded.version",
+        (*row, version),
+    )
+
+
+def _delete(conn: sqlite3.Connection, path: str) -> None:
+    if conn.execute("DELETE FROM assets WHERE path = ?", (path,)).rowcount:
+        _bump(conn, path, "delete")
+    _set_links(conn, path, [])
+
+
+def _prune_changes(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "DELETE FROM changes WHERE version <= (SELECT value FROM meta WHERE key = 'version') - ?",
+        (MAX_CHANGES,),
+    )
+
+
+def classify_cache(path: Union[str, Path]) -> Optional[Tuple[str, str, str]]:
+    """Return (entry path, folder date, kind) for anything under storage/YYYY/MM/DD/<cache dir>/<entry>.
+
+    Entries of storage/.cas/ingest/<sha256>/ (kind "cache") and storage/.uploads/<id>/
+    (kind "upload") are undated (date "").
+    """
+    try:
+        rel = storage_relative(path)
+    except ValueError:
+        return None
+    parts = rel.split("/")
+    if "/".join(parts[:2]) == INGEST_DIR and len(parts) >= 3:
+        return "/".join(parts[:3]), "", "cache"
+    if parts[0] == UPLOADS_DIR and len(parts) >= 2:
+        return "/".join(parts[:2]), "", "upload"
+    if len(parts) < 5 or not all(p.isdigit() for p in parts[:3]) or parts[3] not in CACHE_DIRS:
+        return None
+    return "/".join(parts[:5]), "/".join(parts[:3]), "cache"
+
+
+def _measure(path: str) -> Tuple[int, int, List[Tuple[int, int, int]]]:
+    """(bytes, files, hard-linked files) of a file or directory tree, skipping in-progress
+    .part files.
+
+    Sparse files (pre-sized upload targets) count their allocated blocks. A file linked
+    twice inside the tree is counted once; files with other links elsewhere are returned
+    as (dev, ino, bytes) for `_set_links`.
+    """
+    total = files = 0
+    links: List[Tuple[int, int, int]] = []
+    seen = set()
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            if os.path.isdir(current):
+                with os.scandir(current) as it:
+                    stack.extend(e.path for e in it)
+            elif not current.endswith(".part"):
+                st = os.stat(current)
+                if (st.st_dev, st.st_ino) in seen:
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+                size = min(st.st_size, getattr(st, "st_blocks", st.st_size) * 512)
+                total += size
+                files += 1
+                if st.st_nlink > 1:
+                    links.append((st.st_dev, st.st_ino, size))
+        except OSError:
+            continue
+    return total, files, links
+
+
+def record_cache(path: Union[str, Path]) -> bool:
+    """Re-measure the cache entry containing `path` (dropping it when empty or gone)."""
+    info = classify_cache(path)
+    if info is None:
+        return False
+    rel, date, kind = info
+    size, files, links = _measure(str(STORAGE_ROOT / rel))
+    with _lock, _db() as conn:
+        if files == 0:
+            conn.execute("DELETE FROM caches WHERE path = ?", (rel,))
+            links = []
+        else:
+            conn.execute(
+                "INSERT INTO caches (path, date, size, files, kind) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE SET size = excluded.size, files = excluded.files",
+                (rel, date, size, files, kind),
+            )
+        _set_links(conn, rel, links)
+    return True
+
+
+def record_file(path: Union[str, Path]) -> bool:
+    info = classify(path)
+    if info is None:
+        return record_cache(path)
+    try:
+        row, link = _row_for(Path(path), *info)
+    except OSError:
+        return remove_file(path)
+    with _lock, _db() as conn:
+        known = conn.execute("SELECT size, mtime FROM assets WHERE path = ?", (row[0],)).fetchone()
+        if known is None or tuple(known) != (row[4], row[5]):
+            _upsert(conn, row)
+        if conn.execute("SELECT dev, ino, size FROM inodes WHERE path = ?", (row[0],)).fetchall() != [link]:
+            _set_links(conn, row[0], [link])
+    return True
+
+
+def remove_file(path: Union[str, Path]) -> bool:
+    info = classify(path)
+    if info is None:
+        return record_cache(path)
+    with _lock, _db() as conn:
+        _delete(conn, info[0])
+    return True
+
+
+def _dated_days() -> List[Tuple[str, str]]:
+    """(YYYY/MM/DD, directory) for every dated folder under storage/."""
+    def _dirs(p: Union[str, Path]) -> List[os.DirEntry]:
+        try:
+            with os.scandir(p) as it:
+                return [e for e in it if e.is_dir() and e.name.isdigit()]
+        except OSError:
+            return []
+
+    return [
+        (f"{year.name}/{month.name}/{day.name}", day.path)
+        for year in _dirs(STORAGE_ROOT)
+        for month in _dirs(year.path)
+        for day in _dirs(month.path)
+    ]
+
+
+def _scan_dated_layout() -> Tuple[Dict[str, Tuple], List[Tuple[int, int, str, int]]]:
+    """List storage/YYYY/MM/DD/<kind>/ directly with scandir (no recursive walk).
+
+    Returns the asset rows and the (dev, ino, path, size) of every asset file.
+    """
+    rows: Dict[str, Tuple] = {}
+    links: List[Tuple[int, int, str, int]] = []
+    for date, day_path in _dated_days():
+        for folder, kind in KIND_DIRS.items():
+            try:
+                with os.scandir(os.path.join(day_path, folder)) as it:
+                    for entry in it:
+                        if not entry.is_file() or entry.name.endswith(".part"):
+                            continue
+                        st = entry.stat()
+                        rel = f"{date}/{folder}/{entry.name}"
+                        created = datetime.fromtimestamp(st.st_ctime).strftime("%Y/%m/%d")
+                        rows[rel] = (rel, kind, date, created, st.st_size, st.st_mtime)
+                        links.append((st.st_dev, st.st_ino, rel, st.st_size))
+            except OSError:
+                continue
+    return rows, links
+
+
+def _scan_caches() -> Tuple[Dict[str, Tuple], List[Tuple[int, int, str, int]]]:
+    """Measure every dated cache entry, ingest entry and upload session for usage accounting.
+
+    Returns (path, date, size, files, kind) rows and the hard-linked files of each entry.
+    """
+    rows: Dict[str, Tuple] = {}
+    links: List[Tuple[int, int, str, int]] = []
+
+    def _add(entry_path: str, rel: str, date: str, kind: str) -> None:
+        size, files, entry_links = _measure(entry_path)
+        if files:
+            rows[rel] = (rel, date, size, files, kind)
+            links.extend((dev, ino, rel, n) for dev, ino, n in entry_links)
+
+    for date, day_path in _dated_days():
+        for folder in CACHE_DIRS:
+            try:
+                with os.scandir(os.path.join(day_path, folder)) as it:
+                    entries = [e for e in it if not e.name.endswith(".part")]
+            except OSError:
+                continue
+            for entry in entries:
+                _add(entry.path, f"{date}/{folder}/{entry.name}", date, "cache")
+    for folder, kind in ((INGEST_DIR, "cache"), (UPLOADS_DIR, "upload")):
+        try:
+            with os.scandir(STORAGE_ROOT / folder) as it:
+                entries = [e for e in it if e.is_dir()]
+        except OSError:
+            entries = []
+        for entry in entries:
+            _add(entry.path, f"{folder}/{entry.name}", "", kind)
+    return rows, links
+
+
+def reconcile() -> Dict[str, int]:
+    """Bring the catalog in line with the dated storage layout in one transaction.
+
+    Cache directories and the inode map are re-measured as well and the usage totals are
+    rebuilt, which also verifies the trigger-maintained counters.
+    """
+    found, asset_links = _scan_dated_layout()
+    caches, cache_links = _scan_caches()
+    with _lock, _db() as conn:
+        known = {r[0]: (r[1], r[2]) for r in conn.execute("SELECT path, size, mtime FROM assets")}
+        stale = [p for p in known if p not in found]
+        changed = [row for p, row in found.items() if known.get(p) != (row[4], row[5])]
+        for p in stale:
+            if conn.execute("DELETE FROM assets WHERE path = ?", (p,)).rowcount:
+                _bump(conn, p, "delete")
+        for row in changed:
+            _upsert(conn, row)
+        _prune_changes(conn)
+        conn.execute("DELETE FROM caches")
+        conn.executemany(
+            "INSERT INTO caches (path, date, size, files, kind) VALUES (?, ?, ?, ?, ?)", caches.values()
+        )
+        conn.execute("DELETE FROM inodes")
+        conn.executemany(
+            "INSERT OR REPLACE INTO inodes (dev, ino, path, size) VALUES (?, ?, ?, ?)", asset_links + cache_links
+        )
+        for table in ("assets", "caches"):
+            conn.execute(f"UPDATE {table} SET shared = ({_SHARED_SQL.replace('?', f'{table}.path')})")
+        _rebuild_usage(conn)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('reconciled', 1)")
+    return {"total": len(found), "updated": len(changed), "removed": len(stale)}
+
+
+def is_reconciled() -> bool:
+    """Whether this catalog database has completed a full reconcile (False when fresh)."""
+    with _lock:
+        return _db().execute("SELECT 1 FROM meta WHERE key = 'reconciled'").fetchone() is not None
+
+
+def clips_by_created_date() -> Dict[str, List[str]]:
+    """Clips grouped by file creation date (YYYY/MM/DD), as served by /video/clips-by-date."""
+    grouped: Dict[str, List[str]] = {}
+    with _lock:
+        rows = _db().execute(
+            "SELECT created_date, path FROM assets WHERE kind = 'clip' ORDER BY created_date, path"
+        ).fetchall()
+    for created, path in rows:
+        if path.lower().endswith(CLIP_EXTS):
+            grouped.setdefault(created, []).append(path)
+    return grouped
+
+
+def clips_by_folder_date(exts: Tuple[str, ...]) -> Dict[str, List[str]]:
+    """Clips grouped by their dated folder (YYYY-MM-DD) with storage/ prefixed paths."""
+    grouped: Dict[str, List[str]] = {}
+    with _lock:
+        rows = _db().execute("SELECT date, path FROM assets WHERE kind = 'clip' ORDER BY date, path").fetchall()
+    for date, path in rows:
+        if path.lower().endswith(exts):
+            grouped.setdefault(date.replace("/", "-"), []).append(os.path.join("storage", path))
+    return grouped
+
+
+def clips_created_on(date: str) -> List[str]:
+    with _lock:
+        rows = _db().execute(
+            "SELECT path FROM assets WHERE kind = 'clip' AND created_date = ?", (date,)
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def usage_summary(date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, Any]:
+    """Byte and file totals per artifact class and per date, served from the running counters.
+
+    Undated entries (ingest results, upload sessions) appear under "undated" and only in
+    unfiltered totals.
+    """
+    query = "SELECT date, kind, bytes, files FROM usage WHERE files > 0"
+    params: List[Any] = []
+    if date_from or date_to:
+        query += " AND date != ''"
+    if date_from:
+        query += " AND date >= ?"
+        params.append(date_from)
+    if date_to:
+        query += " AND date <= ?"
+        params.append(date_to)
+    with _lock:
+        rows = _db().execute(query + " ORDER BY date, kind", params).fetchall()
+    totals: Dict[str, Dict[str, int]] = {}
+    by_date: Dict[str, Dict[str, Any]] = {}
+    for date, kind, size, files in rows:
+        kind_total = totals.setdefault(kind, {"bytes": 0, "files": 0})
+        kind_total["bytes"] += size
+        kind_total["files"] += files
+        day = by_date.setdefault(date or "undated", {"bytes": 0, "files": 0, "kinds": {}})
+        day["bytes"] += size
+        day["files"] += files
+        day["kinds"][kind] = {"bytes": size, "files": files}
+    return {
+        "bytes": sum(t["bytes"] for t in totals.values()),
+        "files": sum(t["files"] for t in totals.values()),
+        "kinds": totals,
+        "dates": by_date,
+    }
+
+
+def cache_folder_bytes(folder: str) -> int:
+    """Accounted bytes of one dated cache folder kind (e.g. "hls") across all dates."""
+    with _lock:
+        return _db().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM caches WHERE path GLOB ?", (f"*/*/*/{folder}/*",)
+        ).fetchone()[0]
+
+
+def cache_folder_entries(folder: str) -> List[Tuple[str, int]]:
+    """(entry path, bytes) of every cache entry in one dated cache folder kind."""
+    with _lock:
+        return _db().execute("SELECT path, size FROM caches WHERE path GLOB ?", (f"*/*/*/{folder}/*",)).fetchall()
+
+
+def usage_bytes() -> int:
+    with _lock:
+        return _db().execute("SELECT COALESCE(SUM(bytes), 0) FROM usage").fetchone()[0]
+
+
+def current_version() -> int:
+    with _lock:
+        return _db().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+
+def _encode_cursor(date: str, path: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([date, path]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    date, path = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    return str(date), str(path)
+
+
+_ASSET_COLUMNS = ("path", "kind", "date", "created_date", "size", "mtime", "version")
+
+
+def list_assets(
+    kind: str = "clip",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    descending: bool = True,
+) -> Dict[str, Any]:
+    """One keyset-paginated page of assets ordered by (folder date, path).
+
+    Dates use the YYYY/MM/DD folder layout. The cursor is opaque and stable across
+    inserts and deletes because it encodes the last (date, path) returned.
+    """
+    where = ["kind = ?"]
+    params: List[Any] = [kind]
+    if date_from:
+        where.append("date >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("date <= ?")
+        params.append(date_to)
+    if cursor:
+        c_date, c_path = _decode_cursor(cursor)
+        cmp = "<" if descending else ">"
+        where.append(f"(date {cmp} ? OR (date = ? AND path {cmp} ?))")
+        params += [c_date, c_date, c_path]
+    order = "DESC" if descending else "ASC"
+    sql = (
+        f"SELECT {', '.join(_ASSET_COLUMNS)} FROM assets WHERE {' AND '.join(where)}"
+        f" ORDER BY date {order}, path {order} LIMIT ?"
+    )
+    with _lock:
+        conn = _db()
+        version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+    items = [dict(zip(_ASSET_COLUMNS, r)) for r in rows[:limit]]
+    next_cursor = _encode_cursor(items[-1]["date"], items[-1]["path"]) if len(rows) > limit else None
+    return {"version": version, "items": items, "next_cursor": next_cursor}
+
+
+def changes_since(version: int, limit: int = 1000) -> Dict[str, Any]:
+    """Changes after `version`, collapsed to the latest op per path.
+
+    `reset` is true when the change log no longer reaches back to `version`, in which
+    case the client should reload its listing.
+    """
+    with _lock:
+        conn = _db()
+        current = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        oldest = conn.execute("SELECT MIN(version) FROM changes").fetchone()[0]
+        if version >= current:
+            return {"version": current, "changes": [], "reset": False, "has_more": False}
+        if oldest is None or version < oldest - 1:
+            return {"version": current, "changes": [], "reset": True, "has_more": False}
+        rows = conn.execute(
+            "SELECT version, path, op FROM changes WHERE version > ? ORDER BY version LIMIT ?",
+            (version, limit),
+        ).fetchall()
+        latest: Dict[str, Tuple[int, str]] = {}
+        for v, path, op in rows:
+            latest[path] = (v, op)
+        assets = {}
+        upserts = [p for p, (_, op) in latest.items() if op == "upsert"]
+        for i in range(0, len(upserts), 500):
+            chunk = upserts[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for r in conn.execute(f"SELECT {', '.join(_ASSET_COLUMNS)} FROM assets WHERE path IN ({marks})", chunk):
+                assets[r[0]] = dict(zip(_ASSET_COLUMNS, r))
+    upto = rows[-1][0] if rows else current
+    changes = [
+        {"path": p, "op": op if p in assets or op == "delete" else "delete", "version": v, "asset": assets.get(p)}
+        for p, (v, op) in sorted(latest.items(), key=lambda kv: kv[1][0])
+    ]
+    return {"version": upto, "changes": changes, "reset": False, "has_more": upto < current}
+
+
+class _CatalogEventHandler(FileSystemEventHandler):  # type: ignore[misc]
+    def on_created(self, event):
+        if not event.is_directory:
+            record_file(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            record_file(event.src_path)
+
+    def on_deleted(self, event):
+        # Directory events matter for cache entries (thumbnail/waveform folders)
+        remove_file(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            remove_file(event.src_path)
+            record_file(event.dest_path)
+
+
+on_artifact_removed(remove_file)
+on_artifact_added(record_file)
+
+
+def _poll_forever(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            reconcile()
+        except Exception:
+            pass
+
+
+def start_background_sync(initial_reconcile: bool = True) -> None:
+    """Reconcile once (unless the caller just did), then follow changes with an inotify watcher.
+
+    A periodic reconcile always runs as well, so events missed by the watcher (or the
+    absence of watchdog) only delay updates instead of losing them.
+    """
+    global _observer
+    STORAGE_ROOT.mkdir(parents=True, exist_ok=True)
+    if initial_reconcile:
+        reconcile()
+    if _observer is not None:
+        return
+    if Observer is not None:
+        observer = Observer()
+        observer.schedule(_CatalogEventHandler(), str(STORAGE_ROOT), recursive=True)
+        observer.daemon = True
+        observer.start()
+        _observer = observer
+    else:
+        _observer = True
+    threading.Thread(
+        target=_poll_forever, args=(settings.catalog_reconcile_interval,), name="catalog-sync", daemon=True
+    ).start()
@@ -0,0 +1,313 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from backend.app.services.storage import STORAGE_ROOT, storage_relative
+
+
+CAS_ROOT = STORAGE_ROOT / ".cas"
+HASH_CHUNK = 1024 * 1024
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        CAS_ROOT.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(CAS_ROOT / "index.sqlite3"), check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT
+            );
+            CREATE TABLE IF NOT EXISTS clips (key TEXT PRIMARY KEY, object TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS clip_refs (path TEXT PRIMARY KEY, key TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_clip_refs_key ON clip_refs(key);
+            CREATE TABLE IF NOT EXISTS originals (sha256 TEXT PRIMARY KEY, path TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_sources_sha256 ON sources(sha256);
+            CREATE TABLE IF NOT EXISTS aliases (sha256 TEXT PRIMARY KEY, target TEXT NOT NULL);
+            """
+        )
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(clips)")}
+        # Where a clip was cut from, so results precomputed for the source can be sliced
+        for column, decl in (("source_sha256", "TEXT"), ("start", "REAL"), ("end", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE clips ADD COLUMN {column} {decl}")
+        _conn = conn
+    return _conn
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_hash(path: Path) -> str:
+    """Content hash of a source file, cached by (size, mtime) so it is computed once."""
+    st = path.stat()
+    key = str(path.resolve())
+    with _lock:
+        row = _db().execute("SELECT size, mtime_ns, sha256 FROM sources WHERE path = ?", (key,)).fetchone()
+    if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+        return row[2]
+    digest = file_sha256(path)
+    with _lock, _db() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (key, st.st_size, st.st_mtime_ns, digest),
+        )
+    return digest
+
+
+def clip_key(src_hash: str, start: float, end: float, profile: str) -> str:
+    return hashlib.sha256(f"{src_hash}:{start:.3f}:{end:.3f}:{profile}".encode("utf-8")).hexdigest()
+
+
+def _object_path(key: str) -> Path:
+    return CAS_ROOT / "objects" / key[:2] / f"{key}.mp4"
+
+
+def lookup_clip(key: str) -> Optional[Path]:
+    """Return an existing dated view of a clip, pruning references whose files are gone."""
+    with _lock, _db() as conn:
+        refs = [r[0] for r in conn.execute("SELECT path FROM clip_refs WHERE key = ?", (key,))]
+        for rel in refs:
+            candidate = STORAGE_ROOT / rel
+            if candidate.exists() and candidate.stat().st_size > 0:
+                return candidate
+            conn.execute("DELETE FROM clip_refs WHERE path = ?", (rel,))
+    release_key_if_unreferenced(key)
+    return None
+
+
+def store_clip(
+    key: str, produced: Path, src_hash: Optional[str] = None, start: Optional[float] = None, end: Optional[float] = None
+) -> Path:
+    """Adopt a freshly produced clip as the canonical object for `key`.
+
+    The object lives under storage/.cas/objects/ and the dated path becomes a hard link to it
+    (falling back to a plain file when the filesystem does not support links). `src_hash`,
+    `start` and `end` record the range of the source it was cut from.
+    """
+    obj = _object_path(key)
+    obj.parent.mkdir(parents=True, exist_ok=True)
+    with _lock, _db() as conn:
+        if not obj.exists():
+            os.replace(produced, obj)
+        else:
+            produced.unlink()
+        try:
+            os.link(obj, produced)
+        except OSError:
+            shutil.copy2(obj, produced)
+        conn.execute(
+            "INSERT OR REPLACE INTO clips (key, object, source_sha256, start, end) VALUES (?, ?, ?, ?, ?)",
+            (key, storage_relative(obj), src_hash, start, end),
+        )
+        conn.execute("INSERT OR REPLACE INTO clip_refs (path, key) VALUES (?, ?)", (storage_relative(produced), key))
+    return produced
+
+
+def is_content_addressed(path: Path) -> bool:
+    try:
+        rel = storage_relative(path)
+    except ValueError:
+        return False
+    with _lock:
+        return _db().execute("SELECT 1 FROM clip_refs WHERE path = ?", (rel,)).fetchone() is not None
+
+
+def release_key_if_unreferenced(key: str) -> bool:
+    with _lock, _db() as conn:
+        if conn.execute("SELECT 1 FROM clip_refs WHERE key = ? LIMIT 1", (key,)).fetchone():
+            return False
+        row = conn.execute("SELECT object FROM clips WHERE key = ?", (key,)).fetchone()
+        conn.execute("DELETE FROM clips WHERE key = ?", (key,))
+    if row:
+        try:
+            (STORAGE_ROOT / row[0]).unlink()
+        except FileNotFoundError:
+            pass
+        return True
+    return False
+
+
+def release_clip(path: Path) -> bool:
+    """Drop the reference held by a dated clip path; delete the object when none remain."""
+    try:
+        rel = storage_relative(path)
+    except ValueError:
+        return False
+    with _lock, _db() as conn:
+        row = conn.execute("SELECT key FROM clip_refs WHERE path = ?", (rel,)).fetchone()
+        if not row:
+            return False
+        conn.execute("DELETE FROM clip_refs WHERE path = ?", (rel,))
+    return release_key_if_unreferenced(row[0])
+
+
+def move_ref(old_path: Path, new_path: Path) -> bool:
+    """Re-point a clip reference after its dated file was moved inside storage/."""
+    try:
+        old_rel, new_rel = storage_relative(old_path), storage_relative(new_path)
+    except ValueError:
+        return False
+    with _lock, _db() as conn:
+        return conn.execute("UPDATE clip_refs SET path = ? WHERE path = ?", (new_rel, old_rel)).rowcount > 0
+
+
+def content_key(path: Path) -> Optional[str]:
+    """Content key of a dated clip view, or None when the file is not content-addressed."""
+    try:
+        rel = storage_relative(path)
+    except ValueError:
+        return None
+    with _lock:
+        row = _db().execute("SELECT key FROM clip_refs WHERE path = ?", (rel,)).fetchone()
+    return row[0] if row else None
+
+
+def clip_origin(path: Path) -> Optional[Tuple[str, float, float]]:
+    """(source content hash, start, end) of a content-addressed clip, when recorded."""
+    try:
+        rel = storage_relative(path)
+    except ValueError:
+        return None
+    with _lock:
+        row = _db().execute(
+            "SELECT c.source_sha256, c.start, c.end FROM clip_refs r JOIN clips c ON c.key = r.key WHERE r.path = ?",
+            (rel,),
+        ).fetchone()
+    if not row or row[0] is None:
+        return None
+    return row[0], row[1], row[2]
+
+
+def _remember_source(conn: sqlite3.Connection, path: Path, sha256: str) -> None:
+    st = path.stat()
+    conn.execute(
+        "INSERT OR REPLACE INTO sources (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+        (str(path.resolve()), st.st_size, st.st_mtime_ns, sha256),
+    )
+
+
+def _find_original(conn: sqlite3.Connection, sha256: str, skip: Optional[str]) -> Optional[Path]:
+    row = conn.execute("SELECT path FROM originals WHERE sha256 = ?", (sha256,)).fetchone()
+    candidates = [str((STORAGE_ROOT / row[0]).resolve())] if row else []
+    candidates += [r[0] for r in conn.execute("SELECT path FROM sources WHERE sha256 = ?", (sha256,))]
+    for candidate in candidates:
+        path = Path(candidate)
+        if candidate == skip:
+            continue
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        recorded = conn.execute(
+            "SELECT size, mtime_ns, sha256 FROM sources WHERE path = ?", (candidate,)
+        ).fetchone()
+        if recorded != (st.st_size, st.st_mtime_ns, sha256):
+            continue
+        try:
+            rel = storage_relative(path)
+        except ValueError:
+            continue
+        if not row or row[0] != rel:
+            conn.execute("INSERT OR REPLACE INTO originals (sha256, path) VALUES (?, ?)", (sha256, rel))
+        return path
+    conn.execute("DELETE FROM originals WHERE sha256 = ?", (sha256,))
+    return None
+
+
+def find_original(sha256: str, exclude: Optional[Path] = None) -> Optional[Path]:
+    """An existing stored file with this content hash, preferring the canonical one.
+
+    A candidate only counts while its recorded (size, mtime) still match the file, so
+    anything rewritten since it was hashed is never linked to. Content that was
+    losslessly normalized after upload is also found by its pre-normalization hash.
+    """
+    skip = str(exclude.resolve()) if exclude is not None else None
+    with _lock, _db() as conn:
+        found = _find_original(conn, sha256, skip)
+        alias = conn.execute("SELECT target FROM aliases WHERE sha256 = ?", (sha256,)).fetchone()
+        if found is None and alias is not None:
+            found = _find_original(conn, alias[0], skip)
+    return found
+
+
+def original_alias(sha256: str) -> Optional[str]:
+    """Hash of the normalized content that content hashed `sha256` was rewritten into."""
+    with _lock:
+        row = _db().execute("SELECT target FROM aliases WHERE sha256 = ?", (sha256,)).fetchone()
+    return row[0] if row else None
+
+
+def alias_original(old_sha256: str, path: Path) -> str:
+    """Record that content hashed `old_sha256` now lives, normalized, at `path`.
+
+    Re-uploads of the raw content then dedupe to the normalized file. Returns the new hash.
+    """
+    sha256 = source_hash(path)
+    if sha256 != old_sha256:
+        with _lock, _db() as conn:
+            conn.execute("INSERT OR REPLACE INTO aliases (sha256, target) VALUES (?, ?)", (old_sha256, sha256))
+    return sha256
+
+
+def dedupe_original(path: Path, sha256: str) -> Optional[Path]:
+    """Replace a freshly uploaded file by a hard link to identical stored content.
+
+    Returns the existing file when `path` was a duplicate (the upload's bytes are then
+    released), or None when the content is new and `path` became its canonical copy.
+    A duplicate of normalized content takes the hash of the file it now links to.
+    """
+    existing = find_original(sha256, exclude=path)
+    if existing is not None:
+        tmp = path.with_name(path.name + ".link")
+        try:
+            os.link(existing, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                tmp.unlink()
+            except FileNotFoundError:
+                pass
+            existing = None
+    with _lock, _db() as conn:
+        if existing is not None:
+            sha256 = conn.execute(
+                "SELECT sha256 FROM sources WHERE path = ?", (str(existing.resolve()),)
+            ).fetchone()[0]
+        _remember_source(conn, path, sha256)
+        if existing is None:
+            conn.execute(
+                "INSERT OR IGNORE INTO originals (sha256, path) VALUES (?, ?)", (sha256, storage_relative(path))
+            )
+    return existing
+
+
+def forget_path(path: Path) -> Optional[str]:
+    """Drop the hash records of a file rewritten in place (transcoded, remuxed) or deleted.
+
+    Its old hash no longer describes its bytes: it must not be offered as a dedup target
+    for that content, and the next `source_hash` call rehashes it. Returns that old hash.
+    """
+    key = str(path.resolve())
+    with _lock, _db() as conn:
+        row = conn.execute("SELECT sha256 FROM sources WHERE path = ?", (key,)).fetchone()
+        conn.execute("DELETE FROM sources WHERE path = ?", (key,))
+        try:
+            conn.execute("DELETE FROM originals WHERE path = ?", (storage_relative(path),))
+        except ValueError:
+            pass
+    return row[0] if row else None
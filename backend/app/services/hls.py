@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+from backend.app.config import settings
+from backend.app.services import catalog
+from backend.app.services.proxies import preview_source
+from backend.app.services.storage import STORAGE_ROOT, artifact_dir, is_fresh, register_derived
+from backend.app.services.video_trim import ensure_ffmpeg_available
+
+
+PLAYLIST = "index.m3u8"
+ASSET_RE = re.compile(r"^(index\.m3u8|init\.mp4|seg_\d{5}\.(m4s|ts))$")
+MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".ts": "video/mp2t",
+    ".mp4": "video/mp4",
+}
+
+_locks_guard = threading.Lock()
+_locks: Dict[str, threading.Lock] = {}
+_evict_lock = threading.Lock()
+
+
+def hls_dir(media_path: Path) -> Path:
+    return artifact_dir(media_path, "hls") / media_path.stem
+
+
+register_derived(lambda media: [hls_dir(media)])
+
+
+def _package_lock(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _is_current(out_dir: Path, source: Path, source_kind: str) -> bool:
+    """The package exists, is newer than its source and was cut from that same source."""
+    if not is_fresh(out_dir / PLAYLIST, source):
+        return False
+    try:
+        with open(out_dir / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f).get("source") == source_kind
+    except (OSError, ValueError):
+        return False
+
+
+def _touch(out_dir: Path) -> None:
+    """Mark a package as recently used and evict the coldest ones over the cache budget.
+
+    Recency is the package directory's mtime and sizes come from the catalog's cache
+    rows, so the budget covers packages left from earlier runs and other workers.
+    """
+    try:
+        os.utime(out_dir)
+    except OSError:
+        return
+    if catalog.cache_folder_bytes("hls") <= settings.hls_cache_bytes:
+        return
+    with _evict_lock:
+        entries = catalog.cache_folder_entries("hls")
+        total = sum(size for _, size in entries)
+        current = out_dir.resolve()
+        ranked = []
+        for rel, size in entries:
+            package = (STORAGE_ROOT / rel).resolve()
+            if package == current:
+                continue
+            try:
+                ranked.append((package.stat().st_mtime, size, package))
+            except OSError:
+                catalog.remove_file(package)
+                total -= size
+        ranked.sort(key=lambda item: item[0])
+        for _, size, package in ranked:
+            if total <= settings.hls_cache_bytes:
+                break
+            lock = _package_lock(str(package))
+            # A package being rebuilt right now is in use; leave it
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                shutil.rmtree(package, ignore_errors=True)
+                catalog.remove_file(package)
+            finally:
+                lock.release()
+            total -= size
+
+
+def package_hls(media_path: Path) -> Path:
+    """Stream-copy the preview source of a video into short HLS segments (built once, on demand).
+
+    The preview proxy is used when ready (dense keyframes give short, small segments),
+    otherwise the original. No re-encoding happens either way.
+    """
+    if not media_path.exists():
+        raise HTTPException(status_code=404, detail="Media not found")
+    source = preview_source(media_path)
+    source_kind = "original" if source == media_path else "proxy"
+    out_dir = hls_dir(media_path)
+    with _package_lock(str(out_dir.resolve())):
+        if _is_current(out_dir, source, source_kind):
+            _touch(out_dir)
+            return out_dir
+        ensure_ffmpeg_available()
+        tmp_dir = out_dir.with_name(f"{out_dir.name}.part")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fmp4 = settings.hls_segment_type == "fmp4"
+        cmd = [
+            "ffmpeg", "-y", "-v", "error", "-i", str(source),
+            "-map", "0:v:0?", "-map", "0:a:0?", "-c", "copy",
+            "-f", "hls", "-hls_time", str(settings.hls_segment_seconds),
+            "-hls_playlist_type", "vod", "-hls_flags", "independent_segments",
+            "-hls_segment_filename", str(tmp_dir / ("seg_%05d.m4s" if fmp4 else "seg_%05d.ts")),
+        ]
+        if fmp4:
+            cmd += ["-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4"]
+        cmd.append(str(tmp_dir / PLAYLIST))
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0 or not (tmp_dir / PLAYLIST).exists():
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise HTTPException(status_code=500, detail=f"FFmpeg HLS packaging failed: {result.stderr[-300:]}")
+        with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"source": source_kind, "segment_type": settings.hls_segment_type}, f)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        catalog.record_cache(out_dir)
+        _touch(out_dir)
+    return out_dir
+
+
+def hls_asset(media_path: Path, name: str) -> Tuple[Path, str]:
+    """Path and media type of a playlist/init/segment file, packaging on first use."""
+    if not ASSET_RE.match(name):
+        raise HTTPException(status_code=404, detail="Unknown HLS asset")
+    out_dir = hls_dir(media_path)
+    if name == PLAYLIST or not (out_dir / name).exists():
+        out_dir = package_hls(media_path)
+    else:
+        _touch(out_dir)
+    asset = out_dir / name
+    if not asset.exists():
+        raise HTTPException(status_code=404, detail="HLS asset not found")
+    return asset, MEDIA_TYPES[asset.suffix]
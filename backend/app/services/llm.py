@@ -1,9 +1,17 @@
-from typing import Optional
+import asyncio
+import json
+import random
+import threading
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from backend.app.services.hashtags import generate_hashtags
 import google.generativeai as genai
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import Literal
 from backend.app.config import settings
+from backend.app.services import llm_cache
+from backend.app.services.prompt_budget import STOP_WORDS, chunk_text, estimate_tokens, select_segments
 
 _configured = False
 
@@ -19,43 +27,282 @@ def _ensure_configured() -> None:
     _configured = True
 
 
-def generate_story_with_gemini(
+class LLMError(HTTPException):
+    """A Gemini call that failed for good (after retries when the error was retryable)."""
+
+    def __init__(self, status_code: int, kind: str, reason: str, message: str, attempts: int, retryable: bool):
+        super().__init__(status_code=status_code, detail={
+            "error": f"llm_{reason}",
+            "kind": kind,
+            "message": message,
+            "attempts": attempts,
+            "retryable": retryable,
+        })
+
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+_async_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+# google-generativeai caches one async client per process, bound to the first loop that
+# uses it, so every Gemini call runs on a single loop: the app's once it is bound, else a
+# private one. Blocking callers hand their work to it instead of starting loops of their own.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_private_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def bind_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Run the Gemini calls of blocking callers on `loop` (called at app startup)."""
+    global _loop
+    with _loop_lock:
+        _loop = loop
+
+
+def _llm_loop() -> asyncio.AbstractEventLoop:
+    global _private_loop
+    with _loop_lock:
+        if _loop is not None and _loop.is_running():
+            return _loop
+        if _private_loop is None:
+            _private_loop = asyncio.new_event_loop()
+            threading.Thread(target=_private_loop.run_forever, name="llm-loop", daemon=True).start()
+        return _private_loop
+
+
+def _async_limiter() -> asyncio.Semaphore:
+    """Cap on in-flight Gemini calls; all of them share the one loop, hence one cap."""
+    loop = asyncio.get_running_loop()
+    limiter = _async_limiters.get(loop)
+    if limiter is None:
+        limiter = _async_limiters[loop] = asyncio.Semaphore(max(1, settings.llm_max_concurrency))
+    return limiter
+
+
+def _classify(exc: BaseException) -> Tuple[bool, int, str]:
+    """(retryable, HTTP status to report, reason) for an exception raised by a Gemini call."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True, 504, "timeout"
+    code = getattr(exc, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS:
+        if code == 429:
+            return True, 429, "rate_limited"
+        return True, 504 if code == 504 else 502, "unavailable"
+    return False, 502, "failed"
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff delay before retry number `attempt + 1`."""
+    return random.uniform(0, min(settings.llm_backoff_max, settings.llm_backoff_base * (2 ** attempt)))
+
+
+def _give_up(exc: BaseException, kind: str, attempt: int) -> Optional[LLMError]:
+    """The error to raise for a failed attempt, or None when it should be retried."""
+    retryable, status, reason = _classify(exc)
+    if retryable and attempt < settings.llm_max_retries:
+        return None
+    return LLMError(status, kind, reason, str(exc) or type(exc).__name__, attempt + 1, retryable)
+
+
+def _response_text(resp: Any) -> str:
+    text = getattr(resp, "text", None)
+    if not text:
+        # SDK may return candidates structure; try to extract
+        try:
+            text = resp.candidates[0].content.parts[0].text  # type: ignore
+        except Exception:
+            text = ""
+    return text or ""
+
+
+async def _generate_async(prompt: str, kind: str, seed: Optional[int] = None, regenerate: bool = False) -> str:
+    """Gemini completion text for a prompt, served from the response cache when possible.
+
+    Bounded concurrency, a deadline per attempt and jittered exponential backoff on
+    429/5xx and timeouts. `regenerate` skips the lookup; the fresh answer still replaces
+    the cached one. This is the only completion path; blocking callers go through
+    `generate_caption_and_title`.
+    """
+    key = llm_cache.cache_key(settings.gemini_model, prompt, seed)
+    if not regenerate:
+        cached = await run_in_threadpool(llm_cache.get, key, kind)
+        if cached is not None:
+            return cached
+    _ensure_configured()
+    model = genai.GenerativeModel(settings.gemini_model)
+    attempt = 0
+    while True:
+        try:
+            async with _async_limiter():
+                resp = await asyncio.wait_for(
+                    model.generate_content_async(prompt, request_options={"timeout": settings.llm_timeout}),
+                    timeout=settings.llm_timeout,
+                )
+            break
+        except Exception as e:
+            error = _give_up(e, kind, attempt)
+            if error is not None:
+                raise error from e
+            await asyncio.sleep(_backoff(attempt))
+            attempt += 1
+    text = _response_text(resp)
+    await run_in_threadpool(llm_cache.put, key, settings.gemini_model, kind, text)
+    return text
+
+
+def _chunk_text(chunk: Any) -> str:
+    try:
+        return chunk.text or ""
+    except Exception:
+        # Chunks without text parts (e.g. safety or finish metadata) raise on .text
+        return ""
+
+
+async def _stream_async(prompt: str, kind: str, regenerate: bool = False) -> AsyncIterator[str]:
+    """Raw text chunks as Gemini streams them (one chunk on a cache hit).
+
+    Same limits as `_generate_async`; a failure is only retried before the first chunk has
+    been yielded. The complete answer is cached when the stream finishes.
+    """
+    key = llm_cache.cache_key(settings.gemini_model, prompt, None)
+    if not regenerate:
+        cached = await run_in_threadpool(llm_cache.get, key, kind)
+        if cached is not None:
+            yield cached
+            return
+    _ensure_configured()
+    model = genai.GenerativeModel(settings.gemini_model)
+    parts: List[str] = []
+    attempt = 0
+    while True:
+        try:
+            async with _async_limiter():
+                resp = await asyncio.wait_for(
+                    model.generate_content_async(prompt, stream=True, request_options={"timeout": settings.llm_timeout}),
+                    timeout=settings.llm_timeout,
+                )
+                chunks = resp.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=settings.llm_timeout)
+                    except StopAsyncIteration:
+                        break
+                    text = _chunk_text(chunk)
+                    if text:
+                        parts.append(text)
+                        yield text
+            break
+        except Exception as e:
+            if parts:
+                _, status, reason = _classify(e)
+                raise LLMError(status, kind, reason, str(e) or type(e).__name__, attempt + 1, False) from e
+            error = _give_up(e, kind, attempt)
+            if error is not None:
+                raise error from e
+            await asyncio.sleep(_backoff(attempt))
+            attempt += 1
+    await run_in_threadpool(llm_cache.put, key, settings.gemini_model, kind, "".join(parts))
+
+
+class _IncrementalFormatter:
+    """Applies a whole-text formatter to a growing stream of chunks.
+
+    Only completed lines are formatted, and the last formatted line is held back, so what
+    has been emitted never needs to change as more text arrives. `finish` formats the
+    full text and returns the remaining tail.
+    """
+
+    def __init__(self, formatter: Callable[[str], str]):
+        self.formatter = formatter
+        self.raw = ""
+        self.emitted = ""
+
+    def feed(self, chunk: str) -> str:
+        self.raw += chunk
+        cut = self.raw.rfind("\n")
+        if cut < 0:
+            return ""
+        formatted = self.formatter(self.raw[:cut + 1])
+        stable = formatted[:formatted.rfind("\n") + 1]
+        if len(stable) <= len(self.emitted) or not stable.startswith(self.emitted):
+            return ""
+        delta = stable[len(self.emitted):]
+        self.emitted = stable
+        return delta
+
+    def finish(self) -> Tuple[str, str]:
+        """(tail not yet emitted, complete formatted text)."""
+        formatted = self.formatter(self.raw)
+        tail = formatted[len(self.emitted):] if formatted.startswith(self.emitted) else ""
+        return tail, formatted
+
+
+def _clean_lines(text: str) -> str:
+    """`_clean_output` applied line by line, so a streamed line is final once complete."""
+    return "\n".join(_clean_output(line) for line in text.strip().split("\n"))
+
+
+async def _stream_events(prompt: str, kind: str, formatter: Callable[[str], str], regenerate: bool) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """("delta", {"text"}) events of formatted text, then ("done", {"text"}) with the whole answer."""
+    incremental = _IncrementalFormatter(formatter)
+    async for chunk in _stream_async(prompt, kind, regenerate=regenerate):
+        delta = incremental.feed(chunk)
+        if delta:
+            yield "delta", {"text": delta}
+    tail, full = incremental.finish()
+    if not full.strip():
+        raise HTTPException(status_code=502, detail=f"Gemini {kind} response was empty")
+    if tail:
+        yield "delta", {"text": tail}
+    yield "done", {"text": full}
+
+
+async def generate_story_async(
     transcript: str,
     story_format: Optional[Literal["lucy", "narrative", "business", "motivational"]] = None,
     use_custom_prompt: Optional[bool] = None,
     custom_prompt: Optional[str] = None,
+    regenerate: bool = False,
 ) -> str:
-    _ensure_configured()
-    model = genai.GenerativeModel(settings.gemini_model)
+    """The whole story at once, exactly as the model wrote it."""
     framing, story = _extract_framing_and_story(transcript)
     prompt = _build_prompt(framing, story, story_format, use_custom_prompt, custom_prompt)
-    resp = model.generate_content(prompt)
-    text = getattr(resp, "text", None)
-    if not text:
-        # SDK may return candidates structure; try to extract
-        try:
-            text = resp.candidates[0].content.parts[0].text  # type: ignore
-        except Exception:
-            raise HTTPException(status_code=502, detail="Gemini response was empty")
+    text = await _generate_async(prompt, "story", regenerate=regenerate)
+    if not text.strip():
+        raise HTTPException(status_code=502, detail="Gemini response was empty")
     # Return EXACTLY what the model outputs (preserve spacing and headings)
-    return (text or "").strip()
+    return text.strip()
 
 
-def generate_chat_response(message: str, system_hint: Optional[str] = None) -> str:
-    """General-purpose chat completion via Gemini."""
-    _ensure_configured()
-    model = genai.GenerativeModel(settings.gemini_model)
+async def generate_chat_response_async(message: str, system_hint: Optional[str] = None, regenerate: bool = False) -> str:
     prompt = message if not system_hint else f"System: {system_hint}\n\nUser: {message}"
-    resp = model.generate_content(prompt)
-    text = getattr(resp, "text", None)
+    text = await _generate_async(prompt, "chat", regenerate=regenerate)
     if not text:
-        try:
-            text = resp.candidates[0].content.parts[0].text  # type: ignore
-        except Exception:
-            raise HTTPException(status_code=502, detail="Gemini chat response empty")
+        raise HTTPException(status_code=502, detail="Gemini chat response empty")
     return _clean_output(text)
 
 
+def stream_story_events(
+    transcript: str,
+    story_format: Optional[Literal["lucy", "narrative", "business", "motivational"]] = None,
+    use_custom_prompt: Optional[bool] = None,
+    custom_prompt: Optional[str] = None,
+    regenerate: bool = False,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Story generation as it streams, laid out by `_format_story_universal` line by line."""
+    framing, story = _extract_framing_and_story(transcript)
+    prompt = _build_prompt(framing, story, story_format, use_custom_prompt, custom_prompt)
+    return _stream_events(prompt, "story", _format_story_universal, regenerate)
+
+
+def stream_chat_events(
+    message: str, system_hint: Optional[str] = None, regenerate: bool = False
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    prompt = message if not system_hint else f"System: {system_hint}\n\nUser: {message}"
+    return _stream_events(prompt, "chat", _clean_lines, regenerate)
+
+
 def _extract_framing_and_story(transcript: str) -> tuple[str, str]:
     parts = transcript.split('.')
     if len(parts) > 1:
@@ -322,34 +569,22 @@ MANDATORY:
 """
 
 
-def generate_caption_and_title(filename: str, transcript: Optional[str] = None, seed: Optional[int] = None) -> dict:
-    _ensure_configured()
-    model = genai.GenerativeModel(settings.gemini_model)
-
-    # Basic keyword extraction from transcript to force grounding
-    def _top_terms(text: str, limit: int = 12) -> list[str]:
-        import re
-        if not text:
-            return []
-        tokens = re.findall(r"[A-Za-z][A-Za-z\-']+", text.lower())
-        stop = set([
-            'the','a','an','and','or','but','so','to','of','in','on','for','with','as','at','by','from','is','are','was','were','be','been','being','it','its','that','this','these','those','i','you','he','she','we','they','them','me','my','our','your','his','her','their','not','no','do','did','does','doing','have','has','had','having','about','into','over','after','before','between','up','down','out','again','further','then','once','here','there','when','where','why','how','all','any','both','each','few','more','most','other','some','such','only','own','same','than','too','very','can','will','just','now'
-        ])
-        counts: dict[str,int] = {}
-        for t in tokens:
-            if t in stop or len(t) <= 2:
-                continue
-            counts[t] = counts.get(t, 0) + 1
-        sorted_terms = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
-        return [k for k, _ in sorted_terms[:limit]]
-
-    key_terms = _top_terms(transcript or "")
-    key_terms_str = ", ".join(key_terms) if key_terms else ""
+# Basic keyword extraction from transcript to force grounding
+def _top_terms(text: str, limit: int = 12) -> list[str]:
+    import re
+    if not text:
+        return []
+    tokens = re.findall(r"[A-Za-z][A-Za-z\-']+", text.lower())
+    counts: dict[str,int] = {}
+    for t in tokens:
+        if t in STOP_WORDS or len(t) <= 2:
+            continue
+        counts[t] = counts.get(t, 0) + 1
+    sorted_terms = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [k for k, _ in sorted_terms[:limit]]
 
-    prompt = f"""
-You will be given a raw VIDEO TRANSCRIPT. Generate a Title, a long Caption, and Hashtags that are STRICTLY grounded in the transcript content.
 
-OUTPUT FORMAT (plain text, no labels, no markdown symbols):
+_CAPTION_LAYOUT = """OUTPUT FORMAT (plain text, no labels, no markdown symbols):
 1) First line: a 6-10 word Title that clearly reflects the transcript topic.
 2) Blank line.
 3) One-line Hook that matches the transcript's subject (no clickbait, no business jargon unless present in transcript).
@@ -359,8 +594,22 @@ OUTPUT FORMAT (plain text, no labels, no markdown symbols):
 7) One-line CTA that fits the transcript context (avoid generic “follow for more” unless transcript suggests it).
 8) Blank line.
 9) One single line containing 15–25 space-separated hashtags. All hashtags must derive from the transcript vocabulary; avoid generic tags unrelated to the transcript.
+"""
+
+
+def _caption_prompt(transcript: Optional[str], full_transcript: Optional[str] = None) -> str:
+    """`full_transcript` is the uncondensed text when `transcript` was cut to the prompt budget."""
+    key_terms = _top_terms(full_transcript or transcript or "")
+    key_terms_str = ", ".join(key_terms) if key_terms else ""
+    heading = "TRANSCRIPT (the sole source of truth):"
+    if full_transcript and full_transcript != transcript:
+        heading = "TRANSCRIPT (condensed from a longer recording; … marks skipped material; the sole source of truth):"
 
-TRANSCRIPT (the sole source of truth):
+    prompt = f"""
+You will be given a raw VIDEO TRANSCRIPT. Generate a Title, a long Caption, and Hashtags that are STRICTLY grounded in the transcript content.
+
+{_CAPTION_LAYOUT}
+{heading}
 {transcript or 'None provided'}
 
 GROUNDING REQUIREMENTS:
@@ -370,23 +619,66 @@ GROUNDING REQUIREMENTS:
 - Avoid business/marketing language unless it appears in the transcript.
 - No references to filename, no meta commentary, no labels.
 """
-    def _call_llm(p: str) -> str:
+    return prompt
+
+
+def _map_prompt(chunk: str, part: int, parts: int, words: int) -> str:
+    return f"""
+Below is part {part} of {parts} of a long VIDEO TRANSCRIPT. Condense it into notes of at most {words} words that keep its concrete content: topics, steps, names, numbers, places and memorable moments, in the order they occur.
+
+Rules: plain sentences only, no headings, no markdown, no commentary about the transcript itself. Reuse the speaker's own vocabulary. Do not add anything that is not in this part.
+
+TRANSCRIPT PART {part}/{parts}:
+{chunk}
+"""
+
+
+def _budget_plan(transcript: str) -> Tuple[str, List[str], int]:
+    """("as_is" | "extract" | "map_reduce", map chunks, per-chunk token budget)."""
+    budget = settings.llm_prompt_budget_tokens
+    tokens = estimate_tokens(transcript)
+    if tokens <= budget:
+        return "as_is", [], 0
+    if tokens <= settings.llm_map_reduce_tokens:
+        return "extract", [], 0
+    chunks = chunk_text(transcript, settings.llm_map_chunk_tokens)
+    return "map_reduce", chunks, max(50, budget // len(chunks))
+
+
+def _reduce(notes: List[str]) -> str:
+    # Notes come back in transcript order; trim extractively if the model ran long
+    return select_segments("\n".join(n.strip() for n in notes if n.strip()), settings.llm_prompt_budget_tokens)
+
+
+async def _condense_transcript_async(transcript: str) -> str:
+    """Fit a transcript into LLM_PROMPT_BUDGET_TOKENS for the caption prompt.
+
+    Short transcripts pass through. Longer ones keep their most central segments
+    (TF-IDF centrality). Very long ones are map-reduced: chunks are condensed by Gemini
+    concurrently (bounded by LLM_MAX_CONCURRENCY, cached like any other call; a failed
+    chunk falls back to extraction) and the notes are joined in order.
+    """
+    mode, chunks, chunk_budget = _budget_plan(transcript)
+    if mode == "as_is":
+        return transcript
+    if mode == "extract":
+        return await run_in_threadpool(select_segments, transcript, settings.llm_prompt_budget_tokens)
+    words = chunk_budget * 3 // 4
+
+    async def _map(n: int, chunk: str) -> str:
         try:
-            r = model.generate_content(p)
-            t = getattr(r, "text", None)
-            if t:
-                return t
-            try:
-                return r.candidates[0].content.parts[0].text  # type: ignore
-            except Exception:
-                return ""
+            notes = await _generate_async(_map_prompt(chunk, n + 1, len(chunks), words), "transcript_map")
         except Exception:
-            return ""
+            notes = ""
+        return notes or await run_in_threadpool(select_segments, chunk, chunk_budget)
 
-    txt = _call_llm(prompt)
-    # Retry with shorter, even stricter prompt if first attempt is empty
-    if not txt:
-        retry_prompt = f"""
+    notes = await asyncio.gather(*(_map(n, chunk) for n, chunk in enumerate(chunks)))
+    return await run_in_threadpool(_reduce, list(notes))
+
+
+def _caption_retry_prompt(transcript: Optional[str]) -> str:
+    """Shorter, even stricter prompt used when the first attempt comes back empty."""
+    retry_prompt = f"""
 You will receive a VIDEO TRANSCRIPT. Produce:
 1) Title (6-10 words) that clearly matches the transcript topic.
 2) Blank line.
@@ -399,7 +691,10 @@ TRANSCRIPT:
 
 Rules: no labels, no markdown, no generic business language unless in transcript, mirror the transcript vocabulary.
 """
-        txt = _call_llm(retry_prompt)
+    return retry_prompt
+
+
+def _parse_caption(txt: str, transcript: Optional[str]) -> dict:
     # Parse plain text output per required layout
     lines = [l.rstrip() for l in (txt or "").splitlines()]
     # Title = first non-empty line
@@ -615,6 +910,89 @@ Rules: no labels, no markdown, no generic business language unless in transcript
     return {"title": title, "caption": caption, "hashtags": hashtags_line}
 
 
+def _packed_caption_prompt(transcripts: Dict[str, str]) -> str:
+    """One request for several short transcripts; each answer uses the single-clip layout."""
+    blocks = []
+    for clip_id, transcript in transcripts.items():
+        key_terms = ", ".join(_top_terms(transcript or ""))
+        blocks.append(f"[{clip_id}]\nKEY TERMS: {key_terms or 'none'}\n{transcript or 'None provided'}\n[/{clip_id}]")
+    joined = "\n\n".join(blocks)
+    ids = ", ".join(transcripts)
+    return f"""
+You will be given several raw VIDEO TRANSCRIPTS, each wrapped in [id] ... [/id]. For EACH one, independently generate a Title, a long Caption, and Hashtags that are STRICTLY grounded in that transcript alone. Never mix content between transcripts.
+
+Answer with ONLY a JSON object whose keys are exactly these ids: {ids}. Each value is a single string laid out as follows (use \\n for line breaks):
+
+{_CAPTION_LAYOUT}
+GROUNDING REQUIREMENTS:
+- Use only information present in that transcript. Do NOT invent topics.
+- Mirror each transcript’s vocabulary and include at least 5 of its KEY TERMS verbatim in the caption body (if available).
+- Avoid business/marketing language unless it appears in the transcript.
+- No references to filenames or ids, no meta commentary, no labels.
+
+TRANSCRIPTS:
+{joined}
+"""
+
+
+def _parse_packed(txt: str, ids: List[str]) -> Dict[str, str]:
+    body = txt.strip()
+    if body.startswith("```"):
+        body = body.split("\n", 1)[1] if "\n" in body else ""
+        body = body.rsplit("```", 1)[0]
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {clip_id: data[clip_id] for clip_id in ids if isinstance(data.get(clip_id), str) and data[clip_id].strip()}
+
+
+async def generate_captions_packed_async(
+    transcripts: Dict[str, str], seed: Optional[int] = None, regenerate: bool = False
+) -> Dict[str, dict]:
+    """Captions for several transcripts in one Gemini request, keyed like `transcripts`.
+
+    Ids missing from (or malformed in) the answer are left out so the caller can retry
+    them one by one.
+    """
+    _ensure_configured()
+    txt = await _generate_async(_packed_caption_prompt(transcripts), "caption_batch", seed=seed, regenerate=regenerate)
+    answers = _parse_packed(txt, list(transcripts))
+    return {clip_id: _parse_caption(text, transcripts[clip_id]) for clip_id, text in answers.items()}
+
+
+def generate_caption_and_title(
+    filename: str, transcript: Optional[str] = None, seed: Optional[int] = None, regenerate: bool = False
+) -> dict:
+    """Blocking `generate_caption_and_title_async`, for worker threads (e.g. the pipeline).
+
+    The coroutine runs on the shared Gemini loop, so it counts against the same
+    LLM_MAX_CONCURRENCY cap as the app's own calls.
+    """
+    loop = _llm_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("generate_caption_and_title would block the event loop; await the async version")
+    coro = generate_caption_and_title_async(filename, transcript, seed=seed, regenerate=regenerate)
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def generate_caption_and_title_async(
+    filename: str, transcript: Optional[str] = None, seed: Optional[int] = None, regenerate: bool = False
+) -> dict:
+    _ensure_configured()
+    condensed = await _condense_transcript_async(transcript or "")
+    txt = await _generate_async(_caption_prompt(condensed, transcript), "caption", seed=seed, regenerate=regenerate)
+    if not txt:
+        txt = await _generate_async(_caption_retry_prompt(condensed), "caption", seed=seed, regenerate=regenerate)
+    return _parse_caption(txt, transcript)
+
+
 def _extract_keywords_from_filename(name: str) -> list[str]:
     n = name.lower()
     buckets = {
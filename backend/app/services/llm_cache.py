@@ -0,0 +1,150 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.app.config import settings
+
+
+# Gemini responses keyed by (model, normalized prompt, seed, temperature). SQLite in WAL
+# mode so entries survive restarts and are shared by every worker process.
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_puts_since_evict = 0
+EVICT_EVERY = 16
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        path = Path(settings.llm_cache_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                response TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+            CREATE TABLE IF NOT EXISTS counters (
+                kind TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        _conn = conn
+    return _conn
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace-insensitive form so re-indented or re-wrapped prompts share an entry."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model: str, prompt: str, seed: Optional[int] = None, temperature: Optional[float] = None) -> str:
+    h = hashlib.sha256()
+    for part in (model, normalize_prompt(prompt), repr(seed), repr(temperature)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _count(conn: sqlite3.Connection, kind: str, column: str) -> None:
+    conn.execute(
+        f"INSERT INTO counters (kind, {column}) VALUES (?, 1) "
+        f"ON CONFLICT(kind) DO UPDATE SET {column} = {column} + 1",
+        (kind,),
+    )
+
+
+def get(key: str, kind: str) -> Optional[str]:
+    """Cached response for a key (None on a miss or once its TTL has passed)."""
+    if not settings.llm_cache_enabled:
+        return None
+    now = time.time()
+    with _lock, _db() as conn:
+        row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None and now - row[1] > settings.llm_cache_ttl:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            row = None
+        if row is None:
+            _count(conn, kind, "misses")
+            return None
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        _count(conn, kind, "hits")
+        return row[0]
+
+
+def put(key: str, model: str, kind: str, response: str) -> None:
+    global _puts_since_evict
+    if not settings.llm_cache_enabled or not response:
+        return
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    with _lock, _db() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, model, kind, response, bytes, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, model, kind, response, size, now, now),
+        )
+        _puts_since_evict += 1
+        if _puts_since_evict >= EVICT_EVERY:
+            _puts_since_evict = 0
+            _evict(conn, now)
+
+
+def _evict(conn: sqlite3.Connection, now: float) -> int:
+    """Drop expired entries, then least recently used ones until under LLM_CACHE_MAX_BYTES."""
+    removed = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - settings.llm_cache_ttl,)).rowcount
+    total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+    if total <= settings.llm_cache_max_bytes:
+        return removed
+    over = total - settings.llm_cache_max_bytes
+    doomed = []
+    for key, size in conn.execute("SELECT key, bytes FROM responses ORDER BY accessed_at"):
+        if over <= 0:
+            break
+        doomed.append((key,))
+        over -= size
+    conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+    return removed + len(doomed)
+
+
+def evict() -> int:
+    with _lock, _db() as conn:
+        return _evict(conn, time.time())
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        conn = _db()
+        entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM responses").fetchone()
+        counters = {
+            kind: {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None}
+            for kind, hits, misses in conn.execute("SELECT kind, hits, misses FROM counters ORDER BY kind")
+        }
+    return {
+        "enabled": settings.llm_cache_enabled,
+        "entries": entries,
+        "bytes": total,
+        "max_bytes": settings.llm_cache_max_bytes,
+        "ttl_seconds": settings.llm_cache_ttl,
+        "hits": sum(c["hits"] for c in counters.values()),
+        "misses": sum(c["misses"] for c in counters.values()),
+        "by_kind": counters,
+    }
+
+
+def clear() -> int:
+    with _lock, _db() as conn:
+        removed = conn.execute("DELETE FROM responses").rowcount
+        conn.execute("DELETE FROM counters")
+    return removed
@@ -0,0 +1,235 @@
+import mimetypes
+import os
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Mapping, Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from backend.app.services.content_store import content_key
+
+
+CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "public, max-age=0, must-revalidate"
+
+# (prefix bytes, file offset, byte count) written in order, followed by a trailer
+Segment = Tuple[bytes, int, int]
+
+
+def _read_chunk(fd: int, offset: int, count: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, count, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, count)
+
+
+class MediaFileResponse(Response):
+    """Streams byte segments of a file.
+
+    Uses the ASGI pathsend / zerocopysend extensions when the server offers them (the
+    kernel copies file pages straight to the socket), otherwise positional reads in a
+    worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        status_code: int,
+        headers: Mapping[str, str],
+        media_type: Optional[str] = None,
+        segments: Optional[List[Segment]] = None,
+        trailer: bytes = b"",
+        send_body: bool = True,
+        whole_file: bool = False,
+    ):
+        self.path = path
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.segments = segments or []
+        self.trailer = trailer
+        self.send_body = send_body
+        self.whole_file = whole_file
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or not (self.segments or self.trailer):
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        extensions = scope.get("extensions") or {}
+        if self.whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path.resolve())})
+            return
+        zerocopy = "http.response.zerocopysend" in extensions
+        with open(self.path, "rb") as f:
+            fd = f.fileno()
+            for prefix, offset, count in self.segments:
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                if zerocopy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": f,
+                        "offset": offset,
+                        "count": count,
+                        "more_body": True,
+                    })
+                    continue
+                end = offset + count
+                while offset < end:
+                    chunk = await anyio.to_thread.run_sync(_read_chunk, fd, offset, min(CHUNK_SIZE, end - offset))
+                    if not chunk:
+                        break
+                    offset += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
+
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a `bytes=` Range header into sorted, coalesced inclusive (start, end) pairs.
+
+    Returns None when the header should be ignored (other units, syntax errors, too many
+    ranges) and an empty list when no range is satisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    parts = [p.strip() for p in spec.split(",") if p.strip()]
+    if not parts or len(parts) > MAX_RANGES:
+        return None
+    ranges = []
+    for part in parts:
+        first, dash, last = part.partition("-")
+        if not dash:
+            return None
+        try:
+            if first == "":
+                length = int(last)
+                if length <= 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+                continue
+            start = int(first)
+            end = int(last) if last else None
+        except ValueError:
+            return None
+        if end is not None and start > end:
+            return None
+        if start < size:
+            ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return False
+
+
+def media_response(
+    request: Request,
+    path: Path,
+    media_type: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    immutable: Optional[bool] = None,
+) -> Response:
+    """Serve a file with validators, single/multi byte ranges and caching headers.
+
+    Content-addressed clips get a strong ETag from their content key and an immutable
+    Cache-Control; everything else is validated by size and mtime on each use.
+    """
+    st = path.stat()
+    size = st.st_size
+    key = content_key(path)
+    if immutable is None:
+        immutable = key is not None
+    etag = f'"{key[:32]}"' if key else f'"{size:x}-{st.st_mtime_ns:x}"'
+    media_type = media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    base = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": formatdate(st.st_mtime, usegmt=True),
+        "cache-control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+    }
+    base.update(headers or {})
+    send_body = request.method != "HEAD"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return MediaFileResponse(path, 304, base, send_body=False)
+    elif _not_modified_since(request.headers.get("if-modified-since", ""), st.st_mtime):
+        return MediaFileResponse(path, 304, base, send_body=False)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range:
+        if if_range.strip().startswith(('"', "W/")):
+            if if_range.strip() != etag:
+                range_header = None
+        elif not _not_modified_since(if_range, st.st_mtime):
+            range_header = None
+
+    ranges = parse_range(range_header, size) if range_header else None
+    if ranges is None:
+        return MediaFileResponse(
+            path, 200, dict(base, **{"content-length": str(size)}), media_type,
+            segments=[(b"", 0, size)] if size else [], send_body=send_body, whole_file=True,
+        )
+    if not ranges:
+        return MediaFileResponse(
+            path, 416, dict(base, **{"content-range": f"bytes */{size}", "content-length": "0"}), send_body=False
+        )
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        return MediaFileResponse(
+            path, 206,
+            dict(base, **{"content-range": f"bytes {start}-{end}/{size}", "content-length": str(end - start + 1)}),
+            media_type, segments=[(b"", start, end - start + 1)], send_body=send_body,
+        )
+
+    boundary = secrets.token_hex(16)
+    segments: List[Segment] = []
+    total = 0
+    for start, end in ranges:
+        prefix = (
+            f"\r\n--{boundary}\r\nContent-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode("latin-1")
+        segments.append((prefix, start, end - start + 1))
+        total += len(prefix) + end - start + 1
+    trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+    total += len(trailer)
+    return MediaFileResponse(
+        path, 206, dict(base, **{"content-length": str(total)}),
+        f"multipart/byteranges; boundary={boundary}",
+        segments=segments, trailer=trailer, send_body=send_body,
+    )
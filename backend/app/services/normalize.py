@@ -0,0 +1,160 @@
+import os
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.app.services.catalog import record_file
+from backend.app.services.content_store import alias_original, forget_path
+from backend.app.services.probe import probe_media
+from backend.app.services.video_trim import ensure_ffmpeg_available
+
+
+# Containers that can be remuxed in place without renaming the file
+REMUX_EXTS = (".mp4", ".m4v", ".mov")
+MAX_TOP_LEVEL_ATOMS = 256
+VFR_TOLERANCE = 0.01
+
+
+def top_level_atoms(path: Path) -> List[str]:
+    """Types of the top-level ISO-BMFF boxes, read from box headers only."""
+    atoms: List[str] = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset + 8 <= size and len(atoms) < MAX_TOP_LEVEL_ATOMS:
+            f.seek(offset)
+            header = f.read(16)
+            box_size = int.from_bytes(header[:4], "big")
+            if box_size == 1 and len(header) == 16:
+                box_size = int.from_bytes(header[8:16], "big")
+            elif box_size == 0:
+                box_size = size - offset
+            if box_size < 8:
+                break
+            atoms.append(header[4:8].decode("latin-1"))
+            offset += box_size
+    return atoms
+
+
+def needs_faststart(path: Path) -> bool:
+    """The index (moov) comes after the media data, so players and seeks read the tail first."""
+    atoms = top_level_atoms(path)
+    if "moov" not in atoms or "mdat" not in atoms:
+        return False
+    return atoms.index("mdat") < atoms.index("moov")
+
+
+def _rate(value: Optional[str]) -> Optional[Fraction]:
+    try:
+        rate = Fraction(value or "")
+    except (ValueError, ZeroDivisionError):
+        return None
+    return rate if rate > 0 else None
+
+
+def frame_rate_mode(probe: Dict[str, Any]) -> Dict[str, Any]:
+    """CFR/VFR from the first video stream: a nominal rate that differs from the average is VFR."""
+    video = next((s for s in probe.get("streams", []) if s.get("codec_type") == "video"), None)
+    if video is None:
+        return {"vfr": None, "r_frame_rate": None, "avg_frame_rate": None}
+    nominal = _rate(video.get("r_frame_rate"))
+    average = _rate(video.get("avg_frame_rate"))
+    vfr = None
+    if nominal and average:
+        vfr = abs(nominal - average) / nominal > VFR_TOLERANCE
+    return {
+        "vfr": vfr,
+        "r_frame_rate": float(nominal) if nominal else None,
+        "avg_frame_rate": float(average) if average else None,
+    }
+
+
+def primary_audio_index(probe: Dict[str, Any]) -> Optional[int]:
+    """Index among audio streams of the track to keep: the default one, else the widest."""
+    audio = [s for s in probe.get("streams", []) if s.get("codec_type") == "audio"]
+    if not audio:
+        return None
+    for n, stream in enumerate(audio):
+        if (stream.get("disposition") or {}).get("default"):
+            return n
+    return max(range(len(audio)), key=lambda n: (audio[n].get("channels") or 0, -n))
+
+
+def _remux(source: Path, target: Path, audio_map: str, copy_audio: bool) -> subprocess.CompletedProcess:
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-i", str(source),
+        "-map", "0:v:0?", "-map", audio_map, "-map_metadata", "0",
+        "-c:v", "copy",
+    ]
+    cmd += ["-c:a", "copy"] if copy_audio else ["-c:a", "aac", "-b:a", "192k"]
+    cmd += ["-movflags", "+faststart", "-f", "mp4" if source.suffix.lower() != ".mov" else "mov", str(target)]
+    return subprocess.run(cmd, capture_output=True, text=True)
+
+
+def normalize_original(path: Path) -> Dict[str, Any]:
+    """Make an upload friendly to stream-copy trims, previews and transcription.
+
+    Inspects the file and, when the moov atom trails the media data or there are extra
+    audio/data tracks, remuxes it in place (video always stream-copied, audio copied when
+    the container allows) with the index up front and only the primary audio track.
+    Returns what was found/done; a failed remux leaves the file untouched.
+    """
+    probe = probe_media(path)
+    streams = probe.get("streams")
+    report: Dict[str, Any] = {
+        "container": path.suffix.lower().lstrip("."),
+        "faststart": None,
+        "audio_tracks": None,
+        "primary_audio": None,
+        "remuxed": False,
+        "audio_reencoded": False,
+        "error": None,
+        **frame_rate_mode(probe),
+    }
+    if path.suffix.lower() not in REMUX_EXTS:
+        return report
+    reasons = []
+    if needs_faststart(path):
+        reasons.append("faststart")
+    report["faststart"] = not reasons
+    if streams is not None:
+        audio_tracks = sum(1 for s in streams if s.get("codec_type") == "audio")
+        report["audio_tracks"] = audio_tracks
+        report["primary_audio"] = primary_audio_index(probe)
+        if audio_tracks > 1:
+            reasons.append("audio_tracks")
+        if any(s.get("codec_type") in ("data", "attachment") for s in streams):
+            reasons.append("data_tracks")
+    report["reasons"] = reasons
+    if not reasons:
+        return report
+
+    ensure_ffmpeg_available()
+    before = path.stat()
+    tmp = path.with_name(f"{path.stem}.norm.part")
+    audio_map = f"0:a:{report['primary_audio'] or 0}?"
+    result = _remux(path, tmp, audio_map, copy_audio=True)
+    if result.returncode != 0 or not tmp.exists() or tmp.stat().st_size == 0:
+        # e.g. PCM audio the target container cannot carry: re-encode audio only
+        result = _remux(path, tmp, audio_map, copy_audio=False)
+        report["audio_reencoded"] = True
+    if result.returncode != 0 or not tmp.exists() or tmp.stat().st_size == 0:
+        tmp.unlink(missing_ok=True)
+        report["audio_reencoded"] = False
+        report["error"] = (result.stderr or "ffmpeg remux failed").strip()[-300:]
+        return report
+    os.replace(tmp, path)
+    # A microsecond past the upload time: artifacts derived since stay fresh, while
+    # validators and the (size, mtime) content-hash cache see a new file
+    os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns + 1000))
+    # Re-uploads of the same raw file dedupe to this normalized copy
+    old_sha256 = forget_path(path)
+    if old_sha256:
+        alias_original(old_sha256, path)
+    record_file(path)
+    report["remuxed"] = True
+    report["faststart"] = True
+    report["bytes_before"] = before.st_size
+    report["bytes_after"] = path.stat().st_size
+    return report
@@ -0,0 +1,358 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from backend.app.config import settings
+from backend.app.services import catalog
+from backend.app.services.content_store import CAS_ROOT, clip_origin, find_original, original_alias, source_hash
+from backend.app.services.normalize import normalize_original
+from backend.app.services.probe import probe_duration, probe_media
+from backend.app.services.storage import VIDEO_EXTS, storage_relative
+
+
+# Post-upload precomputation. Jobs are tracked per stored file; results are keyed by
+# content hash so duplicates and re-uploads reuse them. Each step writes one file under
+# storage/.cas/ingest/<sha256>/ and is skipped when that file already exists.
+# "normalize" may rewrite the file, so it runs first and the hash is taken after it.
+INGEST_ROOT = CAS_ROOT / "ingest"
+STEPS = ("normalize", "probe", "audio", "transcript", "caption")
+DEPENDS = {"normalize": (), "probe": (), "audio": ("probe",), "transcript": ("audio",), "caption": ("transcript",)}
+OUTPUTS = {
+    "normalize": "normalize.json",
+    "probe": "probe.json",
+    "audio": "audio.flac",
+    "transcript": "transcript.json",
+    "caption": "caption.json",
+}
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _lower_priority() -> None:
+    # Linux nice values are per thread; ffmpeg/whisper children inherit it
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), settings.pipeline_nice)
+    except (AttributeError, OSError):
+        pass
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.pipeline_workers), thread_name_prefix="pipeline", initializer=_lower_priority
+)
+_lock = threading.Lock()
+_jobs: Dict[str, Dict[str, Any]] = {}
+_cancel: Dict[str, threading.Event] = {}
+
+
+def ingest_dir(sha256: str) -> Path:
+    return INGEST_ROOT / sha256
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def enabled_steps() -> List[str]:
+    """Configured PIPELINE_STEPS plus everything they depend on, in DAG order."""
+    wanted = {s.strip() for s in settings.pipeline_steps.split(",") if s.strip() in DEPENDS}
+    pending = list(wanted)
+    while pending:
+        for dep in DEPENDS[pending.pop()]:
+            if dep not in wanted:
+                wanted.add(dep)
+                pending.append(dep)
+    return [s for s in STEPS if s in wanted]
+
+
+def _has_audio(work: Path) -> bool:
+    probe = _read_json(work / OUTPUTS["probe"]) or {}
+    if "streams" not in probe:
+        return True
+    return any(s.get("codec_type") == "audio" for s in probe["streams"])
+
+
+def _step_probe(media: Path, work: Path, cancel: threading.Event) -> None:
+    data = probe_media(media)
+    if not data:
+        # No ffprobe: keep what ffmpeg reports so later steps can still run
+        duration = probe_duration(media)
+        if duration is None:
+            raise RuntimeError("Could not probe the file")
+        data = {"format": {"duration": str(duration)}}
+    _write_json(work / OUTPUTS["probe"], data)
+
+
+def _step_audio(media: Path, work: Path, cancel: threading.Event) -> None:
+    """16 kHz mono FLAC, the input Whisper resamples to anyway."""
+    out = work / OUTPUTS["audio"]
+    tmp = out.with_name(out.name + ".part")
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-i", str(media), "-map", "0:a:0",
+        "-vn", "-ac", "1", "-ar", "16000", "-c:a", "flac", "-f", "flac", str(tmp),
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    while True:
+        try:
+            _, stderr = proc.communicate(timeout=0.5)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel.is_set():
+                proc.kill()
+                proc.communicate()
+                tmp.unlink(missing_ok=True)
+                raise Cancelled()
+    if proc.returncode != 0 or not tmp.exists():
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"FFmpeg audio extraction failed: {stderr.decode('utf-8', errors='ignore')[-300:]}")
+    os.replace(tmp, out)
+
+
+def _step_transcript(media: Path, work: Path, cancel: threading.Event) -> None:
+    from backend.app.services.transcription import transcribe_media
+
+    text, segments, language, duration = transcribe_media(str(work / OUTPUTS["audio"]))
+    _write_json(work / OUTPUTS["transcript"], {
+        "transcript": text,
+        "segments": [s.model_dump() for s in segments],
+        "language": language,
+        "duration": duration,
+    })
+
+
+def _step_caption(media: Path, work: Path, cancel: threading.Event) -> None:
+    from backend.app.services.llm import generate_caption_and_title
+
+    transcript = (_read_json(work / OUTPUTS["transcript"]) or {}).get("transcript", "")
+    data = generate_caption_and_title(filename=media.name, transcript=transcript, seed=None)
+    _write_json(work / OUTPUTS["caption"], dict(data))
+
+
+def _normalize(media: Path, sha256: Optional[str]) -> str:
+    """Run the ingest normalizer unless this content was already normalized; returns the
+    (possibly new) content hash."""
+    sha256 = sha256 or source_hash(media)
+    if (ingest_dir(sha256) / OUTPUTS["normalize"]).exists():
+        return sha256
+    # The report is kept under the post-remux hash; a re-upload of the raw file that was
+    # deduped to the normalized copy finds it through the alias
+    alias = original_alias(sha256)
+    if alias and (ingest_dir(alias) / OUTPUTS["normalize"]).exists() and source_hash(media) == alias:
+        return alias
+    report = normalize_original(media)
+    if report["remuxed"]:
+        sha256 = source_hash(media)
+    _write_json(ingest_dir(sha256) / OUTPUTS["normalize"], report)
+    return sha256
+
+
+_RUNNERS: Dict[str, Callable[[Path, Path, threading.Event], None]] = {
+    "probe": _step_probe,
+    "audio": _step_audio,
+    "transcript": _step_transcript,
+    "caption": _step_caption,
+}
+
+
+def _set(key: str, **fields: Any) -> None:
+    with _lock:
+        _jobs[key].update(fields)
+
+
+def _set_step(key: str, step: str, state: str) -> None:
+    with _lock:
+        _jobs[key]["steps"][step] = state
+
+
+def _run(media: Path, key: str, sha256: Optional[str], steps: List[str], cancel: threading.Event) -> None:
+    _set(key, status="running", started_at=time.time())
+    try:
+        if cancel.is_set():
+            raise Cancelled()
+        if "normalize" in steps:
+            _set_step(key, "normalize", "running")
+            sha256 = _normalize(media, sha256)
+            _set_step(key, "normalize", "done")
+        sha256 = sha256 or source_hash(media)
+        _set(key, sha256=sha256)
+        work = ingest_dir(sha256)
+        work.mkdir(parents=True, exist_ok=True)
+        rest = [step for step in steps if step != "normalize"]
+        for step in rest:
+            if cancel.is_set():
+                raise Cancelled()
+            if (work / OUTPUTS[step]).exists():
+                _set_step(key, step, "done")
+                continue
+            if step == "audio" and not _has_audio(work):
+                for skipped in rest[rest.index(step):]:
+                    _set_step(key, skipped, "skipped")
+                break
+            _set_step(key, step, "running")
+            _RUNNERS[step](media, work, cancel)
+            _set_step(key, step, "done")
+            catalog.record_file(work)
+        _set(key, status="done")
+    except Cancelled:
+        _set(key, status="cancelled")
+    except HTTPException as e:
+        _set(key, status="failed", error=str(e.detail))
+    except Exception as e:
+        _set(key, status="failed", error=str(e))
+    finally:
+        with _lock:
+            for step, state in _jobs[key]["steps"].items():
+                if state in ("queued", "running"):
+                    _jobs[key]["steps"][step] = "cancelled" if cancel.is_set() else "failed"
+            _jobs[key]["finished_at"] = time.time()
+            _cancel.pop(key, None)
+
+
+def schedule(media: Path, sha256: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Queue the precomputation DAG for a stored video (no-op when disabled or already queued).
+
+    `sha256` is the content hash when the caller already knows it (uploads hash as they
+    stream), saving a re-read of the file.
+    """
+    steps = enabled_steps()
+    if not settings.pipeline_enabled or not steps or media.suffix.lower() not in VIDEO_EXTS:
+        return None
+    key = str(media.resolve())
+    with _lock:
+        if key in _cancel:
+            return dict(_jobs[key])
+        cancel = threading.Event()
+        _cancel[key] = cancel
+        _jobs[key] = {
+            "sha256": sha256,
+            "path": storage_relative(media),
+            "status": "queued",
+            "steps": {step: "queued" for step in steps},
+            "error": None,
+            "queued_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        job = dict(_jobs[key])
+    _executor.submit(_run, media, key, sha256, steps, cancel)
+    return job
+
+
+def cancel(media: Path) -> bool:
+    """Ask a queued or running pipeline to stop after (or during) its current step."""
+    with _lock:
+        event = _cancel.get(str(media.resolve()))
+    if event is None:
+        return False
+    event.set()
+    return True
+
+
+def status(media: Path) -> Dict[str, Any]:
+    with _lock:
+        job = _jobs.get(str(media.resolve()))
+        job = json.loads(json.dumps(job)) if job else None
+    sha256 = source_hash(media)
+    work = ingest_dir(sha256)
+    ready = {step: (work / name).exists() for step, name in OUTPUTS.items()}
+    return {"sha256": sha256, "job": job, "ready": ready}
+
+
+def cached_probe(media: Path) -> Optional[Dict[str, Any]]:
+    return _read_json(ingest_dir(source_hash(media)) / OUTPUTS["probe"])
+
+
+def slice_transcript(transcript: Dict[str, Any], start: float, end: float) -> Dict[str, Any]:
+    """The part of a timed transcript inside [start, end], re-based to start at 0.
+
+    A segment belongs to the range when its midpoint falls inside it.
+    """
+    segments = []
+    for seg in transcript.get("segments") or []:
+        s, e = seg.get("start"), seg.get("end")
+        if s is None or e is None or not start <= (s + e) / 2 <= end:
+            continue
+        segments.append(dict(seg, start=round(max(0.0, s - start), 3), end=round(min(end, e) - start, 3)))
+    return {
+        "transcript": " ".join(seg["text"] for seg in segments if seg.get("text")).strip(),
+        "segments": segments,
+        "language": transcript.get("language"),
+        "duration": round(end - start, 3),
+    }
+
+
+def cached_transcript(media: Path) -> Optional[Dict[str, Any]]:
+    """Transcript precomputed for this content, or sliced from the one of the source a
+    trimmed clip was cut from (and then stored under the clip's own hash)."""
+    work = ingest_dir(source_hash(media))
+    found = _read_json(work / OUTPUTS["transcript"])
+    if found is not None:
+        return found
+    origin = clip_origin(media)
+    if origin is None:
+        return None
+    source = _read_json(ingest_dir(origin[0]) / OUTPUTS["transcript"])
+    if source is None or not source.get("segments"):
+        return None
+    sliced = slice_transcript(source, origin[1], origin[2])
+    _write_json(work / OUTPUTS["transcript"], sliced)
+    catalog.record_file(work)
+    return sliced
+
+
+def cached_caption(media: Path) -> Optional[Dict[str, Any]]:
+    return _read_json(ingest_dir(source_hash(media)) / OUTPUTS["caption"])
+
+
+def store_transcript(media: Path, text: str, segments: List[Dict[str, Any]], language: Optional[str], duration: Optional[float]) -> None:
+    """Keep an on-demand transcript so later requests (and the pipeline) reuse it."""
+    if not text:
+        return
+    work = ingest_dir(source_hash(media))
+    _write_json(work / OUTPUTS["transcript"], {
+        "transcript": text, "segments": segments, "language": language, "duration": duration,
+    })
+    catalog.record_file(work)
+
+
+def active_hashes() -> List[str]:
+    """Content hashes whose ingest directory a queued or running job is writing to."""
+    with _lock:
+        return [j["sha256"] for j in _jobs.values() if j["sha256"] and j["status"] in ("queued", "running")]
+
+
+def release_ingest(sha256: Optional[str]) -> bool:
+    """Remove the precomputed results of content no longer stored anywhere.
+
+    Called after an original or clip is deleted or archived; a no-op while another stored
+    file still has this content or a job is working on it.
+    """
+    if not sha256 or sha256 in active_hashes() or find_original(sha256) is not None:
+        return False
+    work = ingest_dir(sha256)
+    if not work.exists():
+        return False
+    shutil.rmtree(work, ignore_errors=True)
+    catalog.remove_file(work)
+    return True
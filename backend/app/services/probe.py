@@ -0,0 +1,32 @@
+import json
+import re
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+def probe_media(path: Union[str, Path]) -> Dict[str, Any]:
+    """Return ffprobe format/stream metadata as a dict (empty when probing fails)."""
+    cmd = ["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", str(path)]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        return json.loads(result.stdout or "{}")
+    except Exception:
+        return {}
+
+
+def probe_duration(path: Union[str, Path], probe: Optional[Dict[str, Any]] = None) -> Optional[float]:
+    data = probe if probe is not None else probe_media(path)
+    try:
+        return float(data["format"]["duration"])
+    except Exception:
+        pass
+    # ffprobe missing or unhelpful: fall back to the banner printed by ffmpeg -i
+    try:
+        result = subprocess.run(["ffmpeg", "-i", str(path)], capture_output=True, text=True)
+        m = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr or "")
+        if m:
+            return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3))
+    except Exception:
+        pass
+    return None
@@ -0,0 +1,140 @@
+import bisect
+import math
+import re
+from typing import Dict, List
+
+import numpy as np
+
+
+# Transcript compression for LLM prompts. Sizes are estimated, not tokenized: Gemini
+# averages about four characters of English per token, which is close enough to budget.
+CHARS_PER_TOKEN = 4
+SEGMENT_WORDS = 40  # unpunctuated Whisper output is cut into windows of about this many words
+MAX_VOCAB = 4096
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-']+")
+GAP_MARKER = "… "
+# English stop words, shared by every transcript term extractor (ranking, caption fallbacks)
+STOP_WORDS = frozenset([
+    'the', 'a', 'an', 'and', 'or', 'but', 'so', 'to', 'of', 'in', 'on', 'for', 'with', 'as', 'at', 'by', 'from',
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'it', 'its', 'that', 'this', 'these', 'those', 'i', 'you',
+    'he', 'she', 'we', 'they', 'them', 'me', 'my', 'our', 'your', 'his', 'her', 'their', 'not', 'no', 'do', 'did',
+    'does', 'doing', 'have', 'has', 'had', 'having', 'about', 'into', 'over', 'after', 'before', 'between', 'up',
+    'down', 'out', 'again', 'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any',
+    'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'only', 'own', 'same', 'than', 'too', 'very',
+    'can', 'will', 'just', 'now',
+])
+# Spoken filler carries no topic either, but is only dropped for ranking
+_STOP = STOP_WORDS | {'um', 'uh', 'like', 'yeah', 'okay', 'gonna', 'really', 'know', 'get', 'got'}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def split_segments(text: str) -> List[str]:
+    """Sentences, with run-on stretches (no punctuation) cut into ~SEGMENT_WORDS word windows."""
+    segments: List[str] = []
+    for sentence in _SENTENCE_END.split(" ".join((text or "").split())):
+        words = sentence.split()
+        if len(words) <= SEGMENT_WORDS * 2:
+            if words:
+                segments.append(sentence)
+            continue
+        for i in range(0, len(words), SEGMENT_WORDS):
+            segments.append(" ".join(words[i:i + SEGMENT_WORDS]))
+    return segments
+
+
+def rank_segments(segments: List[str]) -> np.ndarray:
+    """Informativeness score per segment: TF-IDF cosine centrality.
+
+    Each segment's L2-normalized TF-IDF vector is scored by its similarity to the
+    transcript centroid (the sum of all vectors), i.e. its mean cosine similarity to every
+    other segment, computed in O(segments x vocabulary) rather than pairwise.
+    """
+    n = len(segments)
+    if n == 0:
+        return np.zeros(0)
+    tokenized = [[w for w in _WORD.findall(s.lower()) if w not in _STOP and len(w) > 2] for s in segments]
+    df: Dict[str, int] = {}
+    for words in tokenized:
+        for w in set(words):
+            df[w] = df.get(w, 0) + 1
+    vocab = {w: i for i, w in enumerate(sorted(df, key=lambda w: (-df[w], w))[:MAX_VOCAB])}
+    if not vocab:
+        return np.zeros(n)
+    rows: List[int] = []
+    cols: List[int] = []
+    for r, words in enumerate(tokenized):
+        for w in words:
+            c = vocab.get(w)
+            if c is not None:
+                rows.append(r)
+                cols.append(c)
+    tf = np.zeros((n, len(vocab)), dtype=np.float32)
+    np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+    idf = np.log((1 + n) / (1 + np.asarray([df[w] for w in vocab], dtype=np.float32))) + 1.0
+    tfidf = np.log1p(tf) * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+    centroid = tfidf.sum(axis=0)
+    # Leave out each segment's similarity to itself
+    return (tfidf @ centroid - (norms[:, 0] > 0)) / max(1, n - 1)
+
+
+def select_segments(text: str, budget_tokens: int) -> str:
+    """The most central segments that fit the budget, kept in transcript order.
+
+    Returns `text` unchanged when it already fits.
+    """
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    segments = split_segments(text)
+    scores = rank_segments(segments)
+    budget = budget_tokens * CHARS_PER_TOKEN
+    chosen: List[int] = []  # kept sorted
+    seen = set()
+    used = 0
+    for i in (int(i) for i in np.argsort(-scores, kind="stable")):
+        # Repeated lines score as very central but add nothing the second time
+        key = segments[i].lower()
+        if key in seen:
+            continue
+        at = bisect.bisect(chosen, i)
+        prev = chosen[at - 1] if at else None
+        nxt = chosen[at] if at < len(chosen) else None
+        # Gap markers go between non-adjacent kept segments; count the ones i adds or closes
+        gaps = (prev is not None and i != prev + 1) + (nxt is not None and nxt != i + 1)
+        gaps -= prev is not None and nxt is not None and nxt != prev + 1
+        size = len(segments[i]) + 1 + gaps * len(GAP_MARKER)
+        if used + size > budget:
+            continue
+        seen.add(key)
+        chosen.insert(at, i)
+        used += size
+    if not chosen:
+        return text[:budget]
+    # Mark where material was skipped so the model does not read across the gap
+    parts = [segments[chosen[0]]]
+    for prev, i in zip(chosen, chosen[1:]):
+        parts.append((GAP_MARKER if i != prev + 1 else "") + segments[i])
+    return " ".join(parts)
+
+
+def chunk_text(text: str, chunk_tokens: int) -> List[str]:
+    """Consecutive runs of whole segments of about `chunk_tokens` each (the map inputs)."""
+    limit = chunk_tokens * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for segment in split_segments(text):
+        if current and size + len(segment) + 1 > limit:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(segment)
+        size += len(segment) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
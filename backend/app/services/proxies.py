@@ -0,0 +1,81 @@
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict
+
+from fastapi import HTTPException
+
+from backend.app.config import settings
+from backend.app.services.background import BackgroundQueue
+from backend.app.services.catalog import record_file
+from backend.app.services.storage import artifact_dir, is_fresh, register_derived
+from backend.app.services.video_trim import ensure_ffmpeg_available
+
+
+_queue = BackgroundQueue("proxy", settings.proxy_workers)
+
+
+def proxy_path(original: Path) -> Path:
+    return artifact_dir(original, "proxies") / f"{original.stem}.mp4"
+
+
+register_derived(lambda original: [proxy_path(original)])
+
+
+def generate_proxy(original: Path) -> Path:
+    """Encode a small H.264 preview with dense keyframes so scrubbing seeks instantly."""
+    if not original.exists():
+        raise HTTPException(status_code=404, detail="Original not found")
+    out_path = proxy_path(original)
+    if is_fresh(out_path, original):
+        return out_path
+    ensure_ffmpeg_available()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(".part")
+    height = settings.proxy_height
+    gop_expr = f"expr:gte(t,n_forced*{settings.proxy_keyframe_interval})"
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-i", str(original),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:'min({height},ih)'",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "28", "-pix_fmt", "yuv420p",
+        "-force_key_frames", gop_expr, "-sc_threshold", "0",
+        "-c:a", "aac", "-b:a", "96k", "-ac", "2",
+        "-movflags", "+faststart", "-f", "mp4", str(tmp_path),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0 or not tmp_path.exists() or tmp_path.stat().st_size == 0:
+        try:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail=f"FFmpeg proxy failed: {result.stderr[-300:]}")
+    os.replace(tmp_path, out_path)
+    record_file(out_path)
+    return out_path
+
+
+def schedule_proxy(original: Path) -> None:
+    """Queue proxy generation on the background pool (no-op if queued or already fresh)."""
+    if is_fresh(proxy_path(original), original):
+        return
+    _queue.submit(str(original.resolve()), generate_proxy, original)
+
+
+def proxy_status(original: Path) -> Dict[str, str]:
+    key = str(original.resolve())
+    if is_fresh(proxy_path(original), original):
+        return {"status": "ready"}
+    if _queue.is_pending(key):
+        return {"status": "pending"}
+    error = _queue.failure(key)
+    if error:
+        return {"status": "failed", "error": error}
+    return {"status": "missing"}
+
+
+def preview_source(original: Path) -> Path:
+    """Proxy when ready, otherwise the original so previews never block on encoding."""
+    candidate = proxy_path(original)
+    return candidate if is_fresh(candidate, original) else original
@@ -0,0 +1,140 @@
+import os
+import subprocess
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from backend.app.services.catalog import record_file
+from backend.app.services.storage import artifact_dir, is_fresh, register_derived
+from backend.app.services.video_trim import ensure_ffmpeg_available
+
+
+@dataclass(frozen=True)
+class RenditionPreset:
+    name: str
+    width: int
+    height: int
+    max_bitrate_kbps: int
+    max_duration: Optional[float] = None
+    audio_bitrate: str = "128k"
+
+    @property
+    def max_bitrate(self) -> str:
+        kbps = self.max_bitrate_kbps
+        return f"{kbps // 1000}M" if kbps % 1000 == 0 else f"{kbps}k"
+
+
+# Platform targets: aspect ratio, bitrate ceiling and duration limit per destination
+PLATFORM_PRESETS: Dict[str, RenditionPreset] = {
+    "youtube_shorts": RenditionPreset("youtube_shorts", 1080, 1920, 8000, 60),
+    "tiktok": RenditionPreset("tiktok", 1080, 1920, 6000, 600),
+    "linkedin": RenditionPreset("linkedin", 1080, 1080, 5000, 600),
+    "facebook": RenditionPreset("facebook", 1080, 1080, 6000, 240 * 60),
+    "youtube": RenditionPreset("youtube", 1920, 1080, 10000),
+}
+
+
+_locks_guard = threading.Lock()
+_locks: Dict[str, threading.Lock] = {}
+
+
+def _clip_lock(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def rendition_path(clip_path: Path, preset_name: str) -> Path:
+    return artifact_dir(clip_path, "renditions") / f"{clip_path.stem}_{preset_name}.mp4"
+
+
+register_derived(lambda clip: [rendition_path(clip, name) for name in PLATFORM_PRESETS])
+
+
+def _filter_graph(presets: List[RenditionPreset]) -> str:
+    labels = "".join(f"[s{i}]" for i in range(len(presets)))
+    chains = [f"[0:v]split={len(presets)}{labels}"]
+    for i, p in enumerate(presets):
+        chains.append(
+            f"[s{i}]scale={p.width}:{p.height}:force_original_aspect_ratio=decrease,"
+            f"pad={p.width}:{p.height}:(ow-iw)/2:(oh-ih)/2,setsar=1[v{i}]"
+        )
+    return ";".join(chains)
+
+
+def _output_args(index: int, preset: RenditionPreset, out_path: Path) -> List[str]:
+    bufsize = f"{preset.max_bitrate_kbps * 2}k"
+    args = [
+        "-map", f"[v{index}]", "-map", "0:a?",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+        "-maxrate", preset.max_bitrate, "-bufsize", bufsize, "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", preset.audio_bitrate,
+    ]
+    if preset.max_duration:
+        args += ["-t", str(preset.max_duration)]
+    return args + ["-movflags", "+faststart", "-f", "mp4", str(out_path)]
+
+
+def render_renditions(clip_path: Path, preset_names: List[str]) -> Dict[str, Path]:
+    """Decode a clip once and fan out into every requested platform preset.
+
+    Renditions already cached under the dated renditions/ folder are reused, so only
+    missing presets are encoded in a single ffmpeg run.
+    """
+    unknown = [n for n in preset_names if n not in PLATFORM_PRESETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown rendition preset(s): {', '.join(unknown)}")
+    if not clip_path.exists():
+        raise HTTPException(status_code=404, detail="Clip not found")
+    # One encode per clip at a time; a waiting request then finds the fresh renditions
+    with _clip_lock(str(clip_path.resolve())):
+        return _render_renditions(clip_path, preset_names)
+
+
+def _render_renditions(clip_path: Path, preset_names: List[str]) -> Dict[str, Path]:
+    results: Dict[str, Path] = {}
+    pending: List[RenditionPreset] = []
+    for name in dict.fromkeys(preset_names):
+        out_path = rendition_path(clip_path, name)
+        if is_fresh(out_path, clip_path):
+            results[name] = out_path
+        else:
+            pending.append(PLATFORM_PRESETS[name])
+    if not pending:
+        return results
+
+    ensure_ffmpeg_available()
+    out_dir = artifact_dir(clip_path, "renditions")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Unique temp names: another worker process may be encoding the same clip
+    run = uuid.uuid4().hex[:12]
+    tmp_paths = [rendition_path(clip_path, p.name).with_suffix(f".{run}.part") for p in pending]
+    cmd = ["ffmpeg", "-y", "-i", str(clip_path), "-filter_complex", _filter_graph(pending)]
+    for i, (preset, tmp) in enumerate(zip(pending, tmp_paths)):
+        cmd += _output_args(i, preset, tmp)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    failed = result.returncode != 0 or any(not t.exists() or t.stat().st_size == 0 for t in tmp_paths)
+    if failed:
+        for t in tmp_paths:
+            try:
+                if t.exists():
+                    t.unlink()
+            except Exception:
+                pass
+        raise HTTPException(status_code=500, detail=f"FFmpeg rendition failed: {result.stderr[-300:]}")
+    for preset, tmp in zip(pending, tmp_paths):
+        final = rendition_path(clip_path, preset.name)
+        os.replace(tmp, final)
+        record_file(final)
+        results[preset.name] = final
+    return results
+
+
+def get_rendition(clip_path: Path, preset_name: Optional[str]) -> Path:
+    """Return the cached rendition for a preset (rendering it on demand), or the clip itself."""
+    if not preset_name:
+        return clip_path
+    return render_renditions(clip_path, [preset_name])[preset_name]
@@ -0,0 +1,234 @@
+import base64
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from backend.app.config import settings
+from backend.app.services import catalog
+from backend.app.services.storage import STORAGE_ROOT
+
+
+UPLOADS_ROOT = STORAGE_ROOT / ".uploads"
+WRITE_BUFFER = 1024 * 1024
+CHECKSUM_ALGORITHMS = ("sha1", "sha256", "md5")
+
+_locks_guard = threading.Lock()
+_locks: Dict[str, threading.Lock] = {}
+
+
+def _session_lock(upload_id: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _session_dir(upload_id: str) -> Path:
+    try:
+        uuid.UUID(hex=upload_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return UPLOADS_ROOT / upload_id
+
+
+def _load(upload_id: str) -> Dict[str, Any]:
+    try:
+        with open(_session_dir(upload_id) / "session.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+def _save(session: Dict[str, Any]) -> None:
+    path = _session_dir(session["id"]) / "session.json"
+    tmp = path.with_suffix(".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(session, f)
+    os.replace(tmp, path)
+
+
+def _merge(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Add [start, end) to a sorted list of disjoint half-open ranges."""
+    merged: List[List[int]] = []
+    for s, e in sorted(ranges + [[start, end]]):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return merged
+
+
+def contiguous_offset(session: Dict[str, Any]) -> int:
+    """Bytes received without gaps from the start (the tus Upload-Offset)."""
+    ranges = session["ranges"]
+    return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+
+def format_ranges(session: Dict[str, Any]) -> str:
+    return ",".join(f"{s}-{e - 1}" for s, e in session["ranges"])
+
+
+def _expire_stale() -> None:
+    cutoff = time.time() - settings.upload_session_ttl
+    try:
+        entries = list(os.scandir(UPLOADS_ROOT))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                catalog.record_cache(entry.path)
+        except OSError:
+            continue
+
+
+def create_upload(filename: str, length: int, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Start an upload session backed by a pre-sized sparse file under storage/.uploads/."""
+    if length <= 0:
+        raise HTTPException(status_code=400, detail="Upload-Length must be positive")
+    if length > settings.upload_max_bytes:
+        raise HTTPException(status_code=413, detail="Upload exceeds the maximum size")
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if not name or "." not in name:
+        raise HTTPException(status_code=400, detail="filename with an extension is required")
+    _expire_stale()
+    upload_id = uuid.uuid4().hex
+    session_dir = UPLOADS_ROOT / upload_id
+    session_dir.mkdir(parents=True, exist_ok=True)
+    with open(session_dir / "data", "wb") as f:
+        f.truncate(length)
+    session = {
+        "id": upload_id,
+        "filename": name,
+        "length": length,
+        "metadata": metadata or {},
+        "ranges": [],
+        "created_at": time.time(),
+    }
+    _save(session)
+    catalog.record_cache(session_dir)
+    return session
+
+
+def get_upload(upload_id: str) -> Dict[str, Any]:
+    return _load(upload_id)
+
+
+def parse_checksum(header: Optional[str]) -> Optional[Tuple[str, bytes]]:
+    """Parse a tus `Upload-Checksum: <algorithm> <base64 digest>` header."""
+    if not header:
+        return None
+    algorithm, _, encoded = header.strip().partition(" ")
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"Unsupported checksum algorithm '{algorithm}'")
+    try:
+        return algorithm, base64.b64decode(encoded.strip(), validate=True)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Upload-Checksum")
+
+
+def _write_at(fd: int, data: bytes, offset: int, digest: Optional[Any]) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+    if digest is not None:
+        digest.update(data)
+
+
+async def write_chunk(
+    upload_id: str,
+    offset: int,
+    body: AsyncIterator[bytes],
+    checksum: Optional[Tuple[str, bytes]] = None,
+) -> Dict[str, Any]:
+    """Write one chunk at `offset`. Chunks may arrive in any order and in parallel.
+
+    The byte range is only recorded as received once the whole chunk has been written
+    and, when a checksum was supplied, verified (tus returns 460 on mismatch).
+    """
+    session = _load(upload_id)
+    length = session["length"]
+    if offset < 0 or offset >= length:
+        raise HTTPException(status_code=400, detail="Upload-Offset outside of the upload")
+    digest = hashlib.new(checksum[0]) if checksum else None
+    position = offset
+    pending = bytearray()
+    fd = os.open(str(_session_dir(upload_id) / "data"), os.O_WRONLY)
+    try:
+        async for piece in body:
+            if position + len(pending) + len(piece) > length:
+                raise HTTPException(status_code=400, detail="Chunk extends past Upload-Length")
+            pending += piece
+            if len(pending) >= WRITE_BUFFER:
+                data = bytes(pending)
+                pending.clear()
+                await run_in_threadpool(_write_at, fd, data, position, digest)
+                position += len(data)
+        if pending:
+            data = bytes(pending)
+            await run_in_threadpool(_write_at, fd, data, position, digest)
+            position += len(data)
+    finally:
+        os.close(fd)
+
+    if digest is not None and digest.digest() != checksum[1]:
+        raise HTTPException(status_code=460, detail="Checksum mismatch")
+    if position > offset:
+        with _session_lock(upload_id):
+            session = _load(upload_id)
+            session["ranges"] = _merge(session["ranges"], offset, position)
+            _save(session)
+        # The data file is sparse, so its accounted size grows with each chunk
+        await run_in_threadpool(catalog.record_cache, _session_dir(upload_id))
+    return session
+
+
+def finalize_upload(upload_id: str, destination: Path, sha256: Optional[str] = None) -> Tuple[Path, str]:
+    """Move a complete upload to its final location (same filesystem, so no copy).
+
+    Returns the destination and the SHA-256 of the content (verified against `sha256`
+    when given).
+    """
+    with _session_lock(upload_id):
+        session = _load(upload_id)
+        if session["ranges"] != [[0, session["length"]]]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: received {format_ranges(session) or 'nothing'} of {session['length']} bytes",
+            )
+        data_path = _session_dir(upload_id) / "data"
+        h = hashlib.sha256()
+        with open(data_path, "rb") as f:
+            for block in iter(lambda: f.read(WRITE_BUFFER), b""):
+                h.update(block)
+        if sha256 and h.hexdigest() != sha256.lower():
+            raise HTTPException(status_code=460, detail="Checksum mismatch")
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(data_path, destination)
+        shutil.rmtree(_session_dir(upload_id), ignore_errors=True)
+        catalog.record_cache(_session_dir(upload_id))
+    with _locks_guard:
+        _locks.pop(upload_id, None)
+    return destination, h.hexdigest()
+
+
+def cancel_upload(upload_id: str) -> None:
+    session_dir = _session_dir(upload_id)
+    if not session_dir.exists():
+        raise HTTPException(status_code=404, detail="Upload not found")
+    with _session_lock(upload_id):
+        shutil.rmtree(session_dir, ignore_errors=True)
+        catalog.record_cache(session_dir)
+    with _locks_guard:
+        _locks.pop(upload_id, None)
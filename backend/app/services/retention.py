@@ -0,0 +1,345 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from backend.app.config import settings
+from backend.app.services import catalog, pipeline
+from backend.app.services.bulk_ops import archive_asset, delete_asset
+from backend.app.services.content_store import forget_path
+from backend.app.services.storage import STORAGE_ROOT, storage_relative
+from backend.app.services.video_trim import ensure_ffmpeg_available
+
+
+# Folders under storage/YYYY/MM/DD/ that only hold regenerable artifacts; quota
+# enforcement evicts entries from these, least recently used first.
+DERIVED_KINDS = ("proxies", "thumbnails", "renditions", "waveforms", "hls")
+ARCHIVE_KINDS = ("original", "clips", "renditions", "proxies")
+STATE_PATH = Path("data") / "retention_state.json"
+
+_run_lock = threading.Lock()
+_state_lock = threading.Lock()
+_last_report: Optional[Dict[str, Any]] = None
+_thread: Optional[threading.Thread] = None
+
+
+def policy() -> Dict[str, Any]:
+    return {
+        "enabled": settings.retention_enabled,
+        "interval_seconds": settings.retention_interval,
+        "original_days": settings.retention_original_days,
+        "mezzanine_days": settings.retention_mezzanine_days,
+        "mezzanine_crf": settings.retention_mezzanine_crf,
+        "archive_days": settings.retention_archive_days,
+        "quota_bytes": settings.storage_quota_bytes,
+        "archive_dir": settings.archive_dir,
+    }
+
+
+def _load_state() -> Dict[str, Any]:
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"mezzanine": {}}
+
+
+def _save_state(state: Dict[str, Any]) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_PATH)
+
+
+def dated_dirs() -> List[Tuple[datetime, Path]]:
+    """All storage/YYYY/MM/DD directories, oldest first."""
+    def numeric_dirs(path: str) -> List[os.DirEntry]:
+        try:
+            with os.scandir(path) as it:
+                return [e for e in it if e.is_dir() and e.name.isdigit()]
+        except OSError:
+            return []
+
+    found = []
+    for y in numeric_dirs(str(STORAGE_ROOT)):
+        for m in numeric_dirs(y.path):
+            for d in numeric_dirs(m.path):
+                try:
+                    found.append((datetime(int(y.name), int(m.name), int(d.name)), Path(d.path)))
+                except ValueError:
+                    continue
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def _tree_stats(path: Path, seen: Set[Tuple[int, int]]) -> Tuple[int, float]:
+    """(bytes, last access) of a file or directory tree; hard links are counted once."""
+    total = 0
+    last = 0.0
+    stack = [str(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            st = os.stat(current, follow_symlinks=False)
+        except OSError:
+            continue
+        if os.path.isdir(current):
+            try:
+                with os.scandir(current) as it:
+                    stack.extend(e.path for e in it)
+            except OSError:
+                pass
+            continue
+        last = max(last, st.st_atime, st.st_mtime)
+        if (st.st_dev, st.st_ino) in seen:
+            continue
+        seen.add((st.st_dev, st.st_ino))
+        total += st.st_size
+    return total, last
+
+
+def storage_usage() -> int:
+    """Accounted bytes under storage/ (running totals kept by the catalog)."""
+    return catalog.usage_bytes()
+
+
+def _files(folder: Path) -> List[Path]:
+    try:
+        with os.scandir(folder) as it:
+            return sorted(Path(e.path) for e in it if e.is_file() and not e.name.endswith(".part"))
+    except OSError:
+        return []
+
+
+def _throttle(dry_run: bool) -> None:
+    if not dry_run and settings.retention_throttle > 0:
+        time.sleep(settings.retention_throttle)
+
+
+def _remove_empty_dirs(root: Path) -> None:
+    """Remove empty directories below and including a date folder, then empty month/year parents."""
+    for current, _, _ in sorted(os.walk(root), key=lambda item: len(item[0]), reverse=True):
+        try:
+            os.rmdir(current)
+        except OSError:
+            pass
+    for parent in (root.parent, root.parent.parent):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+
+
+def transcode_mezzanine(original: Path) -> Tuple[int, int]:
+    """Re-encode an original in place as a compact H.264/AAC mezzanine.
+
+    The file is only replaced when the result is smaller; the original mtime is kept so
+    proxies, thumbnails and waveforms derived from it stay fresh. Returns (before, after).
+    """
+    ensure_ffmpeg_available()
+    before = original.stat()
+    tmp = original.with_name(f"{original.stem}.mezz.part")
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-i", str(original),
+        "-map", "0:v:0?", "-map", "0:a:0?",
+        "-c:v", "libx264", "-preset", "slow", "-crf", str(settings.retention_mezzanine_crf),
+        "-pix_fmt", "yuv420p", "-threads", "1",
+        "-c:a", "aac", "-b:a", "128k",
+        "-movflags", "+faststart", "-f", "mp4", str(tmp),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0 or not tmp.exists() or tmp.stat().st_size == 0:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"FFmpeg mezzanine failed: {result.stderr[-300:]}")
+    after = tmp.stat().st_size
+    if after >= before.st_size:
+        tmp.unlink()
+        return before.st_size, before.st_size
+    os.replace(tmp, original)
+    os.utime(original, ns=(before.st_atime_ns, before.st_mtime_ns))
+    # Same mtime, different bytes: the recorded hash must not be trusted (or deduped to)
+    forget_path(original)
+    catalog.record_file(original)
+    return before.st_size, after
+
+
+def _apply_archive(report: Dict[str, Any], dirs: List[Tuple[datetime, Path]], today: datetime, dry_run: bool) -> None:
+    days = settings.retention_archive_days
+    if days <= 0:
+        return
+    cutoff = today - timedelta(days=days)
+    for day, base in dirs:
+        if day >= cutoff:
+            continue
+        moved = 0
+        for kind in ARCHIVE_KINDS:
+            for path in _files(base / kind):
+                try:
+                    if not dry_run:
+                        archive_asset(path)
+                        _throttle(dry_run)
+                    moved += 1
+                except Exception as e:
+                    report["errors"].append({"path": str(path), "error": str(e)})
+        if not dry_run:
+            _remove_empty_dirs(base)
+        if moved:
+            report["archived"].append({"date": day.strftime("%Y/%m/%d"), "files": moved})
+
+
+def _apply_originals(report: Dict[str, Any], dirs: List[Tuple[datetime, Path]], today: datetime, dry_run: bool) -> None:
+    delete_days = settings.retention_original_days
+    mezz_days = settings.retention_mezzanine_days
+    if delete_days <= 0 and mezz_days <= 0:
+        return
+    with _state_lock:
+        state = _load_state()
+    done = state.setdefault("mezzanine", {})
+    for day, base in dirs:
+        age = (today - day).days
+        for path in _files(base / "original"):
+            try:
+                rel = storage_relative(path)
+                if delete_days > 0 and age > delete_days:
+                    size = path.stat().st_size
+                    if not dry_run:
+                        delete_asset(path)
+                        done.pop(rel, None)
+                        _throttle(dry_run)
+                    report["originals_deleted"].append({"path": rel, "size": size})
+                elif mezz_days > 0 and age > mezz_days and rel not in done:
+                    if dry_run:
+                        report["mezzanine"].append({"path": rel, "before": path.stat().st_size, "after": None})
+                        continue
+                    before, after = transcode_mezzanine(path)
+                    done[rel] = datetime.now().isoformat()
+                    report["mezzanine"].append({"path": rel, "before": before, "after": after})
+                    _throttle(dry_run)
+            except Exception as e:
+                report["errors"].append({"path": str(path), "error": str(e)})
+    if not dry_run:
+        with _state_lock:
+            _save_state(state)
+
+
+def _apply_quota(report: Dict[str, Any], dry_run: bool) -> None:
+    quota = settings.storage_quota_bytes
+    if quota <= 0:
+        return
+    if dry_run:
+        usage = report["usage_before"] - sum(e["size"] for e in report["originals_deleted"])
+    else:
+        usage = storage_usage()
+    if usage <= quota:
+        return
+    # One eviction unit per entry of a derived folder (a proxy file, a thumbnail directory, ...)
+    seen: Set[Tuple[int, int]] = set()
+    units = []
+    for _, base in dated_dirs():
+        for kind in DERIVED_KINDS:
+            try:
+                with os.scandir(base / kind) as it:
+                    entries = [Path(e.path) for e in it if not e.name.endswith(".part")]
+            except OSError:
+                continue
+            for entry in entries:
+                size, last = _tree_stats(entry, seen)
+                units.append((last, size, entry))
+    # Precomputed ingest results are regenerable too, unless a pipeline job is writing them
+    busy = set(pipeline.active_hashes())
+    try:
+        with os.scandir(pipeline.INGEST_ROOT) as it:
+            ingest = [Path(e.path) for e in it if e.is_dir() and e.name not in busy]
+    except OSError:
+        ingest = []
+    for entry in ingest:
+        size, last = _tree_stats(entry, seen)
+        units.append((last, size, entry))
+    units.sort(key=lambda unit: unit[0])
+    for last, size, entry in units:
+        if usage <= quota:
+            break
+        try:
+            if not dry_run:
+                if entry.is_dir():
+                    shutil.rmtree(entry)
+                else:
+                    entry.unlink()
+                catalog.remove_file(entry)
+                _throttle(dry_run)
+            usage -= size
+            report["evicted"].append({
+                "path": storage_relative(entry),
+                "size": size,
+                "last_access": datetime.fromtimestamp(last).isoformat() if last else None,
+            })
+        except Exception as e:
+            report["errors"].append({"path": str(entry), "error": str(e)})
+    report["quota_satisfied"] = usage <= quota
+
+
+def run_retention(dry_run: bool = False) -> Dict[str, Any]:
+    """Apply archive, original and quota policies once and return the report.
+
+    Order matters: cold dates leave storage first, then old originals are deleted or
+    transcoded, and only then are derived artifacts evicted to meet the quota.
+    """
+    global _last_report
+    if not _run_lock.acquire(blocking=False):
+        return {"skipped": True, "reason": "A retention run is already in progress"}
+    try:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        report: Dict[str, Any] = {
+            "dry_run": dry_run,
+            "started_at": datetime.now().isoformat(),
+            "policy": policy(),
+            "usage_before": storage_usage(),
+            "archived": [],
+            "originals_deleted": [],
+            "mezzanine": [],
+            "evicted": [],
+            "errors": [],
+        }
+        _apply_archive(report, dated_dirs(), today, dry_run)
+        _apply_originals(report, dated_dirs(), today, dry_run)
+        _apply_quota(report, dry_run)
+        report["usage_after"] = report["usage_before"] if dry_run else storage_usage()
+        report["finished_at"] = datetime.now().isoformat()
+        if not dry_run:
+            _last_report = report
+        return report
+    finally:
+        _run_lock.release()
+
+
+def retention_status() -> Dict[str, Any]:
+    return {
+        "policy": policy(),
+        "running": _run_lock.locked(),
+        "usage_bytes": storage_usage(),
+        "last_report": _last_report,
+    }
+
+
+def _run_forever() -> None:
+    while True:
+        time.sleep(max(60.0, settings.retention_interval))
+        try:
+            run_retention()
+        except Exception:
+            continue
+
+
+def start_background_retention() -> None:
+    """Start the periodic retention thread when RETENTION_ENABLED is set."""
+    global _thread
+    if not settings.retention_enabled or _thread is not None:
+        return
+    _thread = threading.Thread(target=_run_forever, name="retention", daemon=True)
+    _thread.start()
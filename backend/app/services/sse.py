@@ -0,0 +1,29 @@
+import json
+from typing import Any, AsyncIterator, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def event_stream(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """Server-Sent Events response for (event, data) pairs.
+
+    An HTTPException raised mid-stream (headers are already sent by then) becomes a final
+    `error` event carrying its status and detail.
+    """
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for event, data in events:
+                yield format_event(event, data)
+        except HTTPException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"message": str(e.detail)}
+            yield format_event("error", {"status": e.status_code, **detail})
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=SSE_HEADERS)
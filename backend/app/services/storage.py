@@ -0,0 +1,167 @@
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Union
+from urllib.parse import urlparse
+
+from fastapi import HTTPException
+
+
+STORAGE_ROOT = Path("storage")
+
+VIDEO_EXTS = (".mp4", ".mov", ".mkv", ".webm", ".avi")
+
+
+def to_storage_relative(raw_path: str) -> str:
+    """Map URLs, /media/... links and storage/... paths to a storage-relative path."""
+    p = (raw_path or "").replace("\\", "/")
+    if p.startswith("http://") or p.startswith("https://"):
+        try:
+            p = urlparse(p).path
+        except Exception:
+            pass
+    for prefix in ("/video/media/", "/media/", "/storage/", "storage/"):
+        if p.startswith(prefix):
+            p = p[len(prefix):]
+            break
+    return p.lstrip("/")
+
+
+def resolve_storage_path(raw_path: Union[str, Path]) -> Path:
+    """Resolve a user supplied path to an absolute path inside storage/ or raise 400."""
+    root = STORAGE_ROOT.resolve()
+    if isinstance(raw_path, Path) and raw_path.is_absolute():
+        full = raw_path.resolve()
+    else:
+        full = (root / to_storage_relative(str(raw_path))).resolve()
+    try:
+        full.relative_to(root)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid path")
+    return full
+
+
+def storage_relative(path: Union[str, Path]) -> str:
+    full = Path(path).resolve()
+    return str(full.relative_to(STORAGE_ROOT.resolve())).replace("\\", "/")
+
+
+def dated_base_dir(path: Union[str, Path]) -> Path:
+    """Return storage/YYYY/MM/DD for a file stored in the dated layout (today otherwise)."""
+    try:
+        parts = storage_relative(path).split("/")
+    except ValueError:
+        parts = []
+    if len(parts) >= 4 and all(p.isdigit() for p in parts[:3]):
+        return STORAGE_ROOT / parts[0] / parts[1] / parts[2]
+    return STORAGE_ROOT / datetime.now().strftime("%Y/%m/%d")
+
+
+def artifact_dir(path: Union[str, Path], kind: str) -> Path:
+    """Directory for a derived artifact class (renditions, thumbnails, ...) next to a file."""
+    return dated_base_dir(path) / kind
+
+
+def is_fresh(artifact: Path, source: Path) -> bool:
+    """True when a cached artifact exists, is non-empty and not older than its source."""
+    try:
+        a = artifact.stat()
+        return a.st_size > 0 and a.st_mtime >= source.stat().st_mtime
+    except OSError:
+        return False
+
+
+# Derived artifact modules (renditions, thumbnails, proxies, ...) register a resolver
+# returning the cache paths they own for a source file, so deletes can clean them up.
+_derived_resolvers: List[Callable[[Path], Iterable[Path]]] = []
+
+
+def register_derived(resolver: Callable[[Path], Iterable[Path]]) -> None:
+    _derived_resolvers.append(resolver)
+
+
+# Callbacks told about every artifact removed by remove_derived_artifacts or created by
+# link_derived_artifacts (the catalog uses this to keep usage accounting current
+# without a circular import).
+_removal_listeners: List[Callable[[Path], object]] = []
+_added_listeners: List[Callable[[Path], object]] = []
+
+
+def on_artifact_removed(listener: Callable[[Path], object]) -> None:
+    _removal_listeners.append(listener)
+
+
+def on_artifact_added(listener: Callable[[Path], object]) -> None:
+    _added_listeners.append(listener)
+
+
+def _notify(listeners: List[Callable[[Path], object]], artifact: Path) -> None:
+    for listener in listeners:
+        try:
+            listener(artifact)
+        except Exception:
+            pass
+
+
+def derived_artifacts(path: Union[str, Path]) -> List[Path]:
+    source = Path(path)
+    found: List[Path] = []
+    for resolver in _derived_resolvers:
+        try:
+            found.extend(p for p in resolver(source) if p.exists())
+        except Exception:
+            continue
+    return found
+
+
+def remove_derived_artifacts(path: Union[str, Path]) -> int:
+    removed = 0
+    for artifact in derived_artifacts(path):
+        try:
+            if artifact.is_dir():
+                shutil.rmtree(artifact)
+            else:
+                artifact.unlink()
+            removed += 1
+        except Exception:
+            continue
+        _notify(_removal_listeners, artifact)
+    return removed
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def link_derived_artifacts(source: Union[str, Path], duplicate: Union[str, Path]) -> int:
+    """Give `duplicate` the derived artifacts already built for identical `source`.
+
+    Files are hard-linked (copied when linking is impossible), so proxies, thumbnails,
+    waveforms and renditions are ready immediately for a re-uploaded file.
+    """
+    linked = 0
+    for resolver in _derived_resolvers:
+        try:
+            pairs = list(zip(resolver(Path(source)), resolver(Path(duplicate))))
+        except Exception:
+            continue
+        for src, dst in pairs:
+            if not src.exists() or dst.exists():
+                continue
+            try:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                if src.is_dir():
+                    shutil.copytree(src, dst, copy_function=_link_or_copy)
+                else:
+                    _link_or_copy(str(src), str(dst))
+                linked += 1
+            except Exception:
+                continue
+            # The source's files gained links too, so listeners re-measure both sides
+            _notify(_added_listeners, src)
+            _notify(_added_listeners, dst)
+    return linked
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from backend.app.config import settings
+
+
+MAX_FIELD_BYTES = 64 * 1024
+
+
+def _open_part(path: Path) -> BinaryIO:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, "wb", buffering=0)
+
+
+def _write_block(f: BinaryIO, digest: Any, block: bytes) -> None:
+    f.write(block)
+    digest.update(block)
+
+
+def _discard(f: Optional[BinaryIO], path: Optional[Path]) -> None:
+    if f is not None:
+        f.close()
+    if path is not None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+async def stream_upload_to_disk(
+    request: Request,
+    destination: Callable[[str], Path],
+    field: str = "file",
+    max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Parse a multipart/form-data body as it arrives and write the `field` file part
+    straight to its final path (no spooled temp copy).
+
+    `destination(filename)` picks the final path; data goes to `<path>.part` and is
+    renamed once the body is complete. The content is SHA-256 hashed as it is written
+    (for upload dedup). Writes happen in the threadpool in
+    UPLOAD_STREAM_BUFFER_BYTES blocks so the event loop never blocks on disk I/O. The
+    size limit is checked against Content-Length before reading and while streaming.
+    """
+    max_bytes = settings.upload_max_bytes if max_bytes is None else max_bytes
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + MAX_FIELD_BYTES:
+        raise HTTPException(status_code=413, detail="Upload exceeds the maximum size")
+
+    boundary = params[b"boundary"].decode("latin-1").strip('"')
+    events: List[Tuple[str, bytes]] = []
+    header_field = bytearray()
+    header_value = bytearray()
+    headers: Dict[bytes, bytes] = {}
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        events.append(("headers", headers.get(b"content-disposition", b"")))
+        headers.clear()
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        events.append(("data", data[start:end]))
+
+    def on_part_end() -> None:
+        events.append(("end", b""))
+
+    parser = multipart.MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    buffer_size = max(64 * 1024, settings.upload_stream_buffer_bytes)
+    started = time.monotonic()
+    fields: Dict[str, str] = {}
+    final_path: Optional[Path] = None
+    part_path: Optional[Path] = None
+    out: Optional[BinaryIO] = None
+    pending = bytearray()
+    written = 0
+    current: Optional[str] = None
+    field_value = bytearray()
+    filename = ""
+    digest = hashlib.sha256()
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, payload in events:
+                if kind == "headers":
+                    _, disposition = parse_options_header(payload)
+                    current = disposition.get(b"name", b"").decode("utf-8", errors="replace")
+                    field_value.clear()
+                    if current == field and final_path is not None:
+                        raise HTTPException(status_code=400, detail=f"Only one '{field}' part is allowed")
+                    if current == field:
+                        filename = os.path.basename(
+                            disposition.get(b"filename", b"").decode("utf-8", errors="replace").replace("\\", "/")
+                        )
+                        if not filename:
+                            raise HTTPException(status_code=400, detail="Filename required")
+                        final_path = destination(filename)
+                        part_path = final_path.with_name(final_path.name + ".part")
+                        out = await run_in_threadpool(_open_part, part_path)
+                elif kind == "data":
+                    if current == field and out is not None:
+                        pending += payload
+                        if written + len(pending) > max_bytes:
+                            raise HTTPException(status_code=413, detail="Upload exceeds the maximum size")
+                        if len(pending) >= buffer_size:
+                            block = bytes(pending)
+                            pending.clear()
+                            await run_in_threadpool(_write_block, out, digest, block)
+                            written += len(block)
+                    elif current is not None:
+                        field_value += payload
+                        if len(field_value) > MAX_FIELD_BYTES:
+                            raise HTTPException(status_code=413, detail=f"Form field '{current}' is too large")
+                else:
+                    if current is not None and current != field:
+                        fields[current] = field_value.decode("utf-8", errors="replace")
+                    current = None
+            events.clear()
+        parser.finalize()
+
+        if out is None or final_path is None or part_path is None:
+            raise HTTPException(status_code=400, detail=f"Missing file field '{field}'")
+        if pending:
+            await run_in_threadpool(_write_block, out, digest, bytes(pending))
+            written += len(pending)
+            pending.clear()
+        await run_in_threadpool(out.close)
+        out = None
+        os.replace(part_path, final_path)
+    except BaseException:
+        await run_in_threadpool(_discard, out, part_path)
+        raise
+
+    seconds = max(time.monotonic() - started, 1e-6)
+    return {
+        "path": final_path,
+        "filename": filename,
+        "fields": fields,
+        "bytes": written,
+        "sha256": digest.hexdigest(),
+        "seconds": round(seconds, 3),
+        "throughput_mb_s": round(written / seconds / (1024 * 1024), 2),
+    }
@@ -0,0 +1,181 @@
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from backend.app.config import settings
+from backend.app.services.probe import probe_duration
+from backend.app.services.catalog import record_cache
+from backend.app.services.storage import artifact_dir, is_fresh, register_derived
+from backend.app.services.video_trim import ensure_ffmpeg_available
+
+
+POSTER_WIDTH = 640
+SCORE_SIZE = (160, 90)  # grayscale frames used only for sharpness scoring
+TILE_SIZE = (160, 90)
+SPRITE_COLUMNS = 10
+MAX_SPRITE_TILES = 100
+LRU_MAX_ITEM_BYTES = 256 * 1024
+
+
+class _BytesLRU:
+    """Byte-bounded LRU for small, frequently requested images."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int]) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: Tuple[str, int], data: bytes) -> None:
+        if len(data) > LRU_MAX_ITEM_BYTES or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_poster_cache = _BytesLRU(settings.thumbnail_cache_bytes)
+_locks_guard = threading.Lock()
+_locks: Dict[str, threading.Lock] = {}
+
+
+def _clip_lock(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def thumbnail_dir(clip_path: Path) -> Path:
+    return artifact_dir(clip_path, "thumbnails") / clip_path.stem
+
+
+register_derived(lambda clip: [thumbnail_dir(clip)])
+
+
+def laplacian_variance(frames: np.ndarray) -> np.ndarray:
+    """Sharpness score per frame for a (N, H, W) grayscale stack, computed in one pass."""
+    f = frames.astype(np.float32)
+    lap = (
+        f[:, :-2, 1:-1] + f[:, 2:, 1:-1] + f[:, 1:-1, :-2] + f[:, 1:-1, 2:]
+        - 4.0 * f[:, 1:-1, 1:-1]
+    )
+    return lap.reshape(lap.shape[0], -1).var(axis=1)
+
+
+def generate_previews(clip_path: Path) -> Dict[str, object]:
+    """Create poster.jpg (sharpest candidate) and a scrubbing sprite sheet in one ffmpeg pass."""
+    if not clip_path.exists():
+        raise HTTPException(status_code=404, detail="Clip not found")
+    out_dir = thumbnail_dir(clip_path)
+    # One generation per clip at a time; a waiting request then finds fresh previews
+    with _clip_lock(str(out_dir.resolve())):
+        return _generate_previews(clip_path, out_dir)
+
+
+def _generate_previews(clip_path: Path, out_dir: Path) -> Dict[str, object]:
+    poster = out_dir / "poster.jpg"
+    sprite = out_dir / "sprite.jpg"
+    meta_path = out_dir / "sprite.json"
+    if is_fresh(poster, clip_path) and is_fresh(sprite, clip_path) and meta_path.exists():
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    ensure_ffmpeg_available()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    duration = probe_duration(clip_path) or 1.0
+    candidates = max(1, settings.thumbnail_candidates)
+    interval = max(settings.sprite_interval, duration / MAX_SPRITE_TILES)
+    tiles = max(1, min(MAX_SPRITE_TILES, math.ceil(duration / interval)))
+    rows = math.ceil(tiles / SPRITE_COLUMNS)
+    cand_rate = f"{candidates}/{duration:.3f}"
+    sw, sh = SCORE_SIZE
+    tw, th = TILE_SIZE
+    graph = ";".join([
+        "[0:v]split=3[c][g][s]",
+        f"[c]fps={cand_rate},scale={POSTER_WIDTH}:-2[cand]",
+        f"[g]fps={cand_rate},scale={sw}:{sh},format=gray[gray]",
+        f"[s]fps=1/{interval:.3f},scale={tw}:{th}:force_original_aspect_ratio=decrease,"
+        f"pad={tw}:{th}:(ow-iw)/2:(oh-ih)/2,tile={SPRITE_COLUMNS}x{rows}[sprite]",
+    ])
+    # Each run writes into its own directory (other worker processes may be generating
+    # the same clip), and only the finished files are moved into place
+    run_dir = Path(tempfile.mkdtemp(prefix=".run-", dir=out_dir))
+    try:
+        cmd = [
+            "ffmpeg", "-y", "-v", "error", "-i", str(clip_path), "-filter_complex", graph,
+            "-map", "[cand]", "-q:v", "3", str(run_dir / "cand_%03d.jpg"),
+            "-map", "[sprite]", "-frames:v", "1", "-q:v", "5", str(run_dir / "sprite.jpg"),
+            "-map", "[gray]", "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1",
+        ]
+        result = subprocess.run(cmd, capture_output=True)
+        cand_files = sorted(run_dir.glob("cand_*.jpg"))
+        if result.returncode != 0 or not cand_files:
+            stderr = result.stderr.decode("utf-8", errors="ignore")
+            raise HTTPException(status_code=500, detail=f"FFmpeg preview generation failed: {stderr[-300:]}")
+        frame_bytes = sw * sh
+        count = min(len(cand_files), len(result.stdout) // frame_bytes)
+        best = 0
+        if count > 1:
+            frames = np.frombuffer(result.stdout[:count * frame_bytes], dtype=np.uint8).reshape(count, sh, sw)
+            best = int(np.argmax(laplacian_variance(frames)))
+
+        meta = {
+            "interval": interval,
+            "columns": SPRITE_COLUMNS,
+            "rows": rows,
+            "tiles": tiles,
+            "tile_width": tw,
+            "tile_height": th,
+        }
+        with open(run_dir / "sprite.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(cand_files[best], poster)
+        os.replace(run_dir / "sprite.jpg", sprite)
+        os.replace(run_dir / "sprite.json", meta_path)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    record_cache(out_dir)
+    return meta
+
+
+def get_poster_bytes(clip_path: Path) -> bytes:
+    """Poster JPEG for a clip, served from the in-process LRU when hot."""
+    try:
+        key = (str(clip_path.resolve()), clip_path.stat().st_mtime_ns)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Clip not found")
+    data = _poster_cache.get(key)
+    if data is not None:
+        return data
+    generate_previews(clip_path)
+    with open(thumbnail_dir(clip_path) / "poster.jpg", "rb") as f:
+        data = f.read()
+    _poster_cache.put(key, data)
+    return data
+
+
+def get_sprite_path(clip_path: Path) -> Path:
+    generate_previews(clip_path)
+    return thumbnail_dir(clip_path) / "sprite.jpg"
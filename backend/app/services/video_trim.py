@@ -1,10 +1,8 @@
 import os
-import shutil
 import subprocess
-from datetime import datetime
 from typing import List, Tuple
 
-from fastapi import UploadFile, HTTPException
+from fastapi import HTTPException
 
 
 def ensure_ffmpeg_available() -> None:
@@ -14,26 +12,6 @@ def ensure_ffmpeg_available() -> None:
         raise HTTPException(status_code=500, detail="FFmpeg is not available on the server PATH")
 
 
-def save_video_to_dated_folder(file: UploadFile) -> Tuple[str, str]:
-    now = datetime.now()
-    base_dir = os.path.join("storage", now.strftime("%Y"), now.strftime("%m"), now.strftime("%d"))
-    original_dir = os.path.join(base_dir, "original")
-    os.makedirs(original_dir, exist_ok=True)
-
-    safe_name = file.filename or f"upload_{now.strftime('%H%M%S')}.mp4"
-    dest_path = os.path.join(original_dir, safe_name)
-
-    # If exists, add timestamp suffix
-    if os.path.exists(dest_path):
-        name, ext = os.path.splitext(safe_name)
-        dest_path = os.path.join(original_dir, f"{name}_{now.strftime('%H%M%S')}{ext}")
-
-    with open(dest_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-
-    return dest_path, base_dir
-
-
 def trim_clips(source_path: str, clips: List[Tuple[float, float]], base_dir: str) -> List[str]:
     ensure_ffmpeg_available()
     clips_dir = os.path.join(base_dir, "clips")
@@ -0,0 +1,219 @@
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from backend.app.services.background import BackgroundQueue
+from backend.app.services.catalog import record_cache
+from backend.app.services.storage import artifact_dir, is_fresh, register_derived
+from backend.app.services.video_trim import ensure_ffmpeg_available
+
+
+SAMPLE_RATE = 16000
+BASE_SAMPLES_PER_PEAK = 64  # 4 ms per peak at the finest level
+MIN_PEAKS_PER_LEVEL = 256
+MAX_LEVELS = 16
+READ_PEAKS = 4096  # level-0 peaks reduced per read from ffmpeg (512 KiB of PCM)
+
+_queue = BackgroundQueue("waveform", 1)
+_locks_guard = threading.Lock()
+_locks: Dict[str, threading.Lock] = {}
+
+
+def _media_lock(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def waveform_dir(media_path: Path) -> Path:
+    return artifact_dir(media_path, "waveforms") / media_path.stem
+
+
+register_derived(lambda media: [waveform_dir(media)])
+
+
+def _decode_base_peaks(media_path: Path) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Level-0 (min, max) peaks and the sample count, reduced block by block while ffmpeg
+    decodes, so memory stays proportional to the peaks rather than the PCM."""
+    ensure_ffmpeg_available()
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", str(media_path), "-vn",
+        "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+    ]
+    block = READ_PEAKS * BASE_SAMPLES_PER_PEAK * 2
+    mins: List[np.ndarray] = []
+    maxs: List[np.ndarray] = []
+    carry = b""
+    total = 0
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            while True:
+                chunk = proc.stdout.read(block)
+                if not chunk:
+                    break
+                data = carry + chunk
+                # Whole peaks only; the remainder waits for the next read
+                usable = len(data) - len(data) % (BASE_SAMPLES_PER_PEAK * 2)
+                carry = data[usable:]
+                if usable:
+                    samples = np.frombuffer(data[:usable], dtype="<i2").reshape(-1, BASE_SAMPLES_PER_PEAK)
+                    mins.append(samples.min(axis=1))
+                    maxs.append(samples.max(axis=1))
+                    total += usable // 2
+        finally:
+            proc.stdout.close()
+            proc.wait()
+        if proc.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode("utf-8", errors="ignore")
+            raise HTTPException(status_code=500, detail=f"FFmpeg audio decode failed: {message[-300:]}")
+    if len(carry) >= 2:
+        tail = np.frombuffer(carry[:len(carry) - len(carry) % 2], dtype="<i2")
+        mins.append(tail.min(keepdims=True))
+        maxs.append(tail.max(keepdims=True))
+        total += tail.size
+    if not mins:
+        return np.zeros(0, dtype=np.int16), np.zeros(0, dtype=np.int16), 0
+    return np.concatenate(mins), np.concatenate(maxs), total
+
+
+def _reduce(mins: np.ndarray, maxs: np.ndarray, factor: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Collapse consecutive groups of `factor` peaks in one vectorized pass."""
+    pad = (-len(mins)) % factor
+    if pad:
+        mins = np.concatenate([mins, np.full(pad, mins[-1], dtype=mins.dtype)])
+        maxs = np.concatenate([maxs, np.full(pad, maxs[-1], dtype=maxs.dtype)])
+    return mins.reshape(-1, factor).min(axis=1), maxs.reshape(-1, factor).max(axis=1)
+
+
+def build_peak_pyramid(samples: np.ndarray) -> List[np.ndarray]:
+    """Min/max pyramid: level 0 covers BASE_SAMPLES_PER_PEAK samples per peak, each level doubles.
+
+    Each level is returned as an interleaved int16 array [min0, max0, min1, max1, ...].
+    """
+    if samples.size == 0:
+        return [np.zeros(2, dtype=np.int16)]
+    mins, maxs = _reduce(samples, samples, BASE_SAMPLES_PER_PEAK)
+    return _pyramid_from_peaks(mins, maxs)
+
+
+def _pyramid_from_peaks(mins: np.ndarray, maxs: np.ndarray) -> List[np.ndarray]:
+    if mins.size == 0:
+        return [np.zeros(2, dtype=np.int16)]
+    levels = [np.column_stack([mins, maxs]).ravel()]
+    while len(mins) > MIN_PEAKS_PER_LEVEL and len(levels) < MAX_LEVELS:
+        mins, maxs = _reduce(mins, maxs, 2)
+        levels.append(np.column_stack([mins, maxs]).ravel())
+    return levels
+
+
+def _write_atomic(out_dir: Path, name: str, write) -> None:
+    # Unique temp name: other worker processes may be writing the same waveform
+    fd, tmp = tempfile.mkstemp(prefix=f"{name}.", suffix=".part", dir=out_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, out_dir / name)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def generate_waveform(media_path: Path) -> Dict[str, Any]:
+    if not media_path.exists():
+        raise HTTPException(status_code=404, detail="Media not found")
+    out_dir = waveform_dir(media_path)
+    meta_path = out_dir / "meta.json"
+    if is_fresh(meta_path, media_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    with _media_lock(str(out_dir.resolve())):
+        if is_fresh(meta_path, media_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return _generate_waveform(media_path, out_dir)
+
+
+def _generate_waveform(media_path: Path, out_dir: Path) -> Dict[str, Any]:
+    mins, maxs, total = _decode_base_peaks(media_path)
+    levels = _pyramid_from_peaks(mins, maxs)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for idx, data in enumerate(levels):
+        _write_atomic(out_dir, f"L{idx}.i16", lambda f, data=data: f.write(data.astype("<i2").tobytes()))
+    meta = {
+        "sample_rate": SAMPLE_RATE,
+        "duration": total / SAMPLE_RATE,
+        "levels": [
+            {"level": idx, "samples_per_peak": BASE_SAMPLES_PER_PEAK << idx, "peaks": len(data) // 2}
+            for idx, data in enumerate(levels)
+        ],
+    }
+    # meta.json last: its presence marks a complete pyramid
+    _write_atomic(out_dir, "meta.json", lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    record_cache(out_dir)
+    return meta
+
+
+def schedule_waveform(media_path: Path) -> None:
+    if not is_fresh(waveform_dir(media_path) / "meta.json", media_path):
+        _queue.submit(str(media_path.resolve()), generate_waveform, media_path)
+
+
+def read_waveform_window(
+    media_path: Path,
+    level: Optional[int] = None,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    width: Optional[int] = None,
+    bits: int = 16,
+) -> Tuple[bytes, Dict[str, Any]]:
+    """Return interleaved min/max peaks for one level and time window.
+
+    When no level is given, the coarsest level that still provides `width` peaks for the
+    window is used. Only the requested slice is read from disk (memory-mapped).
+    """
+    if bits not in (8, 16):
+        raise HTTPException(status_code=400, detail="bits must be 8 or 16")
+    meta = generate_waveform(media_path)
+    levels = meta["levels"]
+    duration = float(meta["duration"])
+    start = max(0.0, start)
+    end = duration if end is None else min(end, duration)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if level is None:
+        level = 0
+        if width:
+            for info in levels:
+                if (end - start) * SAMPLE_RATE / info["samples_per_peak"] >= width:
+                    level = info["level"]
+    if not 0 <= level < len(levels):
+        raise HTTPException(status_code=400, detail=f"level must be between 0 and {len(levels) - 1}")
+    info = levels[level]
+    spp = info["samples_per_peak"]
+    first = min(int(start * SAMPLE_RATE) // spp, info["peaks"])
+    last = min(-(-int(end * SAMPLE_RATE) // spp), info["peaks"])
+    peaks = np.memmap(waveform_dir(media_path) / f"L{level}.i16", dtype="<i2", mode="r")
+    window = np.array(peaks[first * 2:last * 2])
+    if bits == 8:
+        payload = (window >> 8).astype(np.int8).tobytes()
+    else:
+        payload = window.tobytes()
+    return payload, {
+        "level": level,
+        "samples_per_peak": spp,
+        "sample_rate": SAMPLE_RATE,
+        "start": first * spp / SAMPLE_RATE,
+        "peaks": last - first,
+        "bits": bits,
+    }
@@ -4,6 +4,7 @@ Industry-standard FastAPI application with YouTube automation
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import requests
@@ -18,8 +19,16 @@ def safe_get_text(resp: requests.Response) -> str:
 from backend.routers import videos, captions, youtube, utils, video_management, linkedin
 from backend.app.routers import transcript as app_transcript, story as app_story, video as app_video
 from fastapi import Request
-from backend.app.services.llm import generate_chat_response
+from backend.app.services.llm import bind_event_loop as bind_llm_loop, generate_chat_response_async, stream_chat_events
+from backend.app.services.sse import event_stream
 from backend.app.services.whisper import get_whisper_model
+from backend.app.services.renditions import get_rendition
+from backend.app.services.catalog import is_reconciled as catalog_is_reconciled, reconcile as reconcile_catalog
+from backend.app.services.catalog import start_background_sync as start_catalog_sync
+from backend.app.services.retention import start_background_retention
+import asyncio
+import threading
+from pathlib import Path
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -63,12 +72,34 @@ async def _warm_whisper_model():
         # Do not block app startup; health and /transcript/health will report details
         pass
 
-# Simple chat endpoint at /chat for the frontend
-@app.post("/chat")
-async def chat(payload: dict):
+# Gemini calls from worker threads (pipeline caption drafts) run on the app's loop
+@app.on_event("startup")
+async def _bind_llm_loop():
+    bind_llm_loop(asyncio.get_running_loop())
+
+# Storage catalog: reconcile with the dated storage layout and follow filesystem changes
+@app.on_event("startup")
+async def _start_catalog_sync():
+    # A fresh (or deleted) catalog is filled before serving, otherwise listings would come
+    # back empty until the first reconcile finished. An existing catalog is only refreshed,
+    # in a thread, so a large library does not delay startup.
+    if not await run_in_threadpool(catalog_is_reconciled):
+        await run_in_threadpool(reconcile_catalog)
+        threading.Thread(target=start_catalog_sync, args=(False,), name="catalog-sync", daemon=True).start()
+    else:
+        threading.Thread(target=start_catalog_sync, name="catalog-reconcile", daemon=True).start()
+
+# Storage retention: periodic, throttled archive/transcode/eviction (opt-in via RETENTION_ENABLED)
+@app.on_event("startup")
+async def _start_retention():
+    start_background_retention()
+
+def _scoped_chat(payload: dict):
+    """(message, scope hint, canned reply) for a chat payload; the canned reply is set
+    for empty messages and service/capabilities questions, which skip the LLM."""
     message = str(payload.get("message", "")).strip()
     if not message:
-        return {"reply": "Please provide a message."}
+        return message, None, "Please provide a message."
     # In-scope canned answer for service/capabilities queries
     lower = message.lower()
     if any(k in lower for k in [
@@ -87,7 +118,7 @@ async def chat(payload: dict):
             "• In‑app assistant: Focused guidance on setup (env keys), workflows, and troubleshooting—kept strictly within this product’s scope.\n\n"
             "Ask me anything like: ‘generate captions for today’s clips’, ‘turn this transcript into a story’, ‘schedule and upload tonight’, or ‘optimize my titles’. I’ll walk you through it step‑by‑step."
         )
-        return {"reply": reply}
+        return message, None, reply
     user_hint = str(payload.get("hint", "")).strip()
     default_scope_hint = (
         "You are the assistant for a social media automation app."
@@ -99,9 +130,28 @@ async def chat(payload: dict):
         " respond with: 'This assistant is focused on YouTube automation and app features.'"
     )
     hint = (default_scope_hint + ("\n\nExtra context: " + user_hint if user_hint else ""))
-    reply = generate_chat_response(message, hint)
+    return message, hint, None
+
+# Simple chat endpoint at /chat for the frontend
+@app.post("/chat")
+async def chat(payload: dict):
+    message, hint, canned = _scoped_chat(payload)
+    if canned is not None:
+        return {"reply": canned}
+    reply = await generate_chat_response_async(message, hint, regenerate=bool(payload.get("regenerate")))
     return {"reply": reply}
 
+# Streaming variant: Server-Sent Events with "delta" text events, then "done" with the full reply
+@app.post("/chat/stream")
+async def chat_stream(payload: dict):
+    message, hint, canned = _scoped_chat(payload)
+    if canned is not None:
+        async def canned_events():
+            yield "delta", {"text": canned}
+            yield "done", {"text": canned}
+        return event_stream(canned_events())
+    return event_stream(stream_chat_events(message, hint, regenerate=bool(payload.get("regenerate"))))
+
 # Root endpoint - API info
 @app.get("/")
 async def root():
@@ -168,6 +218,8 @@ async def post_to_linkedin(request: Request):
             if not os.path.exists(candidate):
                 raise HTTPException(status_code=404, detail="File not found")
             file_path = candidate
+            if body.get("rendition"):
+                file_path = str(await run_in_threadpool(get_rendition, Path(file_path), body.get("rendition")))
         
         # If no media, create a text-only post (try ugcPosts; fallback to posts API)
         if not file_path:
@@ -335,6 +387,8 @@ async def post_to_facebook(request: Request):
         if not os.path.exists(candidate):
             raise HTTPException(status_code=404, detail="File not found")
         file_path = candidate
+        if body.get("rendition"):
+            file_path = str(await run_in_threadpool(get_rendition, Path(file_path), body.get("rendition")))
         
         # Determine if it's a video or image
         is_video = file_path.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))
@@ -4,7 +4,7 @@ Database models and operations for Video Caption Generator
 
 import os
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from pathlib import Path
 from datetime import datetime
 
@@ -88,6 +88,11 @@ class Database:
         db = self._load_db()
         return video_id in db["captions"]
     
+    def caption_ids(self) -> Set[str]:
+        """Load the database once and return the ids of all videos with captions"""
+        db = self._load_db()
+        return set(db["captions"])
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
         db = self._load_db()
@@ -3,6 +3,7 @@ Utility routes
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from backend.services.video_service import VideoService
 from backend.models.database import Database
@@ -15,15 +16,26 @@ video_service = VideoService(db)
 
 class CleanupRequest(BaseModel):
     directory: str = "."
+    dry_run: bool = False
+    incremental: bool = False
 
 @router.post("/cleanup")
 async def cleanup_orphaned(request: CleanupRequest):
-    """Clean up orphaned caption files"""
+    """Clean up orphaned caption files.
+    
+    With dry_run the orphans (and their sizes) are only reported; with incremental
+    only directories changed since the last applied cleanup are checked.
+    """
     try:
-        removed_count = video_service.cleanup_orphaned_captions(request.directory)
+        report = await run_in_threadpool(
+            video_service.reconcile_orphaned_captions,
+            request.directory,
+            request.dry_run,
+            request.incremental
+        )
         return {
             "success": True,
-            "removed_count": removed_count
+            **report
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
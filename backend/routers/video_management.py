@@ -1,20 +1,37 @@
 """
 Video management router for frontend integration
 """
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from typing import Dict, List, Any
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form, Query
+from fastapi.responses import FileResponse, Response, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List, Any, Optional
 import os
 from pathlib import Path
 from datetime import datetime
 import json
+import hashlib
+import base64
 import shutil
+import threading
 import urllib.request
 import urllib.error
 import urllib.parse
 
 # Gemini caption/title generation
-from backend.app.services.llm import generate_caption_and_title
+from backend.app.services.llm import generate_caption_and_title_async
+from backend.app.services.renditions import PLATFORM_PRESETS, render_renditions, get_rendition
+from backend.app.services.thumbnails import generate_previews, get_poster_bytes, get_sprite_path
+from backend.app.services.proxies import schedule_proxy, proxy_status, preview_source
+from backend.app.services.waveform import generate_waveform, read_waveform_window, schedule_waveform
+from backend.app.services.storage import VIDEO_EXTS, link_derived_artifacts, storage_relative
+from backend.app.services import bulk_ops, catalog, pipeline, retention
+from backend.app.services.bulk_ops import delete_asset
+from backend.app.services.media_delivery import media_response
+from backend.app.services.hls import hls_asset
+from backend.app.services import resumable_uploads
+from backend.app.services.streaming_upload import stream_upload_to_disk
+from backend.app.config import settings
+from backend.app.services.content_store import source_hash, clip_key, lookup_clip, store_clip, dedupe_original
 
 # YouTube upload service
 from backend.services.youtube_service import YouTubeService
@@ -25,37 +42,186 @@ router = APIRouter(prefix="/video", tags=["video-management"])
 # Storage directory for clips
 STORAGE_DIR = Path("storage")
 
+# Encode profile of /trim output (stream copy with libx264 fallback); part of the clip content key
+TRIM_PROFILE = "copy|libx264-veryfast-aac"
+
 # YouTube service singleton-ish
 _yt_service = YouTubeService(Database())
 
+def _storage_file(path: str) -> Path:
+    """Resolve a storage-relative path, rejecting traversal and missing files"""
+    full_path = STORAGE_DIR / path
+    try:
+        full_path.resolve().relative_to(STORAGE_DIR.resolve())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid path")
+    if not full_path.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+    return full_path
+
+def _dedupe_upload(file_path: Path, sha256: str) -> Optional[str]:
+    """Hard-link a re-uploaded original to the stored copy (and its derived artifacts).
+    Returns the existing asset's storage path for duplicates"""
+    existing = dedupe_original(file_path, sha256)
+    if existing is None:
+        return None
+    link_derived_artifacts(existing, file_path)
+    return storage_relative(existing)
+
+def _after_upload(file_path: Path, sha256: Optional[str] = None) -> None:
+    """Post-upload handling for a newly stored original"""
+    catalog.record_file(file_path)
+    if file_path.suffix.lower() in VIDEO_EXTS:
+        schedule_proxy(file_path)
+        schedule_waveform(file_path)
+        pipeline.schedule(file_path, sha256)
+
+def _new_original_path(filename: str) -> Path:
+    """storage/<today>/original/<name>_<HHMMSS>.<ext> for an incoming upload"""
+    today = datetime.now().strftime("%Y/%m/%d")
+    upload_dir = STORAGE_DIR / today / "original"
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%H%M%S")
+    return upload_dir / f"{filename.split('.')[0]}_{timestamp}.{filename.split('.')[-1]}"
+
 @router.post("/upload")
-async def upload_video(file: UploadFile = File(...)):
-    """Upload a video file"""
+async def upload_video(request: Request):
+    """Upload a video file (multipart field "file").
+    The body is parsed as it streams in and written straight to today's original
+    folder, off the event loop."""
     try:
-        # Create today's directory
-        today = datetime.now().strftime("%Y/%m/%d")
-        upload_dir = STORAGE_DIR / today / "original"
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%H%M%S")
-        filename = f"{file.filename.split('.')[0]}_{timestamp}.{file.filename.split('.')[-1]}"
-        file_path = upload_dir / filename
-        
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        result = await stream_upload_to_disk(request, _new_original_path)
+        file_path = result["path"]
+        duplicate_of = await run_in_threadpool(_dedupe_upload, file_path, result["sha256"])
+        _after_upload(file_path, result["sha256"])
         
         rel = str(file_path.relative_to(STORAGE_DIR)).replace('\\', '/')
         return {
             "success": True,
             "path": rel,
             "source_path": rel,  # frontend expects source_path
-            "message": "Video uploaded successfully"
+            "message": "Video uploaded successfully",
+            "sha256": result["sha256"],
+            "duplicate_of": duplicate_of,
+            "bytes": result["bytes"],
+            "seconds": result["seconds"],
+            "throughput_mb_s": result["throughput_mb_s"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
+TUS_HEADERS = {"Tus-Resumable": "1.0.0", "Cache-Control": "no-store"}
+
+def _tus_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Decode a tus Upload-Metadata header ("key base64value,key2 base64value2")"""
+    metadata: Dict[str, str] = {}
+    for item in (header or "").split(","):
+        key, _, value = item.strip().partition(" ")
+        if key:
+            try:
+                metadata[key] = base64.b64decode(value).decode("utf-8") if value else ""
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid Upload-Metadata")
+    return metadata
+
+def _upload_headers(session: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        **TUS_HEADERS,
+        "Upload-Offset": str(resumable_uploads.contiguous_offset(session)),
+        "Upload-Length": str(session["length"]),
+        "Upload-Ranges": resumable_uploads.format_ranges(session),
+    }
+
+@router.options("/uploads")
+async def upload_capabilities():
+    """tus discovery: protocol version and supported extensions"""
+    return Response(status_code=204, headers={
+        **TUS_HEADERS,
+        "Tus-Version": "1.0.0",
+        "Tus-Extension": "creation,checksum,termination",
+        "Tus-Checksum-Algorithm": ",".join(resumable_uploads.CHECKSUM_ALGORITHMS),
+        "Tus-Max-Size": str(settings.upload_max_bytes),
+    })
+
+@router.post("/uploads")
+async def create_resumable_upload(request: Request):
+    """Create a resumable upload (tus creation). Send Upload-Length and
+    Upload-Metadata ("filename <base64>") headers, or a JSON body {"filename", "length"}."""
+    metadata = _tus_metadata(request.headers.get("upload-metadata"))
+    length = request.headers.get("upload-length")
+    filename = metadata.get("filename")
+    if length is None:
+        try:
+            body = await request.json()
+        except Exception:
+            body = {}
+        length = body.get("length")
+        filename = filename or body.get("filename")
+    try:
+        length = int(length)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Upload-Length is required")
+    session = await run_in_threadpool(resumable_uploads.create_upload, filename or "", length, metadata)
+    location = f"{request.url.path.rstrip('/')}/{session['id']}"
+    return JSONResponse(
+        status_code=201,
+        content={"upload_id": session["id"], "location": location},
+        headers={**_upload_headers(session), "Location": location},
+    )
+
+@router.head("/uploads/{upload_id}")
+async def resumable_upload_status(upload_id: str):
+    """Received byte ranges of an upload (Upload-Offset is the gap-free prefix)"""
+    session = await run_in_threadpool(resumable_uploads.get_upload, upload_id)
+    return Response(status_code=200, headers=_upload_headers(session))
+
+@router.patch("/uploads/{upload_id}")
+async def resumable_upload_chunk(upload_id: str, request: Request):
+    """Write one chunk at Upload-Offset. Chunks may be sent out of order and in
+    parallel; an optional Upload-Checksum ("sha256 <base64>") is verified per chunk."""
+    try:
+        offset = int(request.headers.get("upload-offset", ""))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Upload-Offset is required")
+    checksum = resumable_uploads.parse_checksum(request.headers.get("upload-checksum"))
+    session = await resumable_uploads.write_chunk(upload_id, offset, request.stream(), checksum)
+    return Response(status_code=204, headers=_upload_headers(session))
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_resumable_upload(upload_id: str, request: Request):
+    """Move a complete upload into today's original folder and run post-upload
+    handling. Optional body {"sha256": "<hex>"} verifies the whole file."""
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    session = await run_in_threadpool(resumable_uploads.get_upload, upload_id)
+    file_path, sha256 = await run_in_threadpool(
+        resumable_uploads.finalize_upload,
+        upload_id,
+        _new_original_path(session["filename"]),
+        (body or {}).get("sha256"),
+    )
+    duplicate_of = await run_in_threadpool(_dedupe_upload, file_path, sha256)
+    _after_upload(file_path, sha256)
+    rel = str(file_path.relative_to(STORAGE_DIR)).replace('\\', '/')
+    return {
+        "success": True,
+        "path": rel,
+        "source_path": rel,
+        "message": "Video uploaded successfully",
+        "sha256": sha256,
+        "duplicate_of": duplicate_of
+    }
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_resumable_upload(upload_id: str):
+    """Abort an upload and discard the received data (tus termination)"""
+    await run_in_threadpool(resumable_uploads.cancel_upload, upload_id)
+    return Response(status_code=204, headers=TUS_HEADERS)
+
 @router.post("/trim")
 async def trim_video(request: Request):
     """Trim a video file. Supports batch clips from frontend."""
@@ -98,12 +264,19 @@ async def trim_video(request: Request):
         outputs: list[str] = []
         last_error: str | None = None
         if isinstance(clips, list) and clips:
+            # Identical (source content, range, profile) requests reuse the stored clip
+            src_hash = await run_in_threadpool(source_hash, input_full_path)
             for idx, c in enumerate(clips, start=1):
                 try:
                     s = float(c.get("start", 0))
                     e = float(c.get("end", 0))
                     if not (e > s >= 0):
                         continue
+                    key = clip_key(src_hash, s, e, TRIM_PROFILE)
+                    existing = lookup_clip(key)
+                    if existing is not None:
+                        outputs.append(str(existing.relative_to(STORAGE_DIR)).replace('\\', '/'))
+                        continue
                     output_filename = f"trim_{s:.2f}-{e:.2f}_{datetime.now().strftime('%H%M%S')}_{idx}.mp4"
                     output_path = clips_dir / output_filename
                     # Fast cut using ffmpeg; fall back to re-encode if stream copy fails
@@ -143,6 +316,8 @@ async def trim_video(request: Request):
                         # If ffmpeg not available, skip this clip to avoid saving full original by mistake
                         last_error = "ffmpeg execution failed"
                         continue
+                    store_clip(key, output_path, src_hash, s, e)
+                    catalog.record_file(output_path)
                     outputs.append(str(output_path.relative_to(STORAGE_DIR)).replace('\\', '/'))
                 except Exception:
                     continue
@@ -166,6 +341,79 @@ async def trim_video(request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error trimming video: {str(e)}")
 
+@router.get("/renditions/presets")
+async def rendition_presets():
+    """List the platform presets available for renditions"""
+    return {
+        name: {"width": p.width, "height": p.height, "max_bitrate": p.max_bitrate, "max_duration": p.max_duration}
+        for name, p in PLATFORM_PRESETS.items()
+    }
+
+@router.post("/renditions")
+async def create_renditions(request: Request):
+    """Render platform variants of a clip in one ffmpeg pass.
+    Body: { path, presets?: [youtube_shorts, tiktok, linkedin, facebook, youtube] }
+    """
+    try:
+        body = await request.json()
+        path = body.get("path")
+        if not path:
+            raise HTTPException(status_code=400, detail="Path is required")
+        full_path = _storage_file(path)
+        presets = body.get("presets") or list(PLATFORM_PRESETS)
+        outputs = await run_in_threadpool(render_renditions, full_path, list(presets))
+        return {
+            "success": True,
+            "renditions": {
+                name: str(p.relative_to(STORAGE_DIR)).replace('\\', '/') for name, p in outputs.items()
+            },
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating renditions: {str(e)}")
+
+@router.get("/thumbnail/{path:path}")
+async def serve_thumbnail(path: str):
+    """Serve the poster frame for a clip (generated on first request, then cached)"""
+    data = await run_in_threadpool(get_poster_bytes, _storage_file(path))
+    return Response(content=data, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=86400"})
+
+@router.get("/sprite/{path:path}")
+async def serve_sprite(path: str):
+    """Serve the scrubbing sprite sheet for a clip"""
+    sprite = await run_in_threadpool(get_sprite_path, _storage_file(path))
+    return FileResponse(sprite, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=86400"})
+
+@router.get("/previews/{path:path}")
+async def preview_info(path: str):
+    """Sprite sheet geometry and preview URLs for a clip"""
+    meta = await run_in_threadpool(generate_previews, _storage_file(path))
+    return {
+        "poster_url": f"/video/thumbnail/{path}",
+        "sprite_url": f"/video/sprite/{path}",
+        **meta,
+    }
+
+@router.get("/pipeline/{path:path}")
+async def pipeline_status(path: str):
+    """Progress of the post-upload precomputation (probe, audio, transcript, caption draft)"""
+    return await run_in_threadpool(pipeline.status, _storage_file(path))
+
+@router.post("/pipeline/{path:path}")
+async def pipeline_start(path: str):
+    """(Re)queue precomputation for a stored video; finished steps are not redone"""
+    job = await run_in_threadpool(pipeline.schedule, _storage_file(path))
+    if job is None:
+        raise HTTPException(status_code=409, detail="Pipeline is disabled for this file")
+    return job
+
+@router.delete("/pipeline/{path:path}")
+async def pipeline_cancel(path: str):
+    """Cancel queued or running precomputation for a video"""
+    cancelled = await run_in_threadpool(pipeline.cancel, _storage_file(path))
+    return {"success": True, "cancelled": cancelled}
+
 @router.post("/youtube/client-secrets")
 async def youtube_upload_client_secrets(file: UploadFile = File(...)):
     """Accept a single client_secret JSON file, persist it, and report status."""
@@ -204,31 +452,59 @@ async def youtube_begin_auth():
 async def get_clips_by_date():
     """Get video clips organized by date - only trimmed clips, not original videos"""
     try:
-        if not STORAGE_DIR.exists():
-            return {}
-        
-        clips_by_date: Dict[str, List[str]] = {}
-        
-        # Scan storage directory for video files, but only in clips folders
-        for file_path in STORAGE_DIR.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in ['.mp4', '.avi', '.mov', '.mkv']:
-                # Only include files that are in clips folders (trimmed videos)
-                # Skip original videos in the original folders
-                path_str = str(file_path.relative_to(STORAGE_DIR)).replace('\\', '/')
-                if '/clips/' in path_str and not '/original/' in path_str:
-                    # Get file creation date
-                    stat = file_path.stat()
-                    creation_time = datetime.fromtimestamp(stat.st_ctime)
-                    date_str = creation_time.strftime("%Y/%m/%d")
-                    
-                    if date_str not in clips_by_date:
-                        clips_by_date[date_str] = []
-                    clips_by_date[date_str].append(path_str)
-        
-        return clips_by_date
+        # Indexed catalog query (kept in sync by upload/trim/delete and the storage watcher)
+        return await run_in_threadpool(catalog.clips_by_created_date)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error scanning clips: {str(e)}")
 
+def _normalize_date(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    normalized = value.strip().replace("-", "/")
+    parts = normalized.split("/")
+    if len(parts) != 3 or not all(p.isdigit() for p in parts):
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
+    return normalized
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match", "")
+    candidates = {c.strip().removeprefix("W/") for c in header.split(",") if c.strip()}
+    return "*" in candidates or etag in candidates
+
+@router.get("/clips")
+async def list_clips(
+    request: Request,
+    kind: str = Query(default="clip", description="original, clip, rendition or proxy"),
+    date_from: Optional[str] = Query(default=None, description="YYYY/MM/DD or YYYY-MM-DD (inclusive)"),
+    date_to: Optional[str] = Query(default=None, description="YYYY/MM/DD or YYYY-MM-DD (inclusive)"),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    order: str = Query(default="desc", pattern="^(asc|desc)$"),
+):
+    """Cursor-paginated catalog listing; returns 304 while the catalog version is unchanged"""
+    start, end = _normalize_date(date_from), _normalize_date(date_to)
+    query_key = hashlib.sha1(request.url.query.encode("utf-8")).hexdigest()[:12]
+    version = await run_in_threadpool(catalog.current_version)
+    etag = f'"{version}-{query_key}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        page = await run_in_threadpool(catalog.list_assets, kind, start, end, cursor, limit, order == "desc")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    etag = f'"{page["version"]}-{query_key}"'
+    return JSONResponse(page, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@router.get("/clips/changes")
+async def clip_changes(since: int = Query(default=0, ge=0), limit: int = Query(default=1000, ge=1, le=5000)):
+    """Catalog changes after version `since`; 304 when nothing changed"""
+    version = await run_in_threadpool(catalog.current_version)
+    etag = f'"{version}"'
+    if since >= version:
+        return Response(status_code=304, headers={"ETag": etag})
+    delta = await run_in_threadpool(catalog.changes_since, since, limit)
+    return JSONResponse(delta, headers={"ETag": f'"{delta["version"]}"', "Cache-Control": "no-cache"})
+
 @router.post("/delete")
 async def delete_clip(request: Request):
     """Delete a video clip"""
@@ -251,8 +527,8 @@ async def delete_clip(request: Request):
         if not full_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
         
-        # Delete the file
-        full_path.unlink()
+        # Delete the file and anything derived from it (proxies, thumbnails, renditions)
+        delete_asset(full_path)
         
         return {"success": True, "message": "File deleted"}
     except Exception as e:
@@ -274,24 +550,14 @@ async def delete_by_date(request: Request):
         if len(parts) != 3 or not all(p.isdigit() for p in parts):
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
 
-        # Scan all clips and delete those whose ctime date matches
-        from datetime import datetime
+        # The catalog already groups clips by creation date, so no tree walk is needed
         deleted = 0
-        for file_path in STORAGE_DIR.rglob("*"):
+        for rel in await run_in_threadpool(catalog.clips_created_on, normalized):
             try:
-                if (
-                    file_path.is_file()
-                    and file_path.suffix.lower() in [".mp4", ".mov", ".mkv", ".webm", ".avi"]
-                ):
-                    path_str = str(file_path).replace("\\", "/")
-                    if "/clips/" not in path_str or "/original/" in path_str:
-                        continue
-                    stat = file_path.stat()
-                    creation_time = datetime.fromtimestamp(stat.st_ctime)
-                    date_key = creation_time.strftime("%Y/%m/%d")
-                    if date_key == normalized:
-                        file_path.unlink()
-                        deleted += 1
+                file_path = STORAGE_DIR / rel
+                if file_path.suffix.lower() in VIDEO_EXTS and file_path.is_file():
+                    await run_in_threadpool(delete_asset, file_path)
+                    deleted += 1
             except Exception:
                 continue
 
@@ -301,6 +567,74 @@ async def delete_by_date(request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting by date: {str(e)}")
 
+@router.post("/bulk")
+async def start_bulk_operation(request: Request):
+    """Start a background delete/move/archive job over many files.
+    Body: {"op": "delete"|"move"|"archive", "paths": [...], "date_from": "YYYY/MM/DD",
+    "date_to": "YYYY/MM/DD", "kinds": ["clips", ...], "dest_date": "YYYY/MM/DD" (move only)}.
+    Date ranges are resolved directly from the dated storage layout."""
+    try:
+        body = await request.json()
+        paths = body.get("paths") or []
+        kinds = body.get("kinds") or None
+        if not isinstance(paths, list) or (kinds is not None and not isinstance(kinds, list)):
+            raise HTTPException(status_code=400, detail="paths and kinds must be lists")
+        return await run_in_threadpool(
+            bulk_ops.start_job,
+            str(body.get("op", "")).strip(),
+            [str(p) for p in paths],
+            body.get("date_from"),
+            body.get("date_to"),
+            kinds,
+            body.get("dest_date"),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting bulk operation: {str(e)}")
+
+@router.get("/bulk")
+async def list_bulk_operations():
+    """List recent bulk jobs with their progress counters."""
+    return {"jobs": bulk_ops.list_jobs()}
+
+@router.get("/bulk/{job_id}")
+async def bulk_operation_status(job_id: str):
+    """Progress and (once finished) the final report of a bulk job."""
+    return bulk_ops.get_job(job_id)
+
+@router.get("/usage")
+async def storage_usage(date_from: Optional[str] = None, date_to: Optional[str] = None):
+    """Bytes and file counts per date and artifact class (original, clip, rendition,
+    proxy, cache), served from running totals kept by the storage catalog."""
+    return await run_in_threadpool(
+        catalog.usage_summary, _normalize_date(date_from), _normalize_date(date_to)
+    )
+
+@router.get("/retention")
+async def retention_report():
+    """Retention policy, current storage usage and the report of the last applied run."""
+    return await run_in_threadpool(retention.retention_status)
+
+@router.post("/retention/run")
+async def run_retention(request: Request):
+    """Run the retention policies now. Body: {"dry_run": true} (default) returns the
+    report of what would happen; with dry_run false the run happens in the background."""
+    try:
+        try:
+            body = await request.json()
+        except Exception:
+            body = {}
+        dry_run = bool((body or {}).get("dry_run", True))
+        if dry_run:
+            return await run_in_threadpool(retention.run_retention, True)
+        threading.Thread(target=retention.run_retention, name="retention-manual", daemon=True).start()
+        return {"started": True}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running retention: {str(e)}")
+
 @router.get("/facebook/pages")
 async def facebook_pages(access_token: str):
     """Proxy to quickly resolve Facebook pages for a user access token.
@@ -337,6 +671,7 @@ async def facebook_post(request: Request):
         title = str(body.get("title", "")).strip()
         description = str(body.get("description", "")).strip()
         media_path = str(body.get("media_path", "")).strip()
+        rendition = str(body.get("rendition", "")).strip() or None
         if not (access_token and page_id):
             raise HTTPException(status_code=400, detail="access_token and page_id are required")
 
@@ -348,6 +683,9 @@ async def facebook_post(request: Request):
         media_url = None
         if media_path:
             cleaned = media_path.replace("\\", "/").replace("storage/", "")
+            if rendition:
+                rendered = await run_in_threadpool(get_rendition, STORAGE_DIR / cleaned, rendition)
+                cleaned = str(rendered.relative_to(STORAGE_DIR)).replace('\\', '/')
             media_url = f"{base}/video/media/{cleaned}"
 
         def http_post(url: str, params: Dict[str, str]) -> Dict[str, Any]:
@@ -408,12 +746,16 @@ async def generate_caption_legacy(request: Request):
             raise HTTPException(status_code=400, detail="Path is required")
         # Legacy: direct Gemini without transcript (kept for backward compatibility)
         filename = os.path.basename(path)
-        data = generate_caption_and_title(filename=filename, transcript=None, seed=seed)
+        data = await generate_caption_and_title_async(
+            filename=filename, transcript=None, seed=seed, regenerate=bool(body.get("regenerate"))
+        )
         return {
             "title": data.get("title", ""),
             "caption": data.get("caption", ""),
             "hashtags": data.get("hashtags", "")
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating caption: {str(e)}")
 
@@ -427,6 +769,7 @@ async def publish_to_youtube(request: Request):
         description = body.get("description", "")
         hashtags = body.get("hashtags", "")
         privacy = body.get("privacy", "private")
+        rendition = body.get("rendition")
         
         if not path:
             raise HTTPException(status_code=400, detail="Path is required")
@@ -437,6 +780,10 @@ async def publish_to_youtube(request: Request):
         if not full_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
         
+        # Publish a cached platform rendition (e.g. youtube_shorts) when requested
+        if rendition:
+            full_path = await run_in_threadpool(get_rendition, full_path, rendition)
+        
         # Prepare minimal video_info
         video_info = {
             "title": os.path.splitext(os.path.basename(str(full_path)))[0],
@@ -461,9 +808,60 @@ async def publish_to_youtube(request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error publishing to YouTube: {str(e)}")
 
-@router.get("/media/{path:path}")
-async def serve_media(path: str):
-    """Serve media files"""
+@router.api_route("/preview/{path:path}", methods=["GET", "HEAD"])
+async def serve_preview(path: str, request: Request):
+    """Serve the low-resolution proxy for previews, falling back to the original"""
+    full_path = _storage_file(path)
+    source = preview_source(full_path)
+    if source != full_path:
+        return await run_in_threadpool(
+            media_response, request, source, "video/mp4", {"X-Preview-Source": "proxy"}, False
+        )
+    if full_path.suffix.lower() in VIDEO_EXTS:
+        schedule_proxy(full_path)
+    return await run_in_threadpool(media_response, request, full_path, None, {"X-Preview-Source": "original"})
+
+@router.api_route("/hls/{path:path}", methods=["GET", "HEAD"])
+async def serve_hls(path: str, request: Request):
+    """HLS playlist and segments for a stored video: /video/hls/<media path>/index.m3u8.
+    Packaged lazily by stream copy on first request and kept in an LRU cache."""
+    media, _, name = path.rpartition("/")
+    if not media:
+        raise HTTPException(status_code=404, detail="Unknown HLS asset")
+    asset, media_type = await run_in_threadpool(hls_asset, _storage_file(media), name)
+    return await run_in_threadpool(media_response, request, asset, media_type, None, False)
+
+@router.get("/proxy-status/{path:path}")
+async def get_proxy_status(path: str):
+    """Report whether the preview proxy for an original is ready"""
+    return proxy_status(_storage_file(path))
+
+@router.get("/waveform-info/{path:path}")
+async def waveform_info(path: str):
+    """Duration and available zoom levels of the waveform peak pyramid"""
+    return await run_in_threadpool(generate_waveform, _storage_file(path))
+
+@router.get("/waveform/{path:path}")
+async def waveform_peaks(
+    path: str,
+    level: Optional[int] = Query(default=None, ge=0),
+    start: float = Query(default=0.0, ge=0),
+    end: Optional[float] = Query(default=None, ge=0),
+    width: Optional[int] = Query(default=None, ge=1, description="Desired number of peaks when level is omitted"),
+    bits: int = Query(default=16),
+):
+    """Binary interleaved min/max peaks (int8 or int16, little endian) for one zoom level and time window"""
+    payload, info = await run_in_threadpool(
+        read_waveform_window, _storage_file(path), level, start, end, width, bits
+    )
+    headers = {f"X-Waveform-{k.replace('_', '-').title()}": str(v) for k, v in info.items()}
+    headers["Cache-Control"] = "public, max-age=3600"
+    return Response(content=payload, media_type="application/octet-stream", headers=headers)
+
+@router.api_route("/media/{path:path}", methods=["GET", "HEAD"])
+async def serve_media(path: str, request: Request):
+    """Serve media files with byte ranges (including multi-range), conditional
+    requests and caching headers (immutable for content-addressed clips)"""
     try:
         # Construct full path
         full_path = STORAGE_DIR / path
@@ -474,9 +872,11 @@ async def serve_media(path: str):
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid path")
         
-        if not full_path.exists():
+        if not full_path.is_file():
             raise HTTPException(status_code=404, detail="File not found")
         
-        return FileResponse(full_path)
+        return await run_in_threadpool(media_response, request, full_path)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error serving file: {str(e)}")
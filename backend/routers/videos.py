@@ -3,6 +3,7 @@ Video management router
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Dict, Any
 from backend.services.video_service import VideoService
 from backend.models.database import Database
@@ -17,7 +18,7 @@ video_service = VideoService(db)
 async def get_videos(directory: str = Query(default=".", description="Directory to scan for videos")):
     """Get all videos and their caption status"""
     try:
-        videos = video_service.scan_videos(directory)
+        videos = await run_in_threadpool(video_service.scan_videos, directory)
         return {
             "success": True,
             "videos": [video.to_dict() for video in videos],
@@ -30,7 +31,7 @@ async def get_videos(directory: str = Query(default=".", description="Directory
 async def get_video_status(directory: str = Query(default=".", description="Directory to scan for videos")):
     """Get detailed status of all videos"""
     try:
-        status = video_service.get_video_status(directory)
+        status = await run_in_threadpool(video_service.get_video_status, directory)
         return {
             "success": True,
             "status": status
@@ -91,7 +91,8 @@ class CaptionService:
             )
         }
     
-    def _create_video_id(self, video_info: VideoInfo) -> str:
+    @staticmethod
+    def _create_video_id(video_info: VideoInfo) -> str:
         """Create unique ID for video"""
         return f"{video_info.title}_{video_info.topic}".replace(" ", "_").lower()
     
@@ -0,0 +1,163 @@
+"""
+Directory scanning service
+"""
+
+import fnmatch
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from backend.utils.config import Config
+
+
+class DirectoryListing(NamedTuple):
+    """Files directly inside one directory, mapped name -> size in bytes.
+
+    `generation` is the scanner generation at which the listing last changed.
+    """
+    path: Path
+    files: Dict[str, int]
+    generation: int = 0
+
+
+class _Snapshot(NamedTuple):
+    mtime_ns: int
+    files: Dict[str, int]
+    subdirs: Tuple[str, ...]
+    generation: int
+
+
+class FileScanner:
+    """os.scandir based walker with ignore rules, pinned roots and per-directory memoization.
+
+    Each directory's listing is cached against its mtime, so on a re-scan an unchanged
+    directory costs a single stat() instead of a scandir() plus one stat() per entry.
+    Top-level subtrees are walked in parallel.
+    """
+
+    def __init__(
+        self,
+        ignore_dirs: Optional[Iterable[str]] = None,
+        pinned_roots: Optional[Iterable[str]] = None,
+        workers: Optional[int] = None,
+    ):
+        self.ignore_dirs = set(Config.SCAN_IGNORE_DIRS if ignore_dirs is None else ignore_dirs)
+        self.pinned_roots = list(Config.SCAN_ROOTS if pinned_roots is None else pinned_roots)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers or Config.SCAN_WORKERS), thread_name_prefix="scan"
+        )
+        self._lock = threading.Lock()
+        self._memo: Dict[str, _Snapshot] = {}
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped whenever any directory listing is (re)read from disk"""
+        with self._lock:
+            return self._generation
+
+    def _is_ignored(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.ignore_dirs)
+
+    def _snapshot(self, directory: str) -> Optional[_Snapshot]:
+        """Listing of one directory, reused while its mtime is unchanged"""
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        key = os.path.abspath(directory)
+        with self._lock:
+            cached = self._memo.get(key)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached
+
+        files: Dict[str, int] = {}
+        subdirs: List[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._is_ignored(entry.name):
+                                subdirs.append(entry.name)
+                        elif entry.is_file():
+                            files[entry.name] = entry.stat().st_size
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+
+        with self._lock:
+            self._generation += 1
+            snapshot = _Snapshot(mtime_ns, files, tuple(sorted(subdirs)), self._generation)
+            self._memo[key] = snapshot
+        return snapshot
+
+    def _walk(self, top: str) -> List[DirectoryListing]:
+        listings = []
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            snapshot = self._snapshot(directory)
+            if snapshot is None:
+                continue
+            if snapshot.files:
+                listings.append(DirectoryListing(Path(directory), snapshot.files, snapshot.generation))
+            stack.extend(os.path.join(directory, name) for name in reversed(snapshot.subdirs))
+        return listings
+
+    def _roots(self, directory: str) -> List[str]:
+        """Pinned roots replace a scan of the working directory when configured"""
+        if self.pinned_roots and Path(directory).resolve() == Path.cwd().resolve():
+            return [os.path.join(directory, root) for root in self.pinned_roots]
+        return [directory]
+
+    def scan(self, directory: str = ".") -> List[DirectoryListing]:
+        """Return every non-empty directory below `directory`, sorted by path"""
+        listings: List[DirectoryListing] = []
+        subtrees: List[str] = []
+        for root in self._roots(directory):
+            snapshot = self._snapshot(root)
+            if snapshot is None:
+                continue
+            if snapshot.files:
+                listings.append(DirectoryListing(Path(root), snapshot.files, snapshot.generation))
+            subtrees.extend(os.path.join(root, name) for name in snapshot.subdirs)
+
+        for result in self._executor.map(self._walk, subtrees):
+            listings.extend(result)
+        listings.sort(key=lambda listing: str(listing.path))
+        return listings
+
+    def iter_files(self, directory: str, suffixes: Iterable[str]) -> Iterator[Tuple[Path, int, DirectoryListing]]:
+        """Yield (path, size, listing) for each file whose lower-cased suffix is in `suffixes`"""
+        wanted = {s.lower() for s in suffixes}
+        for listing in self.scan(directory):
+            for name, size in listing.files.items():
+                if os.path.splitext(name)[1].lower() in wanted:
+                    yield listing.path / name, size, listing
+
+    def invalidate(self, directory: Optional[str] = None) -> None:
+        """Forget cached listings (all of them, or one directory and everything below it)"""
+        with self._lock:
+            if directory is None:
+                self._memo.clear()
+                return
+            prefix = os.path.abspath(directory)
+            for key in [k for k in self._memo if k == prefix or k.startswith(prefix + os.sep)]:
+                del self._memo[key]
+
+
+_shared_scanner: Optional[FileScanner] = None
+_shared_lock = threading.Lock()
+
+
+def get_scanner() -> FileScanner:
+    """Process-wide scanner so the memo survives across service instances"""
+    global _shared_scanner
+    with _shared_lock:
+        if _shared_scanner is None:
+            _shared_scanner = FileScanner()
+        return _shared_scanner
@@ -4,20 +4,25 @@ Video management service
 
 import os
 import re
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from pathlib import Path
 
 from backend.models.database import Database
 from backend.models.video_info import VideoInfo
+from backend.services.file_scanner import FileScanner, get_scanner
 from backend.utils.config import Config
 
 class VideoService:
     """Service for managing video files"""
     
-    def __init__(self, database: Database):
+    # Scanner generation of the last applied orphan cleanup, per absolute directory
+    _reconcile_marks: Dict[str, int] = {}
+    
+    def __init__(self, database: Database, scanner: Optional[FileScanner] = None):
         self.db = database
         self.supported_formats = Config.SUPPORTED_VIDEO_FORMATS
         self.caption_extensions = Config.CAPTION_EXTENSIONS
+        self.scanner = scanner or get_scanner()
     
     def scan_videos(self, directory: str = ".") -> List[VideoInfo]:
         """Scan directory for video files and extract metadata"""
@@ -27,15 +32,14 @@ class VideoService:
         if not video_directory.exists():
             return videos
         
-        for file_path in video_directory.rglob("*"):
-            if file_path.suffix.lower() in self.supported_formats:
-                video_info = self._extract_video_info(file_path)
-                if video_info:
-                    videos.append(video_info)
+        for file_path, size, listing in self.scanner.iter_files(directory, self.supported_formats):
+            video_info = self._extract_video_info(file_path, listing.files)
+            if video_info:
+                videos.append(video_info)
         
         return videos
     
-    def _extract_video_info(self, file_path: Path) -> Optional[VideoInfo]:
+    def _extract_video_info(self, file_path: Path, siblings: Optional[Dict[str, int]] = None) -> Optional[VideoInfo]:
         """Extract video information from file"""
         try:
             # Get basic file info
@@ -46,10 +50,13 @@ class VideoService:
             topic = self._extract_topic_from_filename(title)
             
             # Check if video already has caption files
-            has_caption, caption_file_path = self._check_caption_file(file_path)
+            has_caption, caption_file_path = self._check_caption_file(file_path, siblings)
             
-            # Get file size
-            file_size = file_path.stat().st_size if file_path.exists() else None
+            # Get file size (already known when the scanner listed the directory)
+            if siblings is not None and file_path.name in siblings:
+                file_size = siblings[file_path.name]
+            else:
+                file_size = file_path.stat().st_size if file_path.exists() else None
             
             return VideoInfo(
                 title=title,
@@ -97,25 +104,32 @@ class VideoService:
         # Default topic
         return clean_name.lower() or "general content"
     
-    def _check_caption_file(self, video_path: Path) -> tuple[bool, Optional[str]]:
+    def _check_caption_file(self, video_path: Path, siblings: Optional[Dict[str, int]] = None) -> Tuple[bool, Optional[str]]:
         """Check if video already has caption files"""
         base_name = video_path.stem
         
         for ext in self.caption_extensions:
             caption_file = video_path.parent / f"{base_name}{ext}"
-            if caption_file.exists():
+            if (f"{base_name}{ext}" in siblings) if siblings is not None else caption_file.exists():
                 return True, str(caption_file)
         
         return False, None
     
     def get_video_status(self, directory: str = ".") -> Dict[str, Dict]:
-        """Get detailed status of all videos"""
+        """Get detailed status of all videos in one pass.
+        
+        Caption records are loaded once into a set of ids instead of re-reading the
+        JSON database for every video.
+        """
+        from backend.services.caption_service import CaptionService
+        
         videos = self.scan_videos(directory)
+        caption_ids = self.db.caption_ids()
         status = {}
         
         for video in videos:
             has_file_caption = video.has_caption
-            has_db_caption = self._check_db_caption(video)
+            has_db_caption = CaptionService._create_video_id(video) in caption_ids
             
             status[video.title] = {
                 "file_path": video.file_path,
@@ -132,35 +146,80 @@ class VideoService:
     def _check_db_caption(self, video: VideoInfo) -> bool:
         """Check if video has caption in database"""
         from backend.services.caption_service import CaptionService
-        caption_service = CaptionService(self.db)
-        video_id = caption_service._create_video_id(video)
-        return self.db.has_caption(video_id)
+        return self.db.has_caption(CaptionService._create_video_id(video))
+    
+    def find_orphaned_captions(self, directory: str = ".", incremental: bool = False) -> Dict[str, Any]:
+        """Report caption files without a matching video, listing each directory once.
+        
+        Video and caption stems of a directory are compared as sets. With `incremental`,
+        only directories whose listing changed since the last applied cleanup of
+        `directory` are checked.
+        """
+        key = os.path.abspath(directory)
+        since = self._reconcile_marks.get(key, 0) if incremental else 0
+        listings = self.scanner.scan(directory)
+        generation = self.scanner.generation
+        video_formats = {ext.lower() for ext in self.supported_formats}
+        caption_formats = {ext.lower() for ext in self.caption_extensions}
+        
+        orphans = []
+        checked = 0
+        for listing in listings:
+            if listing.generation <= since:
+                continue
+            checked += 1
+            video_stems = set()
+            captions: Dict[str, List[Tuple[str, int]]] = {}
+            for name, size in listing.files.items():
+                stem, ext = os.path.splitext(name)
+                if ext.lower() in video_formats:
+                    video_stems.add(stem)
+                elif ext.lower() in caption_formats:
+                    captions.setdefault(stem, []).append((name, size))
+            for stem in captions.keys() - video_stems:
+                for name, size in captions[stem]:
+                    orphans.append({"path": str(listing.path / name), "size": size})
+        
+        orphans.sort(key=lambda orphan: orphan["path"])
+        return {
+            "directory": directory,
+            "incremental": incremental and since > 0,
+            "directories_scanned": len(listings),
+            "directories_checked": checked,
+            "orphans": orphans,
+            "orphan_count": len(orphans),
+            "total_bytes": sum(orphan["size"] for orphan in orphans),
+            "generation": generation
+        }
+    
+    def reconcile_orphaned_captions(self, directory: str = ".", dry_run: bool = True,
+                                    incremental: bool = False) -> Dict[str, Any]:
+        """Find orphaned caption files and, unless `dry_run`, delete them"""
+        report = self.find_orphaned_captions(directory, incremental)
+        removed = []
+        errors = []
+        if not dry_run:
+            for orphan in report["orphans"]:
+                try:
+                    Path(orphan["path"]).unlink()
+                    removed.append(orphan["path"])
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    errors.append({"path": orphan["path"], "error": str(e)})
+            self._reconcile_marks[os.path.abspath(directory)] = report["generation"]
+        
+        report.update({
+            "dry_run": dry_run,
+            "removed": removed,
+            "removed_count": len(removed),
+            "errors": errors
+        })
+        return report
     
     def cleanup_orphaned_captions(self, directory: str = ".") -> int:
         """Remove caption files that don't have corresponding videos"""
-        video_directory = Path(directory)
-        removed_count = 0
-        
-        for file_path in video_directory.rglob("*"):
-            if file_path.suffix.lower() in self.caption_extensions:
-                # Check if corresponding video exists
-                base_name = file_path.stem
-                video_exists = False
-                
-                for ext in self.supported_formats:
-                    video_file = file_path.parent / f"{base_name}{ext}"
-                    if video_file.exists():
-                        video_exists = True
-                        break
-                
-                if not video_exists:
-                    try:
-                        file_path.unlink()
-                        removed_count += 1
-                    except Exception as e:
-                        print(f"Error removing {file_path}: {e}")
-        
-        return removed_count
+        return self.reconcile_orphaned_captions(directory, dry_run=False)["removed_count"]
     
     def get_video_stats(self, directory: str = ".") -> Dict[str, int]:
         """Get statistics about videos in directory"""
@@ -0,0 +1,51 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from backend.app.services import catalog, content_store, llm_cache
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run each test in an empty directory; storage/ and data/ are relative to the cwd."""
+    monkeypatch.chdir(tmp_path)
+    for module in (catalog, content_store, llm_cache):
+        monkeypatch.setattr(module, "_conn", None)
+    (tmp_path / "storage").mkdir()
+    yield tmp_path
+    for module in (catalog, content_store, llm_cache):
+        if module._conn is not None:
+            module._conn.close()
+
+
+def store(rel: str, data: bytes = b"x") -> Path:
+    """Write a file at storage/<rel> and return its path."""
+    path = Path("storage") / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+@pytest.fixture
+def make_video():
+    """Encode a short synthetic clip with ffmpeg (skips the test when ffmpeg is missing)."""
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("ffmpeg not available")
+
+    def _make(rel: str, seconds: float = 1.0, size: str = "160x90") -> Path:
+        path = Path("storage") / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc=size={size}:rate=25:duration={seconds}",
+                "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+                "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest",
+                str(path),
+            ],
+            capture_output=True, check=True,
+        )
+        return path
+
+    return _make
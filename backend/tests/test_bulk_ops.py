@@ -0,0 +1,101 @@
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services import bulk_ops, catalog
+from backend.app.services.bulk_ops import archive_asset, delete_asset, move_asset, resolve_targets
+from backend.app.services.thumbnails import thumbnail_dir
+from backend.tests.conftest import store
+
+
+def _rel(paths):
+    return [p.relative_to(Path("storage").resolve()).as_posix() for p in paths]
+
+
+def test_targets_from_paths_and_date_ranges():
+    store("2025/01/01/clips/a.mp4")
+    store("2025/01/02/clips/b.mp4")
+    store("2025/01/02/clips/b.mp4.part")
+    store("2025/01/02/original/o.mp4")
+    store("2025/01/04/clips/d.mp4")
+    assert _rel(resolve_targets(date_from="2025-01-01", date_to="2025/01/03")) == [
+        "2025/01/01/clips/a.mp4", "2025/01/02/clips/b.mp4",
+    ]
+    assert _rel(resolve_targets(["/media/2025/01/04/clips/d.mp4", "2025/01/01/clips/gone.mp4"],
+                                date_from="2025/01/02", kinds=["original"])) == [
+        "2025/01/02/original/o.mp4", "2025/01/04/clips/d.mp4",
+    ]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"paths": ["2025/01/02/thumbnails/a/poster.jpg"]},
+    {"paths": [".cas/index.sqlite3"]},
+    {"paths": [".uploads/abc/data"]},
+    {"paths": ["../outside.mp4"]},
+    {"date_from": "2025/01/05", "date_to": "2025/01/01"},
+    {"date_from": "yesterday"},
+    {"date_from": "2025/01/01", "kinds": ["thumbnails"]},
+])
+def test_bad_targets_are_rejected(kwargs):
+    store("2025/01/02/thumbnails/a/poster.jpg")
+    store(".cas/index.sqlite3")
+    store(".uploads/abc/data")
+    with pytest.raises(HTTPException) as e:
+        resolve_targets(**kwargs)
+    assert e.value.status_code == 400
+
+
+def test_move_keeps_the_kind_folder_and_drops_stale_previews():
+    clip = store("2025/01/02/clips/a.mp4")
+    thumbnail_dir(clip).mkdir(parents=True)
+    store("2025/01/03/clips/a.mp4", b"other")
+    catalog.reconcile()
+    dest = move_asset(clip, "2025/01/03")
+    assert dest.parent.as_posix() == "storage/2025/01/03/clips" and dest.name.startswith("a_")
+    assert dest.read_bytes() == b"x" and not clip.exists()
+    assert not thumbnail_dir(clip).exists()
+    assert dest.as_posix() in catalog.clips_by_folder_date((".mp4",))["2025-01-03"]
+    assert move_asset(dest, "2025/01/03") == dest
+
+
+def test_a_failed_move_keeps_derived_artifacts(monkeypatch):
+    clip = store("2025/01/02/clips/a.mp4")
+    thumbnail_dir(clip).mkdir(parents=True)
+
+    def _fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(shutil, "move", _fail)
+    with pytest.raises(OSError):
+        move_asset(clip, "2025/01/03")
+    assert clip.exists() and thumbnail_dir(clip).exists()
+
+
+def test_archive_and_delete(monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk_ops.settings, "archive_dir", str(tmp_path / "archive"))
+    original = store("2025/01/02/original/o.mp4")
+    clip = store("2025/01/02/clips/c.mp4")
+    thumbnail_dir(clip).mkdir(parents=True)
+    catalog.reconcile()
+    assert archive_asset(original) == tmp_path / "archive" / "2025/01/02/original/o.mp4"
+    delete_asset(clip)
+    assert not clip.exists() and not thumbnail_dir(clip).exists()
+    assert catalog.list_assets(kind="clip")["items"] == [] and catalog.list_assets(kind="original")["items"] == []
+
+
+def test_jobs_report_per_file_results():
+    for name in "abc":
+        store(f"2025/01/02/clips/{name}.mp4")
+    job = bulk_ops.start_job("move", date_from="2025/01/02", dest_date="2025-02-01")
+    assert job["total"] == 3
+    deadline = time.monotonic() + 10
+    while bulk_ops.get_job(job["job_id"])["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.02)
+    result = bulk_ops.get_job(job["job_id"])
+    assert result["status"] == "completed" and result["succeeded"] == 3
+    assert sorted(r["moved_to"] for r in result["results"]) == [f"2025/02/01/clips/{n}.mp4" for n in "abc"]
+    with pytest.raises(HTTPException):
+        bulk_ops.start_job("move", paths=["2025/02/01/clips/a.mp4"])
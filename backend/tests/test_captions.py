@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services import captions
+from backend.app.services.captions import _pack, _transcript_key, caption_events
+from backend.tests.conftest import store
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(captions.settings, "caption_pack_max_chars", 100)
+    monkeypatch.setattr(captions.settings, "caption_pack_budget_chars", 250)
+    monkeypatch.setattr(captions.settings, "caption_pack_max_items", 3)
+
+
+def test_pack_groups_short_transcripts_first_fit(limits):
+    sizes = {"long": 150, "a": 100, "b": 90, "c": 60, "d": 50, "e": 40, "f": 95}
+    texts = {key: "x" * size for key, size in sizes.items()}
+    packed, singles = _pack(list(texts), texts)
+    assert packed == [["a", "f", "d"], ["b", "c", "e"]]
+    assert singles == ["long"]
+    assert _pack(["a", "long"], texts) == ([], ["long", "a"])
+
+
+def test_transcript_keys_ignore_case_and_spacing():
+    assert _transcript_key("Hello  World\n") == _transcript_key("hello world")
+    assert _transcript_key("hello world") != _transcript_key("hello, world")
+
+
+@pytest.fixture
+def backend(monkeypatch, limits):
+    """Stored transcripts/drafts and a model that records what it was asked."""
+    transcripts = {}
+    drafts = {}
+    calls = {"single": [], "packed": [], "transcribed": []}
+
+    monkeypatch.setattr(captions.pipeline, "cached_caption", lambda media: drafts.get(media.name))
+    monkeypatch.setattr(captions.pipeline, "cached_transcript",
+                        lambda media: {"transcript": transcripts[media.name]} if media.name in transcripts else None)
+
+    def transcribe(media):
+        calls["transcribed"].append(media.name)
+        if media.name.startswith("broken"):
+            raise HTTPException(status_code=500, detail="Transcription failed: no audio")
+        return f"spoken words of {media.name[0]}"
+
+    async def single(filename, transcript, seed=None, regenerate=False):
+        calls["single"].append(transcript)
+        if "fail" in transcript:
+            raise RuntimeError("model down")
+        return {"title": f"T {transcript}", "caption": "c", "hashtags": "#h"}
+
+    async def packed(transcripts_by_id, seed=None, regenerate=False):
+        calls["packed"].append(sorted(transcripts_by_id.values()))
+        # Leave the last clip out to exercise the per-clip retry
+        ids = sorted(transcripts_by_id)[:-1]
+        return {i: {"title": f"P {transcripts_by_id[i]}", "caption": "c", "hashtags": "#h"} for i in ids}
+
+    monkeypatch.setattr(captions, "_transcribe_and_store", transcribe)
+    monkeypatch.setattr(captions, "generate_caption_and_title_async", single)
+    monkeypatch.setattr(captions, "generate_captions_packed_async", packed)
+    return transcripts, drafts, calls
+
+
+def _run(paths, **kwargs):
+    async def collect():
+        return [event async for event in caption_events(paths, **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_batch_captions_answer_drafts_first_and_share_duplicate_work(backend):
+    transcripts, drafts, calls = backend
+    for name in ("draft.mp4", "a.mp4", "a2.mp4", "b.mp4", "c.mp4", "long.mp4", "fail.mp4", "new.mp4", "new2.mp4"):
+        store(f"2025/01/02/clips/{name}")
+    drafts["draft.mp4"] = {"title": "Drafted", "caption": "d", "hashtags": "#d"}
+    transcripts.update({"draft.mp4": "draft words", "a.mp4": "same words", "a2.mp4": "Same  words",
+                        "b.mp4": "other words", "c.mp4": "third words", "long.mp4": "l" * 150, "fail.mp4": "fail me"})
+    paths = ["2025/01/02/clips/" + n for n in ("draft.mp4", "missing.mp4", "a.mp4", "a2.mp4", "b.mp4", "c.mp4",
+                                                 "long.mp4", "fail.mp4", "new.mp4", "new2.mp4")]
+    events = _run(paths)
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["caption"] * 10 + ["done"]
+    first, second = events[0][1], events[1][1]
+    assert first["source"] == "draft" and first["title"] == "Drafted" and first["transcript"] == "draft words"
+    assert second == {"path": paths[1], "ok": False, "status": 404, "error": "Video not found"}
+
+    by_path = {data["path"]: data for kind, data in events if kind == "caption"}
+    assert by_path[paths[2]]["title"] == by_path[paths[3]]["title"]
+    assert by_path[paths[7]]["source"] == "fallback" and by_path[paths[7]]["llm_error"] == "model down"
+    assert by_path[paths[8]]["title"] == by_path[paths[9]]["title"] == "T spoken words of n"
+    assert {by_path[p]["source"] for p in paths[2:7]} <= {"llm", "llm_packed"}
+
+    stats = events[-1][1]
+    assert stats["drafts"] == 1 and stats["failed"] == 1 and stats["deduped"] == 2
+    assert stats["transcribed"] == 2 and stats["fallbacks"] == 1
+    assert stats["packed_requests"] == 1 and stats["packed_retries"] == 1
+    # At most three short transcripts per packed request; the one it left out is retried alone
+    assert calls["packed"] == [["other words", "same words", "third words"]]
+    assert sorted(calls["single"]) == sorted(["same words", "fail me", "l" * 150, "spoken words of n"])
+
+
+def test_regenerate_skips_drafts_and_transcription_errors_are_reported(backend):
+    transcripts, drafts, calls = backend
+    store("2025/01/02/clips/draft.mp4")
+    store("2025/01/02/clips/broken.mp4")
+    drafts["draft.mp4"] = {"title": "Drafted", "caption": "d", "hashtags": "#d"}
+    transcripts["draft.mp4"] = "draft words"
+    events = _run(["2025/01/02/clips/draft.mp4", "2025/01/02/clips/broken.mp4"], regenerate=True)
+    results = {data["path"].rsplit("/", 1)[1]: data for kind, data in events if kind == "caption"}
+    assert results["draft.mp4"]["source"] == "llm" and results["draft.mp4"]["title"] == "T draft words"
+    assert results["broken.mp4"]["status"] == 500 and not results["broken.mp4"]["ok"]
+    assert events[-1][1]["drafts"] == 0 and events[-1][1]["failed"] == 1
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import threading
+from datetime import datetime
+
+from backend.app.services import catalog
+from backend.app.services.catalog import classify, clips_by_created_date, reconcile, record_file, remove_file
+from backend.tests.conftest import store
+
+
+def _today() -> str:
+    return datetime.now().strftime("%Y/%m/%d")
+
+
+def test_classify_only_accepts_the_dated_asset_layout():
+    assert classify("storage/2025/01/02/clips/a.mp4") == ("2025/01/02/clips/a.mp4", "clip", "2025/01/02")
+    assert classify("storage/2025/01/02/original/a.mov")[1] == "original"
+    for path in (
+        "storage/2025/01/02/clips/a.mp4.part",
+        "storage/2025/01/02/thumbnails/a/poster.jpg",
+        "storage/.cas/objects/ab/x.mp4",
+        "storage/misc/a.mp4",
+        "elsewhere/2025/01/02/clips/a.mp4",
+    ):
+        assert classify(path) is None, path
+
+
+def test_reconcile_follows_the_storage_tree():
+    store("2025/01/02/clips/a.mp4")
+    store("2025/01/02/clips/b.txt")
+    store("2025/01/03/original/o.mp4")
+    assert not catalog.is_reconciled()
+    assert reconcile() == {"total": 3, "updated": 3, "removed": 0}
+    assert catalog.is_reconciled()
+    assert clips_by_created_date() == {_today(): ["2025/01/02/clips/a.mp4"]}
+
+    os.remove("storage/2025/01/02/clips/a.mp4")
+    assert reconcile() == {"total": 2, "updated": 0, "removed": 1}
+    assert clips_by_created_date() == {}
+
+
+def test_incremental_updates_bump_the_version():
+    reconcile()
+    before = catalog.current_version()
+    clip = store("2025/01/02/clips/a.mp4")
+    assert record_file(clip)
+    assert catalog.clips_created_on(_today()) == ["2025/01/02/clips/a.mp4"]
+    record_file(clip)  # unchanged: no new version
+    assert catalog.current_version() == before + 1
+    clip.unlink()
+    remove_file(clip)
+    assert catalog.current_version() == before + 2
+    assert catalog.clips_by_folder_date((".mp4",)) == {}
+
+
+def test_a_fresh_catalog_is_filled_before_serving(monkeypatch):
+    import backend.main as main
+
+    store("2025/01/02/clips/a.mp4")
+    started = threading.Event()
+    calls = []
+    monkeypatch.setattr(main, "start_catalog_sync", lambda *args: (calls.append(args), started.set()))
+    asyncio.run(main._start_catalog_sync())
+    assert clips_by_created_date() == {_today(): ["2025/01/02/clips/a.mp4"]}
+    assert started.wait(5) and calls == [(False,)]
+
+
+def _pages(**kwargs):
+    seen, cursor = [], None
+    while True:
+        page = catalog.list_assets(cursor=cursor, limit=2, **kwargs)
+        seen += [item["path"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+def test_cursor_round_trips_and_is_opaque():
+    cursor = catalog._encode_cursor("2025/01/02", "2025/01/02/clips/ä b.mp4")
+    assert "=" not in cursor and "/" not in cursor
+    assert catalog._decode_cursor(cursor) == ("2025/01/02", "2025/01/02/clips/ä b.mp4")
+
+
+def test_keyset_pages_cover_every_asset_once_in_order():
+    paths = [f"2025/01/0{d}/clips/{n}.mp4" for d in (1, 2, 3) for n in "abc"]
+    for rel in paths:
+        store(rel)
+    store("2025/01/02/original/o.mp4")
+    reconcile()
+    assert _pages(descending=False) == sorted(paths)
+    assert _pages() == sorted(paths, key=lambda p: (p[:10], p), reverse=True)
+    assert _pages(date_from="2025/01/02", date_to="2025/01/02", descending=False) == paths[3:6]
+    assert _pages(kind="original") == ["2025/01/02/original/o.mp4"]
+
+
+def test_cursor_stays_valid_across_inserts_and_deletes():
+    for rel in ("2025/01/01/clips/a.mp4", "2025/01/01/clips/b.mp4", "2025/01/02/clips/c.mp4"):
+        store(rel)
+    reconcile()
+    first = catalog.list_assets(limit=2, descending=False)
+    assert [i["path"] for i in first["items"]] == ["2025/01/01/clips/a.mp4", "2025/01/01/clips/b.mp4"]
+    record_file(store("2025/01/01/clips/0.mp4"))  # sorts before the cursor: not repeated
+    os.remove("storage/2025/01/01/clips/b.mp4")
+    remove_file("storage/2025/01/01/clips/b.mp4")
+    rest = catalog.list_assets(cursor=first["next_cursor"], limit=2, descending=False)
+    assert [i["path"] for i in rest["items"]] == ["2025/01/02/clips/c.mp4"] and rest["next_cursor"] is None
+
+
+def test_changes_since_collapses_to_the_latest_op_per_path():
+    reconcile()
+    start = catalog.current_version()
+    clip = store("2025/01/02/clips/a.mp4")
+    record_file(clip)
+    clip.write_bytes(b"longer")
+    os.utime(clip, (1, 1))
+    record_file(clip)
+    record_file(store("2025/01/02/clips/b.mp4"))
+    os.remove("storage/2025/01/02/clips/b.mp4")
+    remove_file("storage/2025/01/02/clips/b.mp4")
+    feed = catalog.changes_since(start)
+    assert [(c["path"], c["op"]) for c in feed["changes"]] == [
+        ("2025/01/02/clips/a.mp4", "upsert"), ("2025/01/02/clips/b.mp4", "delete"),
+    ]
+    assert feed["changes"][0]["asset"]["size"] == 6
+    assert feed["version"] == catalog.current_version() and not feed["reset"]
+    assert catalog.changes_since(catalog.current_version())["changes"] == []
+
+
+def test_usage_bills_hard_links_once_and_matches_reconcile():
+    original = store("2025/01/02/original/a.mp4", b"o" * 4096)
+    clip = original.parent.parent / "clips" / "a.mp4"
+    clip.parent.mkdir()
+    os.link(original, clip)
+    poster = store("2025/01/03/thumbnails/a/poster.jpg", b"t" * 4096)
+    os.link(poster, poster.with_name("copy.jpg"))
+    for path in (original, clip, poster):
+        record_file(path)
+    incremental = catalog.usage_summary()
+    assert incremental["bytes"] == 8192 and catalog.usage_bytes() == 8192
+    assert catalog.usage_summary(date_from="2025/01/03")["bytes"] == 4096
+
+    catalog._conn = None
+    os.remove("data/catalog.sqlite3")
+    reconcile()
+    assert catalog.usage_summary() == incremental
+
+    os.remove(original)
+    remove_file(original)
+    assert catalog.usage_bytes() == 8192
+    os.remove(clip)
+    remove_file(clip)
+    assert catalog.usage_bytes() == 4096
+
+
+def test_upload_sessions_are_undated_and_sparse_files_count_allocated_bytes():
+    session = store(".uploads/abc/data", b"")
+    with open(session, "r+b") as f:
+        f.truncate(1 << 30)
+    store("2025/01/02/clips/a.mp4", b"c" * 10)
+    reconcile()
+    summary = catalog.usage_summary()
+    assert summary["dates"]["undated"]["kinds"]["upload"]["bytes"] < 1 << 20
+    assert "undated" not in catalog.usage_summary(date_from="2025/01/01")["dates"]
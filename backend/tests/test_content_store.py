@@ -0,0 +1,88 @@
+import hashlib
+import os
+
+from backend.app.services import content_store
+from backend.app.services.content_store import (
+    clip_key, clip_origin, content_key, dedupe_original, file_sha256, find_original, forget_path, lookup_clip,
+    move_ref, release_clip, source_hash, store_clip,
+)
+from backend.tests.conftest import store
+
+
+def test_clip_key_covers_source_range_and_profile():
+    key = clip_key("abc", 1.0, 2.5, "copy")
+    assert key == clip_key("abc", 1.0004, 2.5, "copy")
+    assert key != clip_key("abc", 1.0, 2.5, "x264")
+    assert key != clip_key("abd", 1.0, 2.5, "copy")
+
+
+def test_source_hash_is_cached_until_the_file_changes(monkeypatch):
+    src = store("2025/01/02/original/o.mp4", b"one")
+    calls = []
+    real = content_store.file_sha256
+    monkeypatch.setattr(content_store, "file_sha256", lambda p: calls.append(p) or real(p))
+    first = source_hash(src)
+    assert source_hash(src) == first and len(calls) == 1
+    src.write_bytes(b"two!")
+    assert source_hash(src) != first and len(calls) == 2
+
+
+def test_stored_clips_are_hard_links_to_one_object():
+    key = clip_key("src", 0, 1, "copy")
+    a = store_clip(key, store("2025/01/02/clips/a.mp4", b"clip"), "src", 0.0, 1.0)
+    assert lookup_clip(key) == a
+    b = store_clip(key, store("2025/01/03/clips/b.mp4", b"clip"))
+    obj = content_store._object_path(key)
+    assert os.path.samefile(a, obj) and os.path.samefile(b, obj)
+    assert content_key(a) == content_key(b) == key
+    assert clip_origin(a) is None  # the second store did not record a source range
+
+
+def test_lookup_prunes_missing_views_and_releases_the_object():
+    key = clip_key("src", 0, 1, "copy")
+    a = store_clip(key, store("2025/01/02/clips/a.mp4", b"clip"), "src", 0.0, 1.0)
+    assert clip_origin(a) == ("src", 0.0, 1.0)
+    a.unlink()
+    assert lookup_clip(key) is None
+    assert not content_store._object_path(key).exists()
+
+
+def test_objects_live_until_the_last_reference_is_released():
+    key = clip_key("src", 0, 1, "copy")
+    a = store_clip(key, store("2025/01/02/clips/a.mp4", b"clip"))
+    b = store_clip(key, store("2025/01/02/clips/b.mp4", b"clip"))
+    moved = b.with_name("moved.mp4")
+    os.replace(b, moved)
+    assert move_ref(b, moved) and content_key(moved) == key
+    assert not release_clip(a)
+    assert content_store._object_path(key).exists()
+    assert release_clip(moved)
+    assert not content_store._object_path(key).exists()
+    assert not release_clip(moved)
+
+
+def test_duplicate_uploads_become_hard_links_to_the_first_copy():
+    first = store("2025/01/02/original/a.mp4", b"same")
+    assert dedupe_original(first, file_sha256(first)) is None
+    second = store("2025/01/03/original/b.mp4", b"same")
+    assert dedupe_original(second, file_sha256(second)) == first.resolve()
+    assert os.path.samefile(first, second) and os.stat(first).st_nlink == 2
+    other = store("2025/01/03/original/c.mp4", b"different")
+    assert dedupe_original(other, file_sha256(other)) is None and os.stat(other).st_nlink == 1
+
+
+def test_rewritten_or_forgotten_files_are_not_dedup_targets():
+    sha = hashlib.sha256(b"same").hexdigest()
+    first = store("2025/01/02/original/a.mp4", b"same")
+    dedupe_original(first, sha)
+    second = store("2025/01/03/original/b.mp4", b"same")
+    dedupe_original(second, sha)
+    assert find_original(sha) == first.resolve()
+
+    # Rewritten (remuxed into place): its recorded size/mtime no longer match, so the other copy is offered
+    os.replace(store("2025/01/02/original/a.tmp", b"changed!"), first)
+    assert find_original(sha) == second.resolve()
+    assert find_original(sha, exclude=second) is None
+
+    assert forget_path(second) == sha
+    assert find_original(sha) is None and forget_path(second) is None
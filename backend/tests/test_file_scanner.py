@@ -0,0 +1,62 @@
+import os
+import time
+
+from backend.services.file_scanner import FileScanner
+from backend.tests.conftest import store
+
+
+def _scanner(**kwargs):
+    kwargs.setdefault("ignore_dirs", {".*", "node_modules"})
+    kwargs.setdefault("pinned_roots", [])
+    return FileScanner(workers=2, **kwargs)
+
+
+def _touch_dir(directory):
+    # Make the mtime change visible even on filesystems with coarse timestamps
+    later = time.time() + 5
+    os.utime(directory, (later, later))
+
+
+def test_walk_skips_ignored_dirs_and_sorts_listings():
+    store("a/one.MP4", b"12345")
+    store("a/b/two.mov")
+    store("a/node_modules/x.mp4")
+    store("c/.hidden/y.mp4")
+    store("c/notes.txt")
+    listings = _scanner().scan("storage")
+    assert [str(l.path) for l in listings] == ["storage/a", "storage/a/b", "storage/c"]
+    assert listings[0].files == {"one.MP4": 5}
+    found = sorted(str(p) for p, _, _ in _scanner().iter_files("storage", {".mp4", ".mov"}))
+    assert found == ["storage/a/b/two.mov", "storage/a/one.MP4"]
+
+
+def test_pinned_roots_replace_a_scan_of_the_working_directory():
+    store("clips/a.mp4")
+    store("elsewhere/b.mp4")
+    scanner = _scanner(pinned_roots=["storage/clips"])
+    assert [str(p) for p, _, _ in scanner.iter_files(".", {".mp4"})] == ["storage/clips/a.mp4"]
+    # Scans of any other directory are not redirected
+    assert len(list(scanner.iter_files("storage", {".mp4"}))) == 2
+
+
+def test_unchanged_directories_are_served_from_the_memo():
+    store("a/one.mp4")
+    store("b/two.mp4")
+    scanner = _scanner()
+    first = scanner.scan("storage")
+    generation = scanner.generation
+    assert scanner.scan("storage") == first and scanner.generation == generation
+
+    store("b/three.mp4")
+    _touch_dir("storage/b")
+    listings = {str(l.path): l for l in scanner.scan("storage")}
+    assert scanner.generation == generation + 1
+    assert set(listings["storage/b"].files) == {"two.mp4", "three.mp4"}
+    assert listings["storage/b"].generation > listings["storage/a"].generation
+
+    scanner.invalidate("storage/a")
+    scanner.scan("storage")
+    assert scanner.generation == generation + 2
+    scanner.invalidate()
+    scanner.scan("storage")
+    assert scanner.generation == generation + 5
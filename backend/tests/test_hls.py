@@ -0,0 +1,55 @@
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services import catalog, hls
+from backend.app.services.hls import hls_asset, hls_dir, package_hls
+from backend.tests.conftest import store
+
+
+def _package(rel: str, size: int, age: float):
+    segment = store(f"{rel}/seg_00000.m4s", b"s" * size)
+    store(f"{rel}/index.m3u8")
+    when = time.time() - age
+    os.utime(segment.parent, (when, when))
+    catalog.record_cache(segment.parent)
+    return segment.parent
+
+
+def test_touch_evicts_the_coldest_packages_over_budget(monkeypatch):
+    monkeypatch.setattr(hls.settings, "hls_cache_bytes", 10000)
+    oldest = _package("2025/01/01/hls/a", 4000, 300)
+    older = _package("2025/01/02/hls/b", 4000, 200)
+    used = _package("2025/01/03/hls/c", 4000, 400)
+    hls._touch(used)
+    assert not oldest.exists() and older.exists() and used.exists()
+    assert catalog.cache_folder_bytes("hls") <= 10000
+
+    # A package that is being rebuilt is skipped
+    with hls._package_lock(str(older.resolve())):
+        newest = _package("2025/01/04/hls/d", 4000, 0)
+        hls._touch(used)
+    assert older.exists() and not newest.exists()
+
+
+def test_unknown_assets_are_rejected():
+    clip = store("2025/01/02/clips/a.mp4")
+    for name in ("../a.mp4", "seg_1.ts", "meta.json"):
+        with pytest.raises(HTTPException) as e:
+            hls_asset(clip, name)
+        assert e.value.status_code == 404
+
+
+def test_packages_are_built_once_and_served(make_video):
+    clip = make_video("2025/01/02/clips/a.mp4", seconds=2.0)
+    out_dir = package_hls(clip)
+    assert out_dir == hls_dir(clip)
+    playlist = (out_dir / "index.m3u8").read_text()
+    assert "#EXT-X-ENDLIST" in playlist and "init.mp4" in playlist
+    built = (out_dir / "index.m3u8").stat().st_mtime_ns
+    asset, media_type = hls_asset(clip, "seg_00000.m4s")
+    assert asset == out_dir / "seg_00000.m4s" and media_type == "video/iso.segment"
+    assert package_hls(clip) == out_dir and (out_dir / "index.m3u8").stat().st_mtime_ns == built
+    assert catalog.cache_folder_entries("hls")[0][0] == "2025/01/02/hls/a"
@@ -0,0 +1,223 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.services import llm
+from backend.app.services.llm import LLMError, _backoff, _classify, _generate_async, _give_up
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"status {code}")
+        self.code = code
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: plays back a script of answers and errors."""
+
+    script = []
+    calls = 0
+    in_flight = 0
+    peak = 0
+    loops = []
+
+    def __init__(self, name):
+        self.name = name
+
+    async def generate_content_async(self, prompt, stream=False, request_options=None):
+        cls = FakeModel
+        cls.calls += 1
+        cls.loops.append(asyncio.get_running_loop())
+        cls.in_flight += 1
+        cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            step = cls.script.pop(0) if cls.script else f"answer to {prompt}"
+            if isinstance(step, float):
+                await asyncio.sleep(step)
+                step = f"answer to {prompt}"
+            if isinstance(step, BaseException):
+                raise step
+        finally:
+            cls.in_flight -= 1
+        if stream:
+            return _chunks(step if isinstance(step, list) else [step])
+        return SimpleNamespace(text=step)
+
+
+async def _chunks(parts):
+    for part in parts:
+        yield SimpleNamespace(text=part)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(llm, "_configured", True)
+    monkeypatch.setattr(llm.genai, "GenerativeModel", FakeModel)
+    for name, value in {"llm_max_retries": 2, "llm_backoff_base": 0.0, "llm_timeout": 5.0,
+                        "llm_max_concurrency": 2, "llm_cache_enabled": True}.items():
+        monkeypatch.setattr(llm.settings, name, value)
+    FakeModel.script, FakeModel.calls, FakeModel.in_flight, FakeModel.peak, FakeModel.loops = [], 0, 0, 0, []
+    return FakeModel
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (asyncio.TimeoutError(), (True, 504, "timeout")),
+    (ApiError(429), (True, 429, "rate_limited")),
+    (ApiError(503), (True, 502, "unavailable")),
+    (ApiError(504), (True, 504, "unavailable")),
+    (ApiError(400), (False, 502, "failed")),
+    (ValueError("bad"), (False, 502, "failed")),
+])
+def test_classify(exc, expected):
+    assert _classify(exc) == expected
+
+
+def test_give_up_after_the_last_retry(monkeypatch):
+    monkeypatch.setattr(llm.settings, "llm_max_retries", 2)
+    assert _give_up(ApiError(503), "story", 1) is None
+    error = _give_up(ApiError(503), "story", 2)
+    assert error.status_code == 502 and error.detail["attempts"] == 3 and error.detail["retryable"]
+    assert _give_up(ApiError(400), "story", 0).detail == {
+        "error": "llm_failed", "kind": "story", "message": "status 400", "attempts": 1, "retryable": False,
+    }
+
+
+def test_backoff_is_capped_full_jitter(monkeypatch):
+    monkeypatch.setattr(llm.settings, "llm_backoff_base", 0.5)
+    monkeypatch.setattr(llm.settings, "llm_backoff_max", 2.0)
+    assert all(0 <= _backoff(0) <= 0.5 for _ in range(50))
+    assert all(0 <= _backoff(10) <= 2.0 for _ in range(50))
+
+
+def test_transient_errors_are_retried_and_answers_cached(model):
+    model.script = [ApiError(503), ApiError(429), "hello"]
+    assert asyncio.run(_generate_async("p", "chat")) == "hello"
+    assert model.calls == 3
+    assert asyncio.run(_generate_async("p", "chat")) == "hello" and model.calls == 3
+    assert asyncio.run(_generate_async("p", "chat", regenerate=True)) == "answer to p" and model.calls == 4
+    assert asyncio.run(_generate_async("p", "chat")) == "answer to p"
+
+
+def test_permanent_errors_and_exhausted_retries_raise(model):
+    model.script = [ApiError(400)]
+    with pytest.raises(LLMError) as e:
+        asyncio.run(_generate_async("p", "chat"))
+    assert e.value.detail["attempts"] == 1 and model.calls == 1
+
+    model.script = [ApiError(503)] * 3
+    with pytest.raises(LLMError) as e:
+        asyncio.run(_generate_async("q", "chat"))
+    assert e.value.detail["error"] == "llm_unavailable" and e.value.detail["attempts"] == 3
+
+
+def test_calls_time_out_and_concurrency_is_bounded(model, monkeypatch):
+    monkeypatch.setattr(llm.settings, "llm_timeout", 0.05)
+    monkeypatch.setattr(llm.settings, "llm_max_retries", 0)
+    model.script = [1.0]
+    with pytest.raises(LLMError) as e:
+        asyncio.run(_generate_async("slow", "chat"))
+    assert e.value.status_code == 504 and e.value.detail["error"] == "llm_timeout"
+
+    monkeypatch.setattr(llm.settings, "llm_timeout", 5.0)
+
+    async def many():
+        model.script = [0.02] * 6
+        return await asyncio.gather(*(_generate_async(f"p{n}", "chat") for n in range(6)))
+
+    assert asyncio.run(many()) == [f"answer to p{n}" for n in range(6)]
+    assert model.peak == 2
+
+
+def test_sync_caption_entry_point_uses_the_async_client(model):
+    model.script = ["A Title\n\nA caption about pilots.\n\n#pilots"]
+    data = llm.generate_caption_and_title(filename="clip.mp4", transcript="pilots talk about landing", seed=None)
+    assert model.calls >= 1 and set(data) >= {"title", "caption", "hashtags"}
+
+
+def test_blocking_callers_share_one_loop_and_one_cap(model, monkeypatch):
+    def caption(n):
+        return llm.generate_caption_and_title(filename=f"{n}.mp4", transcript=f"transcript number {n}", seed=None)
+
+    model.script = [0.05] * 6
+    threads = [threading.Thread(target=caption, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(model.loops)) == 1 and model.peak == 2
+    caption(6)
+    assert len(set(model.loops)) == 1
+
+    # Once the app binds its loop, worker threads run their calls there; on the loop
+    # itself the blocking entry point refuses instead of deadlocking
+    async def app():
+        llm.bind_event_loop(asyncio.get_running_loop())
+        await asyncio.to_thread(caption, 7)
+        with pytest.raises(RuntimeError):
+            caption(8)
+        return asyncio.get_running_loop()
+
+    monkeypatch.setattr(llm, "_loop", None)
+    loop = asyncio.run(app())
+    assert model.loops[-1] is loop
+
+
+STORY = "My Title\nThe opening line.\n\n\n\nPart One\nWhat happened next!\nCore Lessons\n- keep going.\nThe end."
+
+
+def _chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _collect(events):
+    async def run():
+        return [event async for event in events]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_incremental_formatter_never_retracts_emitted_text(size):
+    formatter = llm._IncrementalFormatter(llm._format_story_universal)
+    emitted = "".join(formatter.feed(chunk) for chunk in _chunked(STORY, size))
+    tail, full = formatter.finish()
+    assert full == llm._format_story_universal(STORY)
+    assert emitted + tail == full
+
+
+def test_streamed_story_deltas_add_up_to_the_done_text(model):
+    model.script = [_chunked(STORY, 5), STORY]
+    events = _collect(llm.stream_story_events("Framing. The story itself.", regenerate=True))
+    assert [kind for kind, _ in events[:-1]] == ["delta"] * (len(events) - 1) and events[-1][0] == "done"
+    streamed = "".join(data["text"] for kind, data in events if kind == "delta")
+    assert streamed == events[-1][1]["text"]
+    assert streamed == llm._format_story_universal(STORY)
+    # The finished stream was cached: a repeat is served in one chunk without a model call
+    calls = model.calls
+    assert _collect(llm.stream_story_events("Framing. The story itself."))[-1][1]["text"] == streamed
+    assert model.calls == calls
+
+
+def test_whole_story_is_returned_verbatim(model):
+    model.script = ["\n" + STORY + "\n\n"]
+    assert asyncio.run(llm.generate_story_async("Framing. The story itself.", regenerate=True)) == STORY
+
+
+def test_stream_errors_after_the_first_chunk_are_not_retried(model, monkeypatch):
+    async def broken():
+        yield SimpleNamespace(text="Hello\n")
+        raise ApiError(503)
+
+    calls = []
+
+    async def generate(self, prompt, stream=False, request_options=None):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise ApiError(503)
+        return broken()
+
+    monkeypatch.setattr(model, "generate_content_async", generate)
+    with pytest.raises(LLMError) as e:
+        _collect(llm.stream_chat_events("hi"))
+    assert len(calls) == 2 and e.value.detail["retryable"] is False
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from backend.app.services import llm_cache
+from backend.app.services.llm_cache import cache_key
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(llm_cache.settings, "llm_cache_enabled", True)
+    monkeypatch.setattr(llm_cache.settings, "llm_cache_ttl", 3600.0)
+    monkeypatch.setattr(llm_cache.settings, "llm_cache_max_bytes", 1 << 20)
+    return llm_cache.settings
+
+
+def test_keys_ignore_layout_but_not_model_seed_or_temperature():
+    key = cache_key("flash", "Write a title\n  for:\tthis", 1, 0.7)
+    assert key == cache_key("flash", "  Write a title for: this ", 1, 0.7)
+    assert len({key, cache_key("pro", "Write a title for: this", 1, 0.7),
+                cache_key("flash", "Write a title for: this", 2, 0.7),
+                cache_key("flash", "Write a title for: this", 1, 0.9),
+                cache_key("flash", "Write a title for: that", 1, 0.7)}) == 5
+
+
+def test_hits_misses_and_expiry(limits, monkeypatch):
+    key = cache_key("flash", "prompt")
+    assert llm_cache.get(key, "caption") is None
+    llm_cache.put(key, "flash", "caption", "answer")
+    llm_cache.put(cache_key("flash", "empty"), "flash", "caption", "")
+    assert llm_cache.get(key, "caption") == "answer"
+    stats = llm_cache.stats()
+    assert stats["entries"] == 1 and stats["by_kind"]["caption"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    now = time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 3601)
+    assert llm_cache.get(key, "caption") is None and llm_cache.stats()["entries"] == 0
+
+    limits.llm_cache_enabled = False
+    llm_cache.put(key, "flash", "caption", "answer")
+    assert llm_cache.get(key, "caption") is None
+
+
+def test_eviction_drops_least_recently_used_entries(limits):
+    for n in range(4):
+        llm_cache.put(f"k{n}", "flash", "story", "x" * 100)
+        time.sleep(0.002)
+    llm_cache.get("k0", "story")
+    limits.llm_cache_max_bytes = 250
+    assert llm_cache.evict() == 2
+    assert [llm_cache.get(f"k{n}", "story") is not None for n in range(4)] == [True, False, False, True]
+    assert llm_cache.clear() == 2 and llm_cache.stats()["by_kind"] == {}
@@ -0,0 +1,97 @@
+import email
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.app.services import media_delivery
+from backend.app.services.media_delivery import (
+    IMMUTABLE_CACHE, MAX_RANGES, REVALIDATE_CACHE, media_response, parse_range,
+)
+from backend.tests.conftest import store
+
+DATA = bytes(range(256)) * 4
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=1000-", [(1000, 1023)]),
+    ("bytes=-24", [(1000, 1023)]),
+    ("bytes=-5000", [(0, 1023)]),
+    ("bytes=1000-9999", [(1000, 1023)]),
+    ("bytes=500-599, 0-9, 10-19, 550-700", [(0, 19), (500, 700)]),
+    ("BYTES = 0-0", [(0, 0)]),
+    ("bytes=2000-, -0", []),
+    ("bytes=5-1", None),
+    ("bytes=abc", None),
+    ("bytes=1-x", None),
+    ("items=0-1", None),
+    ("bytes=", None),
+    ("bytes=" + ",".join(f"{n * 10}-{n * 10}" for n in range(MAX_RANGES + 1)), None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(DATA)) == expected
+
+
+@pytest.fixture
+def client():
+    async def serve(request):
+        return media_response(request, request.app.state.path, media_type="video/mp4")
+
+    app = Starlette(routes=[Route("/a", serve, methods=["GET", "HEAD"])])
+    app.state.path = store("2025/01/02/clips/a.bin", DATA)
+    return TestClient(app)
+
+
+def test_full_and_single_range_responses(client):
+    full = client.get("/a")
+    assert full.status_code == 200 and full.content == DATA
+    assert full.headers["accept-ranges"] == "bytes" and full.headers["cache-control"] == REVALIDATE_CACHE
+    part = client.get("/a", headers={"Range": "bytes=-10"})
+    assert part.status_code == 206 and part.content == DATA[-10:]
+    assert part.headers["content-range"] == "bytes 1014-1023/1024"
+    head = client.head("/a", headers={"Range": "bytes=0-9"})
+    assert head.status_code == 206 and head.headers["content-length"] == "10" and head.content == b""
+    bad = client.get("/a", headers={"Range": "bytes=4096-"})
+    assert bad.status_code == 416 and bad.headers["content-range"] == "bytes */1024"
+    # Unparseable ranges are ignored rather than rejected
+    assert client.get("/a", headers={"Range": "bytes=9-1"}).status_code == 200
+
+
+def test_multiple_ranges_are_sent_as_multipart(client):
+    response = client.get("/a", headers={"Range": "bytes=0-9, 100-109, 5-14"})
+    assert response.status_code == 206
+    assert int(response.headers["content-length"]) == len(response.content)
+    message = email.message_from_bytes(
+        b"Content-Type: " + response.headers["content-type"].encode() + b"\r\n\r\n" + response.content
+    )
+    parts = message.get_payload()
+    assert [p["Content-Range"] for p in parts] == ["bytes 0-14/1024", "bytes 100-109/1024"]
+    assert [p["Content-Type"] for p in parts] == ["video/mp4"] * 2
+    assert [p.get_payload(decode=True) for p in parts] == [DATA[:15], DATA[100:110]]
+
+
+def test_conditional_requests(client):
+    first = client.get("/a")
+    etag, modified = first.headers["etag"], first.headers["last-modified"]
+    assert client.get("/a", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get("/a", headers={"If-Modified-Since": modified}).status_code == 304
+    assert client.get("/a", headers={"If-None-Match": '"other"', "If-Modified-Since": modified}).status_code == 200
+
+    assert client.get("/a", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    stale = client.get("/a", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.content == DATA
+    assert client.get("/a", headers={"Range": "bytes=0-9", "If-Range": modified}).status_code == 206
+    later = os.stat(client.app.state.path).st_mtime + 60
+    os.utime(client.app.state.path, (later, later))
+    assert client.get("/a", headers={"Range": "bytes=0-9", "If-Range": modified}).status_code == 200
+    assert client.get("/a").headers["etag"] != etag
+
+
+def test_content_addressed_files_are_immutable(client, monkeypatch):
+    monkeypatch.setattr(media_delivery, "content_key", lambda path: "ab" * 32)
+    response = client.get("/a")
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+    assert response.headers["etag"] == '"' + "ab" * 16 + '"'
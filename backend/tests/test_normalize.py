@@ -0,0 +1,74 @@
+import os
+import struct
+
+from backend.app.services import pipeline
+from backend.app.services.content_store import dedupe_original, file_sha256, source_hash
+from backend.app.services.normalize import (
+    frame_rate_mode, needs_faststart, normalize_original, primary_audio_index, top_level_atoms,
+)
+from backend.tests.conftest import store
+
+
+def _box(kind: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def test_top_level_atoms_follow_box_headers():
+    large = struct.pack(">I", 1) + b"free" + struct.pack(">Q", 24) + b"\0" * 8
+    data = _box(b"ftyp", b"isom") + large + _box(b"mdat", b"\0" * 100) + struct.pack(">I", 0) + b"moov" + b"\0" * 20
+    path = store("a.mp4", data)
+    assert top_level_atoms(path) == ["ftyp", "free", "mdat", "moov"]
+    assert needs_faststart(path)
+    assert not needs_faststart(store("b.mp4", _box(b"ftyp") + _box(b"moov") + _box(b"mdat")))
+    assert not needs_faststart(store("c.mp4", _box(b"ftyp") + _box(b"mdat")))
+    # A corrupt size stops the walk instead of looping
+    assert top_level_atoms(store("d.mp4", _box(b"ftyp") + struct.pack(">I", 4) + b"moov")) == ["ftyp"]
+
+
+def test_frame_rate_mode():
+    def probe(r, avg):
+        return {"streams": [{"codec_type": "audio"}, {"codec_type": "video", "r_frame_rate": r, "avg_frame_rate": avg}]}
+
+    assert frame_rate_mode(probe("30/1", "30/1"))["vfr"] is False
+    assert frame_rate_mode(probe("30000/1001", "2997/100"))["vfr"] is False
+    assert frame_rate_mode(probe("60/1", "24/1")) == {"vfr": True, "r_frame_rate": 60.0, "avg_frame_rate": 24.0}
+    assert frame_rate_mode(probe("0/0", "30/1"))["vfr"] is None
+    assert frame_rate_mode({"streams": []})["vfr"] is None
+
+
+def test_primary_audio_index_prefers_the_default_then_the_widest_track():
+    def probe(*tracks):
+        return {"streams": [{"codec_type": "video"}] + [dict(t, codec_type="audio") for t in tracks]}
+
+    assert primary_audio_index(probe()) is None
+    assert primary_audio_index(probe({"channels": 2}, {"channels": 6}, {"channels": 6})) == 1
+    assert primary_audio_index(probe({"channels": 6}, {"channels": 2, "disposition": {"default": 1}})) == 1
+
+
+def test_trailing_moov_is_remuxed_in_place(make_video):
+    clip = make_video("2025/01/02/original/a.mp4")
+    assert needs_faststart(clip)
+    report = normalize_original(clip)
+    assert report["remuxed"] and report["reasons"] == ["faststart"] and report["error"] is None
+    assert not needs_faststart(clip) and "moov" in top_level_atoms(clip)
+    assert normalize_original(clip)["remuxed"] is False
+    assert normalize_original(store("2025/01/02/original/b.mkv"))["faststart"] is None
+
+
+def test_reuploads_of_a_normalized_file_dedupe_to_it(make_video, monkeypatch):
+    first = make_video("2025/01/02/original/a.mp4")
+    raw = first.read_bytes()
+    raw_sha = file_sha256(first)
+    assert dedupe_original(first, raw_sha) is None
+    normalized_sha = pipeline._normalize(first, raw_sha)
+    assert normalized_sha != raw_sha and not needs_faststart(first)
+
+    second = store("2025/01/03/original/a.mp4", raw)
+    assert dedupe_original(second, raw_sha) == first.resolve()
+    assert os.path.samefile(first, second) and source_hash(second) == normalized_sha
+
+    def _again(path):
+        raise AssertionError("normalized twice")
+
+    monkeypatch.setattr(pipeline, "normalize_original", _again)
+    assert pipeline._normalize(second, raw_sha) == normalized_sha
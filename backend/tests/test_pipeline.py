@@ -0,0 +1,92 @@
+import json
+import time
+
+from backend.app.services import pipeline
+from backend.app.services.content_store import clip_key, dedupe_original, file_sha256, source_hash, store_clip
+from backend.app.services.pipeline import OUTPUTS, enabled_steps, ingest_dir, release_ingest, slice_transcript
+from backend.tests.conftest import store
+
+TRANSCRIPT = {
+    "transcript": "one two three",
+    "language": "en",
+    "segments": [
+        {"start": 0.0, "end": 4.0, "text": "one"},
+        {"start": 4.0, "end": 9.0, "text": "two"},
+        {"start": 9.0, "end": 12.0, "text": "three"},
+    ],
+}
+
+
+def _wait(media):
+    deadline = time.monotonic() + 10
+    while pipeline.status(media)["job"]["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return pipeline.status(media)
+
+
+def test_enabled_steps_pull_in_their_dependencies(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "pipeline_steps", "caption, bogus")
+    assert enabled_steps() == ["probe", "audio", "transcript", "caption"]
+    monkeypatch.setattr(pipeline.settings, "pipeline_steps", "normalize")
+    assert enabled_steps() == ["normalize"]
+
+
+def test_slice_transcript_keeps_segments_centred_in_the_range():
+    sliced = slice_transcript(TRANSCRIPT, 3.0, 10.0)
+    assert sliced["transcript"] == "two" and sliced["duration"] == 7.0
+    assert sliced["segments"] == [{"start": 1.0, "end": 6.0, "text": "two"}]
+    assert slice_transcript(TRANSCRIPT, 1.0, 11.0)["transcript"] == "one two three"
+
+
+def test_trimmed_clips_reuse_the_source_transcript():
+    src = store("2025/01/02/original/a.mp4", b"source")
+    work = ingest_dir(source_hash(src))
+    work.mkdir(parents=True)
+    (work / OUTPUTS["transcript"]).write_text(json.dumps(TRANSCRIPT))
+    key = clip_key(source_hash(src), 3.0, 10.0, "copy")
+    clip = store_clip(key, store("2025/01/02/clips/a_3_10.mp4", b"clip"), source_hash(src), 3.0, 10.0)
+    assert pipeline.cached_transcript(clip)["transcript"] == "two"
+    # Stored under the clip's own hash for the next lookup
+    assert (ingest_dir(source_hash(clip)) / OUTPUTS["transcript"]).exists()
+
+
+def test_jobs_run_the_dag_and_skip_audio_steps_for_silent_video(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "pipeline_steps", "transcript")
+    ran = []
+
+    def _probe(media, work, cancel):
+        ran.append("probe")
+        (work / OUTPUTS["probe"]).write_text(json.dumps({"streams": [{"codec_type": "video"}]}))
+
+    monkeypatch.setitem(pipeline._RUNNERS, "probe", _probe)
+    media = store("2025/01/02/original/a.mp4")
+    assert pipeline.schedule(media)["steps"] == {"probe": "queued", "audio": "queued", "transcript": "queued"}
+    result = _wait(media)
+    assert ran == ["probe"] and result["job"]["status"] == "done"
+    assert result["job"]["steps"] == {"probe": "done", "audio": "skipped", "transcript": "skipped"}
+    assert result["ready"]["probe"] and not result["ready"]["transcript"]
+    assert pipeline.schedule(store("2025/01/02/original/notes.txt")) is None
+
+
+def test_failed_steps_are_reported(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "pipeline_steps", "probe")
+
+    def _broken(media, work, cancel):
+        raise RuntimeError("no decoder")
+
+    monkeypatch.setitem(pipeline._RUNNERS, "probe", _broken)
+    media = store("2025/01/02/original/a.mp4")
+    pipeline.schedule(media)
+    job = _wait(media)["job"]
+    assert job["status"] == "failed" and job["error"] == "no decoder" and job["steps"] == {"probe": "failed"}
+
+
+def test_ingest_results_are_released_with_the_last_copy():
+    media = store("2025/01/02/original/a.mp4", b"content")
+    sha = file_sha256(media)
+    dedupe_original(media, sha)
+    ingest_dir(sha).mkdir(parents=True)
+    assert not release_ingest(sha)
+    media.unlink()
+    assert release_ingest(sha) and not ingest_dir(sha).exists()
+    assert not release_ingest(None) and not release_ingest(sha)
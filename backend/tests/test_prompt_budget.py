@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from backend.app.services import captions, llm
+from backend.app.services.prompt_budget import (
+    CHARS_PER_TOKEN, GAP_MARKER, SEGMENT_WORDS, STOP_WORDS, chunk_text, estimate_tokens, rank_segments,
+    select_segments, split_segments,
+)
+
+TOPICS = ["engine failure checklist", "crosswind landing technique", "radio phraseology", "fuel planning reserves"]
+
+
+def _transcript(sentences=200, seed=7):
+    rng = random.Random(seed)
+    lines = []
+    for n in range(sentences):
+        topic = TOPICS[0] if n % 3 else rng.choice(TOPICS)
+        lines.append(f"Sentence {n} is about the {topic} and {rng.choice(['we', 'you', 'they'])} practice it.")
+    return " ".join(lines)
+
+
+def test_split_segments_keeps_sentences_and_cuts_run_ons():
+    assert split_segments("One two.  Three four?\nFive!") == ["One two.", "Three four?", "Five!"]
+    run_on = " ".join(f"w{n}" for n in range(SEGMENT_WORDS * 2 + 5))
+    assert [len(s.split()) for s in split_segments(run_on)] == [SEGMENT_WORDS, SEGMENT_WORDS, 5]
+    assert split_segments("") == []
+
+
+def test_rank_prefers_segments_sharing_the_main_topic():
+    segments = [
+        "the engine failure checklist starts with airspeed",
+        "run the engine failure checklist from memory",
+        "my cousin bakes sourdough bread",
+        "after an engine failure fly the checklist",
+    ]
+    scores = rank_segments(segments)
+    assert scores.argmin() == 2 and len(scores) == 4
+    assert list(rank_segments(["the and of", "it is"])) == [0.0, 0.0]
+
+
+@pytest.mark.parametrize("budget", [20, 60, 200, 500])
+def test_selection_fits_the_budget_including_gap_markers(budget):
+    text = _transcript()
+    picked = select_segments(text, budget)
+    assert len(picked) <= budget * CHARS_PER_TOKEN
+    assert estimate_tokens(picked) <= budget
+
+
+def test_selection_keeps_transcript_order_and_drops_repeats():
+    text = _transcript() + " " + " ".join(["Remember the engine failure checklist."] * 5)
+    picked = select_segments(text, 150)
+    kept = [s for s in picked.replace(GAP_MARKER, "").split(". ") if s.startswith("Sentence")]
+    numbers = [int(s.split()[1]) for s in kept]
+    assert numbers == sorted(numbers) and len(numbers) > 1
+    assert picked.count("Remember the engine failure checklist.") <= 1
+    assert GAP_MARKER in picked
+
+
+def test_short_text_passes_through():
+    assert select_segments("Short and sweet.", 100) == "Short and sweet."
+
+
+def test_chunks_are_whole_consecutive_segments():
+    text = _transcript(60)
+    chunks = chunk_text(text, 100)
+    assert " ".join(chunks) == " ".join(split_segments(text))
+    assert all(len(c) <= 100 * CHARS_PER_TOKEN for c in chunks) and len(chunks) > 1
+
+
+def test_stop_words_are_shared_and_exclude_fillers():
+    assert {"the", "and", "they"} <= STOP_WORDS and "um" not in STOP_WORDS
+    assert captions.STOP_WORDS is STOP_WORDS and llm.STOP_WORDS is STOP_WORDS
+
+
+def test_budget_plan_picks_pass_through_extraction_or_map_reduce(monkeypatch):
+    monkeypatch.setattr(llm.settings, "llm_prompt_budget_tokens", 100)
+    monkeypatch.setattr(llm.settings, "llm_map_reduce_tokens", 400)
+    monkeypatch.setattr(llm.settings, "llm_map_chunk_tokens", 150)
+    assert llm._budget_plan("x " * 100) == ("as_is", [], 0)
+    assert llm._budget_plan(_transcript(15))[0] == "extract"
+    mode, chunks, per_chunk = llm._budget_plan(_transcript(200))
+    assert mode == "map_reduce" and len(chunks) > 2 and per_chunk == max(50, 100 // len(chunks))
@@ -0,0 +1,40 @@
+import threading
+
+from backend.app.services import proxies
+from backend.app.services.background import BackgroundQueue
+from backend.app.services.proxies import generate_proxy, preview_source, proxy_path, proxy_status
+from backend.tests.conftest import store
+
+
+def test_queue_dedupes_pending_keys_and_remembers_failures():
+    queue = BackgroundQueue("test")
+    release = threading.Event()
+    ran = []
+    assert queue.submit("k", lambda: (release.wait(5), ran.append(1)))
+    assert not queue.submit("k", ran.append, 2)
+    assert queue.is_pending("k")
+    release.set()
+    queue._executor.shutdown(wait=True)
+    assert ran == [1] and not queue.is_pending("k")
+
+    queue = BackgroundQueue("test")
+    queue.submit("bad", lambda: 1 / 0)
+    queue._executor.shutdown(wait=True)
+    assert queue.failure("bad") == "division by zero"
+
+
+def test_previews_fall_back_to_the_original_until_the_proxy_is_ready():
+    original = store("2025/01/02/original/o.mp4")
+    assert proxy_path(original).as_posix() == "storage/2025/01/02/proxies/o.mp4"
+    assert preview_source(original) == original
+    assert proxy_status(original) == {"status": "missing"}
+
+
+def test_generates_a_downscaled_proxy(make_video, monkeypatch):
+    monkeypatch.setattr(proxies.settings, "proxy_height", 60)
+    original = make_video("2025/01/02/original/o.mp4", seconds=1, size="320x180")
+    out = generate_proxy(original)
+    assert out == proxy_path(original) and out.stat().st_size > 0
+    assert not out.with_suffix(".part").exists()
+    assert preview_source(original) == out
+    assert proxy_status(original) == {"status": "ready"}
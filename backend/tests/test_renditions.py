@@ -0,0 +1,60 @@
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services import renditions
+from backend.app.services.renditions import PLATFORM_PRESETS, RenditionPreset, get_rendition, render_renditions
+from backend.tests.conftest import store
+
+
+def test_bitrates_are_numbers_formatted_for_ffmpeg():
+    assert RenditionPreset("a", 1, 1, 8000).max_bitrate == "8M"
+    assert RenditionPreset("b", 1, 1, 4500).max_bitrate == "4500k"
+    out = renditions.rendition_path(store("2025/01/02/clips/c.mp4"), "tiktok")
+    args = renditions._output_args(0, PLATFORM_PRESETS["tiktok"], out)
+    assert args[args.index("-maxrate") + 1] == "6M"
+    assert args[args.index("-bufsize") + 1] == "12000k"
+    assert args[args.index("-t") + 1] == "600"
+
+
+def test_filter_graph_decodes_once_and_splits_per_preset():
+    graph = renditions._filter_graph([PLATFORM_PRESETS["tiktok"], PLATFORM_PRESETS["youtube"]])
+    assert graph.startswith("[0:v]split=2[s0][s1];")
+    assert "[s0]scale=1080:1920" in graph and "[s1]scale=1920:1080" in graph
+
+
+def test_unknown_preset_is_rejected():
+    with pytest.raises(HTTPException) as e:
+        render_renditions(store("2025/01/02/clips/c.mp4"), ["myspace"])
+    assert e.value.status_code == 400
+
+
+def test_fresh_renditions_are_reused_without_encoding(monkeypatch):
+    clip = store("2025/01/02/clips/c.mp4")
+    cached = renditions.rendition_path(clip, "linkedin")
+    cached.parent.mkdir(parents=True)
+    cached.write_bytes(b"rendered")
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: pytest.fail("ffmpeg should not run"))
+    assert render_renditions(clip, ["linkedin", "linkedin"]) == {"linkedin": cached}
+    assert get_rendition(clip, None) == clip
+
+
+def test_renders_missing_presets_in_one_run(make_video):
+    clip = make_video("2025/01/02/clips/c.mp4", seconds=0.5)
+    out = render_renditions(clip, ["linkedin", "youtube"])
+    assert sorted(out) == ["linkedin", "youtube"]
+    assert all(p.stat().st_size > 0 and p.parent.name == "renditions" for p in out.values())
+    assert not list(out["linkedin"].parent.glob("*.part"))
+
+
+def test_concurrent_requests_for_one_clip_encode_once(make_video, monkeypatch):
+    clip = make_video("2025/01/02/clips/c.mp4", seconds=0.5)
+    real_run = subprocess.run
+    runs = []
+    monkeypatch.setattr(subprocess, "run", lambda cmd, **kw: (cmd[1] == "-y" and runs.append(cmd)) or real_run(cmd, **kw))
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(lambda _: get_rendition(clip, "linkedin"), range(3)))
+    assert len(runs) == 1 and len(set(results)) == 1 and results[0].stat().st_size > 0
+    assert not list(results[0].parent.glob("*.part"))
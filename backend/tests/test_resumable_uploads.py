@@ -0,0 +1,108 @@
+import asyncio
+import base64
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services import catalog
+from backend.app.services import resumable_uploads as uploads
+from backend.app.services.resumable_uploads import _merge, contiguous_offset, format_ranges, parse_checksum
+
+DATA = os.urandom(3000)
+
+
+def _write(upload_id, offset, data, checksum=None, pieces=2):
+    async def body():
+        step = max(1, len(data) // pieces)
+        for i in range(0, len(data), step):
+            yield data[i:i + step]
+    return asyncio.run(uploads.write_chunk(upload_id, offset, body(), checksum))
+
+
+@pytest.mark.parametrize("ranges, add, expected", [
+    ([], (0, 10), [[0, 10]]),
+    ([[0, 10]], (10, 20), [[0, 20]]),
+    ([[0, 10]], (20, 30), [[0, 10], [20, 30]]),
+    ([[0, 10], [20, 30]], (5, 25), [[0, 30]]),
+    ([[20, 30]], (0, 5), [[0, 5], [20, 30]]),
+    ([[0, 30]], (5, 10), [[0, 30]]),
+])
+def test_merge(ranges, add, expected):
+    assert _merge(ranges, *add) == expected
+
+
+def test_offsets_and_range_listing():
+    assert contiguous_offset({"ranges": []}) == 0
+    assert contiguous_offset({"ranges": [[10, 20]]}) == 0
+    assert contiguous_offset({"ranges": [[0, 5], [10, 20]]}) == 5
+    assert format_ranges({"ranges": [[0, 5], [10, 20]]}) == "0-4,10-19"
+
+
+def test_parse_checksum():
+    digest = hashlib.sha1(b"x").digest()
+    assert parse_checksum(None) is None
+    assert parse_checksum("SHA1 " + base64.b64encode(digest).decode()) == ("sha1", digest)
+    for header in ("crc32 AAAA", "sha1 not-base64!"):
+        with pytest.raises(HTTPException) as e:
+            parse_checksum(header)
+        assert e.value.status_code == 400
+
+
+def test_out_of_order_chunks_assemble_and_finalize(tmp_path):
+    session = uploads.create_upload("dir/clip.mp4", len(DATA))
+    upload_id = session["id"]
+    assert session["filename"] == "clip.mp4"
+    assert catalog.usage_summary()["kinds"]["upload"]["files"] == 2
+    _write(upload_id, 2000, DATA[2000:])
+    assert contiguous_offset(uploads.get_upload(upload_id)) == 0
+    with pytest.raises(HTTPException) as e:
+        uploads.finalize_upload(upload_id, tmp_path / "out.mp4")
+    assert e.value.status_code == 409 and "2000-2999" in e.value.detail
+
+    bad = ("sha256", hashlib.sha256(b"other").digest())
+    with pytest.raises(HTTPException) as e:
+        _write(upload_id, 0, DATA[:1000], bad)
+    assert e.value.status_code == 460
+    assert uploads.get_upload(upload_id)["ranges"] == [[2000, 3000]]
+
+    _write(upload_id, 0, DATA[:1000], ("sha256", hashlib.sha256(DATA[:1000]).digest()))
+    _write(upload_id, 1000, DATA[1000:2000], pieces=7)
+    assert uploads.get_upload(upload_id)["ranges"] == [[0, 3000]]
+    with pytest.raises(HTTPException):
+        _write(upload_id, 2500, DATA[:1000])
+
+    dest, sha = uploads.finalize_upload(upload_id, tmp_path / "storage/2025/01/02/original/clip.mp4",
+                                        hashlib.sha256(DATA).hexdigest())
+    assert dest.read_bytes() == DATA and sha == hashlib.sha256(DATA).hexdigest()
+    assert not (uploads.UPLOADS_ROOT / upload_id).exists()
+    assert "upload" not in catalog.usage_summary()["kinds"]
+    with pytest.raises(HTTPException) as e:
+        uploads.get_upload(upload_id)
+    assert e.value.status_code == 404
+
+
+@pytest.mark.parametrize("kwargs, status", [
+    ({"filename": "a.mp4", "length": 0}, 400),
+    ({"filename": "noext", "length": 10}, 400),
+    ({"filename": "a.mp4", "length": 1 << 60}, 413),
+])
+def test_create_rejects_bad_sessions(kwargs, status):
+    with pytest.raises(HTTPException) as e:
+        uploads.create_upload(**kwargs)
+    assert e.value.status_code == status
+
+
+def test_cancel_and_expiry(monkeypatch):
+    cancelled = uploads.create_upload("a.mp4", 10)["id"]
+    uploads.cancel_upload(cancelled)
+    assert not (uploads.UPLOADS_ROOT / cancelled).exists()
+    with pytest.raises(HTTPException):
+        uploads.cancel_upload("not-a-uuid")
+
+    stale = uploads.create_upload("b.mp4", 10)["id"]
+    os.utime(uploads.UPLOADS_ROOT / stale, (1, 1))
+    monkeypatch.setattr(uploads.settings, "upload_session_ttl", 60)
+    fresh = uploads.create_upload("c.mp4", 10)["id"]
+    assert not (uploads.UPLOADS_ROOT / stale).exists() and (uploads.UPLOADS_ROOT / fresh).exists()
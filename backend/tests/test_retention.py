@@ -0,0 +1,76 @@
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from backend.app.services import catalog, retention
+from backend.tests.conftest import store
+
+
+@pytest.fixture(autouse=True)
+def policy(monkeypatch, tmp_path):
+    for name, value in {
+        "retention_throttle": 0, "retention_original_days": 0, "retention_mezzanine_days": 0,
+        "retention_archive_days": 0, "storage_quota_bytes": 0, "archive_dir": str(tmp_path / "archive"),
+    }.items():
+        monkeypatch.setattr(retention.settings, name, value)
+    return retention.settings
+
+
+def _day(days_ago: int) -> str:
+    return (datetime.now() - timedelta(days=days_ago)).strftime("%Y/%m/%d")
+
+
+def _age(path: Path, days_ago: float) -> None:
+    when = (datetime.now() - timedelta(days=days_ago)).timestamp()
+    os.utime(path, (when, when))
+
+
+def test_tree_stats_count_hard_links_once():
+    a = store("2025/01/02/thumbnails/a/poster.jpg", b"x" * 100)
+    os.link(a, a.with_name("copy.jpg"))
+    b = store("2025/01/02/thumbnails/b/poster.jpg", b"x" * 10)
+    os.link(a, b.with_name("shared.jpg"))
+    seen = set()
+    assert retention._tree_stats(a.parent, seen)[0] == 100
+    assert retention._tree_stats(b.parent, seen)[0] == 10
+
+
+def test_dated_dirs_are_oldest_first_and_skip_impossible_dates():
+    for rel in ("2025/02/30/clips/x.mp4", "2025/01/10/clips/x.mp4", "2024/12/31/clips/x.mp4", "misc/1/2/x"):
+        store(rel)
+    assert [d.strftime("%Y/%m/%d") for d, _ in retention.dated_dirs()] == ["2024/12/31", "2025/01/10"]
+
+
+def test_old_dates_are_archived_and_old_originals_deleted(policy, tmp_path):
+    policy.retention_archive_days = 30
+    policy.retention_original_days = 10
+    cold = store(f"{_day(40)}/clips/c.mp4")
+    old = store(f"{_day(20)}/original/o.mp4", b"12345")
+    recent = store(f"{_day(1)}/original/r.mp4")
+    catalog.reconcile()
+
+    preview = retention.run_retention(dry_run=True)
+    assert preview["archived"] == [{"date": _day(40), "files": 1}]
+    assert preview["originals_deleted"] == [{"path": f"{_day(20)}/original/o.mp4", "size": 5}]
+    assert cold.exists() and old.exists()
+
+    retention.run_retention()
+    assert (tmp_path / "archive" / _day(40) / "clips/c.mp4").exists()
+    assert not cold.exists() and not cold.parent.parent.exists()
+    assert not old.exists() and recent.exists()
+
+
+def test_quota_evicts_least_recently_used_derived_entries(policy):
+    original = store(f"{_day(3)}/original/o.mp4", b"o" * 400)
+    stale = store(f"{_day(3)}/thumbnails/o/poster.jpg", b"t" * 300)
+    fresh = store(f"{_day(2)}/proxies/o.mp4", b"p" * 300)
+    _age(stale, 5)
+    _age(fresh, 1)
+    catalog.reconcile()
+    policy.storage_quota_bytes = 800
+    report = retention.run_retention()
+    assert [e["path"] for e in report["evicted"]] == [f"{_day(3)}/thumbnails/o"]
+    assert report["quota_satisfied"] and report["usage_after"] == 700
+    assert original.exists() and fresh.exists() and not stale.parent.exists()
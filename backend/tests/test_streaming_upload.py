@@ -0,0 +1,57 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.app.services.streaming_upload import stream_upload_to_disk
+
+DATA = os.urandom(300 * 1024)
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        result = await stream_upload_to_disk(request, lambda name: tmp_path / "out" / name, max_bytes=len(DATA))
+        return dict(result, path=str(result["path"]))
+
+    return TestClient(app)
+
+
+def test_file_part_is_streamed_to_its_final_path(client, tmp_path):
+    response = client.post("/upload", data={"note": "hello", "date": "2025/01/02"},
+                           files={"file": ("C:\\clips\\a.mp4", DATA, "video/mp4")})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["filename"] == "a.mp4" and result["fields"] == {"note": "hello", "date": "2025/01/02"}
+    assert result["bytes"] == len(DATA) and result["sha256"] == hashlib.sha256(DATA).hexdigest()
+    assert Path(result["path"]).read_bytes() == DATA
+    assert os.listdir(tmp_path / "out") == ["a.mp4"]
+
+
+def test_oversized_uploads_leave_nothing_behind(client, tmp_path):
+    response = client.post("/upload", files={"file": ("a.mp4", DATA + b"x", "video/mp4")})
+    assert response.status_code == 413
+    assert os.listdir(tmp_path / "out") == []
+
+
+@pytest.mark.parametrize("kwargs, status", [
+    ({"data": {"note": "only a field"}, "files": {"other": ("a.mp4", b"x")}}, 400),
+    ({"files": {"file": ("", b"x")}}, 400),
+    ({"content": b"raw", "headers": {"content-type": "application/octet-stream"}}, 415),
+    ({"files": {"file": ("a.mp4", b"x")}, "data": {"big": "y" * (65 * 1024)}}, 413),
+])
+def test_bad_requests(client, kwargs, status):
+    assert client.post("/upload", **kwargs).status_code == status
+
+
+def test_a_second_file_part_is_rejected(client, tmp_path):
+    files = [("file", ("a.mp4", DATA[:1000], "video/mp4")), ("file", ("b.mp4", b"appended", "video/mp4"))]
+    response = client.post("/upload", files=files)
+    assert response.status_code == 400
+    assert os.listdir(tmp_path / "out") == []
@@ -0,0 +1,59 @@
+import json
+import threading
+
+import numpy as np
+
+from backend.app.services import thumbnails
+from backend.app.services.thumbnails import _BytesLRU, generate_previews, get_poster_bytes, laplacian_variance
+
+
+def test_lru_is_bounded_by_bytes_and_keeps_recent_items():
+    lru = _BytesLRU(10)
+    lru.put(("a", 1), b"aaaa")
+    lru.put(("b", 1), b"bbbb")
+    assert lru.get(("a", 1)) == b"aaaa"
+    lru.put(("c", 1), b"cccc")
+    assert lru.get(("b", 1)) is None
+    assert lru.get(("a", 1)) == b"aaaa" and lru.get(("c", 1)) == b"cccc"
+    lru.put(("big", 1), b"x" * 11)
+    assert lru.get(("big", 1)) is None
+
+
+def test_laplacian_variance_prefers_the_sharpest_frame():
+    rng = np.random.default_rng(0)
+    flat = np.full((16, 16), 128, dtype=np.uint8)
+    noisy = rng.integers(0, 255, size=(16, 16), dtype=np.uint8)
+    scores = laplacian_variance(np.stack([flat, noisy, flat]))
+    assert scores.shape == (3,)
+    assert int(np.argmax(scores)) == 1 and scores[0] == 0
+
+
+def test_concurrent_generations_share_one_result(make_video):
+    clip = make_video("2025/01/02/clips/c.mp4", seconds=2)
+    results, errors = [], []
+
+    def _run():
+        try:
+            results.append(generate_previews(clip))
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=_run) for _ in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert not errors
+    out_dir = thumbnails.thumbnail_dir(clip)
+    assert sorted(p.name for p in out_dir.iterdir()) == ["poster.jpg", "sprite.jpg", "sprite.json"]
+    assert all(r == json.loads((out_dir / "sprite.json").read_text()) for r in results)
+
+
+def test_poster_bytes_come_from_the_lru_when_hot(make_video, monkeypatch):
+    clip = make_video("2025/01/02/clips/c.mp4")
+    monkeypatch.setattr(thumbnails, "_poster_cache", _BytesLRU(1 << 20))
+    first = get_poster_bytes(clip)
+    assert first.startswith(b"\xff\xd8")
+    monkeypatch.setattr(thumbnails, "generate_previews", lambda path: None)
+    (thumbnails.thumbnail_dir(clip) / "poster.jpg").unlink()
+    assert get_poster_bytes(clip) == first
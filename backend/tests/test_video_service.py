@@ -0,0 +1,61 @@
+from backend.models.database import Database
+from backend.services.file_scanner import FileScanner
+from backend.services.video_service import VideoService
+from backend.tests.conftest import store
+
+
+def _service(tmp_path):
+    db = Database(str(tmp_path / "captions.json"))
+    return VideoService(db, FileScanner(ignore_dirs={".*"}, pinned_roots=[], workers=1)), db
+
+
+def test_status_loads_the_caption_database_once(tmp_path, monkeypatch):
+    store("v/ai_intro.mp4", b"12345")
+    store("v/ai_intro.srt")
+    store("v/pilot_tips.mov")
+    store("v/tutorial.webm")
+    store("v/tutorial.txt")
+    service, db = _service(tmp_path)
+    db.save_caption("ai_intro_artificial_intelligence", {"caption": "c"})
+    db.save_caption("pilot_tips_pilot_decision-making", {"caption": "c"})
+
+    loads = []
+    real_load = Database._load_db
+    monkeypatch.setattr(Database, "_load_db", lambda self: loads.append(1) or real_load(self))
+    status = service.get_video_status("storage")
+    assert len(loads) == 1
+    assert status["ai_intro"]["size"] == 5
+    assert status["ai_intro"]["status"] == "✅ Complete"
+    assert status["ai_intro"]["caption_file_path"] == "storage/v/ai_intro.srt"
+    assert status["pilot_tips"]["has_caption_in_db"] and not status["pilot_tips"]["has_caption_file"]
+    assert status["tutorial"]["has_caption_file"] and not status["tutorial"]["has_caption_in_db"]
+    assert status["tutorial"]["status"] == "⏳ Needs caption"
+
+
+def test_orphan_report_is_a_dry_run_until_applied(tmp_path):
+    store("v/kept.mp4")
+    store("v/kept.srt")
+    store("v/gone.srt", b"123")
+    store("v/gone.vtt", b"45")
+    store("w/other.txt")
+    service, _ = _service(tmp_path)
+    report = service.reconcile_orphaned_captions("storage")
+    assert report["dry_run"] and report["removed"] == []
+    assert [o["path"] for o in report["orphans"]] == ["storage/v/gone.srt", "storage/v/gone.vtt", "storage/w/other.txt"]
+    assert report["total_bytes"] == 6 and (tmp_path / "storage/v/gone.srt").exists()
+
+    applied = service.reconcile_orphaned_captions("storage", dry_run=False)
+    assert applied["removed_count"] == 3 and not (tmp_path / "storage/v/gone.srt").exists()
+    assert (tmp_path / "storage/v/kept.srt").exists()
+
+
+def test_incremental_reconcile_only_checks_changed_directories(tmp_path):
+    store("v/a.srt")
+    store("w/b.mp4")
+    service, _ = _service(tmp_path)
+    service.reconcile_orphaned_captions("storage", dry_run=False)
+    store("w/c.srt")
+    service.scanner.invalidate("storage/w")
+    report = service.find_orphaned_captions("storage", incremental=True)
+    assert report["incremental"] and report["directories_checked"] == 1
+    assert [o["path"] for o in report["orphans"]] == ["storage/w/c.srt"]
@@ -0,0 +1,68 @@
+import subprocess
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services import waveform
+from backend.app.services.waveform import BASE_SAMPLES_PER_PEAK as SPP, MIN_PEAKS_PER_LEVEL, SAMPLE_RATE
+from backend.app.services.waveform import build_peak_pyramid, generate_waveform, read_waveform_window
+
+
+def test_pyramid_levels_are_interleaved_min_max_and_halve():
+    samples = np.arange(SPP * MIN_PEAKS_PER_LEVEL * 4, dtype=np.int16)
+    levels = build_peak_pyramid(samples)
+    assert [len(level) // 2 for level in levels] == [1024, 512, 256]
+    assert levels[0][:4].tolist() == [0, SPP - 1, SPP, 2 * SPP - 1]
+    assert levels[1][:2].tolist() == [0, 2 * SPP - 1]
+    assert levels[-1][-1] == samples[-1]
+
+
+def test_partial_last_peak_and_empty_input():
+    samples = np.array([5, -7] + [0] * SPP + [9], dtype=np.int16)
+    level0 = build_peak_pyramid(samples)[0]
+    assert level0.tolist() == [-7, 5, 0, 9]
+    assert build_peak_pyramid(np.zeros(0, dtype=np.int16))[0].tolist() == [0, 0]
+
+
+def test_streamed_decode_matches_the_in_memory_pyramid(make_video, monkeypatch):
+    media = make_video("2025/01/02/clips/c.mp4", seconds=2)
+    # Small reads so several blocks (and carried partial peaks) are exercised
+    monkeypatch.setattr(waveform, "READ_PEAKS", 7)
+    meta = generate_waveform(media)
+    pcm = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(media), "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+         "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"],
+        capture_output=True, check=True,
+    ).stdout
+    expected = build_peak_pyramid(np.frombuffer(pcm, dtype="<i2"))
+    out_dir = waveform.waveform_dir(media)
+    assert len(meta["levels"]) == len(expected)
+    for idx, level in enumerate(expected):
+        assert (out_dir / f"L{idx}.i16").read_bytes() == level.astype("<i2").tobytes()
+    assert meta["duration"] == pytest.approx(len(pcm) / 2 / SAMPLE_RATE)
+    assert not list(out_dir.glob("*.part"))
+
+
+def test_window_picks_the_coarsest_level_that_fills_the_width(make_video):
+    media = make_video("2025/01/02/clips/c.mp4", seconds=2)
+    payload, info = read_waveform_window(media, start=0.5, end=1.5, width=100)
+    spp = info["samples_per_peak"]
+    assert SAMPLE_RATE / spp >= 100 > SAMPLE_RATE / (spp * 2)
+    assert len(payload) == info["peaks"] * 4
+    small, info8 = read_waveform_window(media, level=info["level"], start=0.5, end=1.5, bits=8)
+    assert len(small) == info8["peaks"] * 2
+    with pytest.raises(HTTPException):
+        read_waveform_window(media, bits=12)
+
+
+def test_failed_writes_leave_no_part_files(tmp_path):
+    def _boom(f):
+        f.write(b"partial")
+        raise RuntimeError("disk full")
+
+    out_dir = tmp_path / "waveform"
+    out_dir.mkdir()
+    with pytest.raises(RuntimeError):
+        waveform._write_atomic(out_dir, "L0.i16", _boom)
+    assert list(out_dir.iterdir()) == []
@@ -22,6 +22,15 @@ class Config:
     SUPPORTED_VIDEO_FORMATS = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'}
     CAPTION_EXTENSIONS = {'.txt', '.caption', '.srt', '.vtt'}
     
+    # Directory scanning: directory-name patterns that are never descended into,
+    # optional pinned roots (relative to the working directory) that replace a full
+    # scan of ".", and the number of threads used for top-level subtrees
+    SCAN_IGNORE_DIRS = {'.*', 'node_modules', '__pycache__', 'venv', 'env', 'site-packages'} | {
+        d.strip() for d in os.environ.get('SCAN_IGNORE_DIRS', '').split(',') if d.strip()
+    }
+    SCAN_ROOTS = [d.strip() for d in os.environ.get('VIDEO_SCAN_ROOTS', '').split(',') if d.strip()]
+    SCAN_WORKERS = int(os.environ.get('SCAN_WORKERS') or 4)
+    
     # Caption settings
     DEFAULT_TEMPLATE = 'ai_tech'
     AVAILABLE_TEMPLATES = ['ai_tech', 'tutorial', 'general']